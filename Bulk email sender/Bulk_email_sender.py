@@ -1,14 +1,106 @@
 import streamlit as st
-import pandas as pd
-import openpyxl
 import email_sender as es
+from recipients import load_recipients, MissingEmailColumn
+from validation import EmailValidationService
+from campaign_queue import CampaignQueue
+from campaign_runner import CampaignRunner
 import tempfile
+import time
 # === CONFIGURATION ===
 APP_TITLE = "Bulk Email Sender"
 VALID_LICENSE_KEYS = ["ABC123-XYZ789", "FREEUSER-2024", "DEMOKEY-1111"]  # Replace with your actual keys
+POLL_SECONDS = 1  # how often the page refreshes while a campaign is sending
 
 st.set_page_config(page_title=APP_TITLE, layout="wide")
 
+
+# one validator per mode, kept across reruns so its address/domain caches stay warm
+@st.cache_resource
+def get_validator(check_deliverability):
+    return EmailValidationService(check_deliverability=check_deliverability)
+
+
+def recipients_for(upload, validator, check_deliverability):
+    # parsed and validated once per upload; while a campaign is sending the page
+    # reruns every POLL_SECONDS and must not read the list again
+    key=(upload.file_id, check_deliverability)
+    cached=st.session_state.get("recipients")
+    if cached is None or cached[0] != key:
+        upload.seek(0)
+        cached=(key, *load_recipients(upload, validator=validator))
+        st.session_state.recipients=cached
+    return cached[1], cached[2]
+
+
+def attachment_paths(uploads):
+    # one temporary file per uploaded attachment, reused across reruns; they are
+    # not deleted because an interrupted campaign resumes from these paths
+    saved=st.session_state.setdefault("attachment_paths", {})
+    paths=[]
+    for upload in uploads:
+        if upload.file_id not in saved:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=upload.name) as tmp_file:
+                tmp_file.write(upload.getvalue())
+            saved[upload.file_id]=tmp_file.name
+        paths.append(saved[upload.file_id])
+    return paths
+
+
+def start_runner(runner):
+    st.session_state.runner=runner
+    st.session_state.send_log=[]
+    st.session_state.last_event=None
+
+
+def show_progress():
+    # the campaign runs on a background thread; each rerun drains its progress queue
+    runner=st.session_state.get("runner")
+    if runner is None:
+        return
+    log=st.session_state.send_log
+    last=st.session_state.last_event
+    for event in runner.drain():
+        r=event.result
+        if r is not None:
+            if r.ok:
+                log.append(f"✅ Sent email to {r.name} <{r.email}>")
+            elif r.status == "retrying":
+                log.append(f"⏳ Will retry {r.email}: {r.error}")
+            else:
+                log.append(f"❌ Failed to send to {r.email}: {r.error}")
+        last=event
+    st.session_state.last_event=last
+
+    if last is not None:
+        eta=f", about {int(last.eta)}s left" if last.eta >= 0 and not last.done else ""
+        st.progress(last.fraction, text=f"{last.sent} sent, {last.failed} failed of {last.total} "
+                                        f"- {last.rate:.1f}/s{eta}")
+    if log:
+        with st.expander("Send log", expanded=True):
+            st.text("\n".join(log[-200:]))
+
+    if last is not None and last.done:
+        if last.error:
+            st.error(f"Error sending emails: {last.error}")
+        elif last.cancelled:
+            st.warning("Cancelled. You can resume the rest of the campaign below.")
+        elif last.sent + last.failed < last.total:
+            st.warning("Stopped early (daily limit). You can resume the rest later.")
+        else:
+            st.success("All emails processed.")
+        st.session_state.runner=None
+        return
+
+    c1, c2=st.columns(2)
+    if runner.control.paused:
+        c1.button("Resume sending", on_click=runner.resume)
+    else:
+        c1.button("Pause", on_click=runner.pause)
+    c2.button("Cancel", on_click=runner.cancel)
+    time.sleep(POLL_SECONDS)
+    st.rerun()
+
+
 # === UI ===
 st.title(APP_TITLE)
 st.markdown("🔐 **This app is protected by a license key.** Please enter your license to proceed.")
@@ -75,45 +167,36 @@ Instead, you must generate a **special one-time password** called an **App Passw
 
         email_send=[]
 
+        check_domains=st.checkbox("Check that recipient domains can receive mail (slower, uses DNS)")
+        validator=get_validator(check_domains)
+
         #uploading emails list file
         if file_type == 'csv or excel':
             csv_upload=st.file_uploader("Upload recipient list (.csv or .xlsx)",type=['csv','xlsx'])
             if csv_upload:
                 try:
-                    if csv_upload.name.endswith('.csv'):
-                        df=pd.read_csv(csv_upload)
-                    else:
-                        df=pd.read_excel(csv_upload)
-
-                    st.write(df.head())
-
-                    required_cols = ['email', 'emails', 'Email', 'Emails']
-                    # Find which valid column exists
-                    valid_email_col = None
-                    for col in required_cols:
-                        if col in df.columns:
-                            valid_email_col = col
-                            break
-                        
-                    if valid_email_col:
-                        for _, row in df.iterrows():
-                            email_value = str(row[valid_email_col]).strip()
-                            if es.is_valid_email(email_value):
-                                email_send.append(email_value)
-                        if not email_send:
-                            st.warning("No valid emails found in the file.")
-                    else:
-                        st.error("File must contain at least one column named: 'email', 'emails', 'Email', or 'Emails'")
-
-
+                    email_send, stats = recipients_for(csv_upload, validator, check_domains)
+                    st.write(email_send[:5])
+                    st.caption(f"{stats.valid} valid, {stats.invalid} invalid "
+                               f"({stats.undeliverable} undeliverable), "
+                               f"{stats.duplicate} duplicate, {stats.empty} empty row(s)")
+                    if stats.rejected:
+                        with st.expander("Rejected addresses"):
+                            st.table([{"email": e, "reason": r} for e, r in stats.rejected])
+                    if not email_send:
+                        st.warning("No valid emails found in the file.")
+                except MissingEmailColumn as e:
+                    st.error(str(e))
                 except Exception as e:
                     st.error(f"Failed to read the file: {e}")
 
         if file_type == 'text':
             txt_upload=st.file_uploader("Upload recipient list (.txt)",type='txt')
             if txt_upload is not None:
-                email_send=es.get_email_txt(file=txt_upload)
+                email_send, stats = recipients_for(txt_upload, validator, check_domains)
                 st.write(email_send)
+                st.caption(f"{stats.valid} valid, {stats.invalid} invalid "
+                           f"({stats.undeliverable} undeliverable), {stats.duplicate} duplicate")
             else:
                 st.warning("Upload a .txt file to continue")
 
@@ -124,14 +207,8 @@ Instead, you must generate a **special one-time password** called an **App Passw
 
         b=st.button("Send")
 
-        temp_path=[]
-
-        if attach_file:
-            # Save the file to a temporary location
-            for i in attach_file:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=i.name) as tmp_file:
-                    tmp_file.write(i.read())
-                    temp_path.append(tmp_file.name)
+        # Save the files to a temporary location
+        temp_path=attachment_paths(attach_file or [])
 
         if confirm:
             if b:
@@ -139,12 +216,30 @@ Instead, you must generate a **special one-time password** called an **App Passw
                     st.error("Please fill all the fields before sending emails.")
                 elif not email_send:
                     st.error("No valid recipients to send email to.")
+                elif st.session_state.get("runner") is not None:
+                    st.error("A campaign is already being sent.")
                 else:
-                    es.logic(email,password,email_body,subject,email_send,temp_path)
+                    start_runner(CampaignRunner.start_send(email,password,email_body,subject,email_send,temp_path,
+                                                           campaign_db=es.CAMPAIGN_DB))
 
         else:
             st.warning("confirm you want send the emails")
-        
+
+        #campaigns interrupted by a closed tab, a crash or a dropped connection
+        if email and st.session_state.get("runner") is None:
+            with CampaignQueue(es.CAMPAIGN_DB) as queue:
+                unfinished=queue.unfinished(sender=email)
+            for c in unfinished:
+                st.info(f"Unfinished campaign **{c['subject']}**: {c['remaining']} recipient(s) not sent yet.")
+                if st.button("Resume this campaign", key=f"resume_{c['id']}"):
+                    if not password:
+                        st.error("Enter your app password to resume.")
+                    else:
+                        start_runner(CampaignRunner.start_resume(c['id'], password, c['remaining'],
+                                                                 campaign_db=es.CAMPAIGN_DB))
+
+        show_progress()
+
     else:
         st.error("❌ Invalid license key. Please check and try again.")
         st.stop()
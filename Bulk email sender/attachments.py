@@ -0,0 +1,77 @@
+import mimetypes
+import mmap
+import os
+import threading
+from email.message import MIMEPart
+
+# total base64-encoded bytes kept in memory per campaign
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def guess_type(path):
+    mime_type, _ = mimetypes.guess_type(path)
+    if mime_type:
+        return mime_type.split('/')
+    return 'application', 'octet-stream'
+
+
+def build_part(path):
+    """Read `path` through mmap and return a base64-encoded attachment part."""
+    maintype, subtype = guess_type(path)
+    part = MIMEPart()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            part.set_content(b"", maintype=maintype, subtype=subtype, filename=os.path.basename(path))
+            return part, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                part.set_content(view, maintype=maintype, subtype=subtype, filename=os.path.basename(path))
+            finally:
+                view.release()
+    return part, size
+
+
+class AttachmentCache:
+    """Attachment MIME parts built once per campaign and shared by every message.
+
+    Each file is read and base64-encoded the first time it is needed; later
+    messages attach the same pre-encoded part. Files that would push the cache
+    past `max_bytes` are not kept and are rebuilt for each message instead.
+    """
+
+    def __init__(self, paths, max_bytes=MAX_CACHE_BYTES):
+        self.paths = list(paths or [])
+        self.max_bytes = max_bytes
+        self.cached_bytes = 0
+        self.bytes_read = 0
+        self._parts = {}
+        self._lock = threading.Lock()
+
+    def part(self, path):
+        part = self._parts.get(path)
+        if part is not None:
+            return part
+        with self._lock:
+            part = self._parts.get(path)
+            if part is not None:
+                return part
+            part, size = build_part(path)
+            self.bytes_read += size
+            encoded = len(part.get_payload())
+            if self.cached_bytes + encoded <= self.max_bytes:
+                self._parts[path] = part
+                self.cached_bytes += encoded
+        return part
+
+    def parts(self):
+        return [self.part(path) for path in self.paths]
+
+    def attach_to(self, msg):
+        if not self.paths:
+            return msg
+        msg.make_mixed()
+        for part in self.parts():
+            msg.attach(part)
+        return msg
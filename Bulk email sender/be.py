@@ -1,9 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
 import os
 import tempfile
 import email_sender as es
+from recipients import load_recipients
+from validation import EmailValidationService
+from campaign_queue import CampaignQueue
+from campaign_runner import CampaignRunner
+
+POLL_MS = 200  # how often the UI drains progress events
 
 class BulkEmailApp:
     def __init__(self, root):
@@ -13,6 +18,12 @@ class BulkEmailApp:
 
         self.attachments = []
         self.email_list = []
+        self.runner = None
+        # caches live as long as the window, so re-uploading a list is cheap
+        self.validators = {
+            False: EmailValidationService(),
+            True: EmailValidationService(check_deliverability=True),
+        }
 
         self.create_intro_screen()
 
@@ -59,6 +70,7 @@ class BulkEmailApp:
         self.password = tk.StringVar()
         self.subject = tk.StringVar()
         self.file_type = tk.StringVar(value='csv or excel')
+        self.check_domains = tk.BooleanVar(value=False)
 
         fields = [
             ("Your Email:", self.email),
@@ -79,11 +91,28 @@ class BulkEmailApp:
 
         ttk.Combobox(frame, values=["csv or excel", "text"], textvariable=self.file_type).pack(fill="x")
 
+        tk.Checkbutton(frame, text="Check that recipient domains can receive mail (slower)",
+                       variable=self.check_domains, bg="white", anchor="w").pack(fill="x")
+
         tk.Button(frame, text="Upload Recipient File", command=self.upload_file).pack(pady=5)
 
         self.send_button = tk.Button(frame, text="Send Emails", command=self.send_emails)
         self.send_button.pack(pady=10)
 
+        tk.Button(frame, text="Resume Unfinished Campaign", command=self.resume_campaign).pack(pady=(0, 10))
+
+        controls = tk.Frame(frame, bg="white")
+        controls.pack(fill="x")
+        self.pause_button = tk.Button(controls, text="Pause", command=self.toggle_pause, state="disabled")
+        self.pause_button.pack(side="left", padx=(0, 5))
+        self.cancel_button = tk.Button(controls, text="Cancel", command=self.cancel_sending, state="disabled")
+        self.cancel_button.pack(side="left")
+
+        self.progress = ttk.Progressbar(frame, maximum=1.0)
+        self.progress.pack(fill="x", pady=(5, 0))
+        self.progress_label = tk.Label(frame, text="", anchor="w", bg="white", fg="black")
+        self.progress_label.pack(fill="x")
+
         tk.Label(frame, text="📎 Attached Files:", anchor="w", bg="white", fg="black").pack(fill="x", pady=(10, 0))
         self.attachment_listbox = tk.Listbox(frame, height=5)
         self.attachment_listbox.pack(fill="x", pady=(0, 10))
@@ -113,27 +142,23 @@ class BulkEmailApp:
         ftype = self.file_type.get()
         if ftype == 'csv or excel':
             file = filedialog.askopenfilename(filetypes=[("CSV or Excel", "*.csv *.xlsx")])
-            if file:
-                try:
-                    df = pd.read_csv(file) if file.endswith(".csv") else pd.read_excel(file)
-                    self.email_list = []
-                    for col in ['email', 'emails', 'Email', 'Emails']:
-                        if col in df.columns:
-                            self.email_list = [str(e).strip() for e in df[col].dropna() if es.is_valid_email(str(e))]
-                            break
-                    for email in self.email_list:
-                        self.email_listbox.insert(tk.END, email)
-                    self.log(f"Loaded {len(self.email_list)} valid email(s).")
-                except Exception as e:
-                    self.log(f"Error reading file: {e}")
         else:
             file = filedialog.askopenfilename(filetypes=[("Text File", "*.txt")])
-            if file:
-                with open(file, 'rb') as f:
-                    self.email_list = es.get_email_txt(f)
-                for email in self.email_list:
-                    self.email_listbox.insert(tk.END, email)
-                self.log(f"Loaded {len(self.email_list)} valid email(s).")
+        if not file:
+            return
+        try:
+            validator = self.validators[self.check_domains.get()]
+            self.email_list, stats = load_recipients(file, validator=validator)
+        except Exception as e:
+            self.log(f"Error reading file: {e}")
+            return
+        for email in self.email_list:
+            self.email_listbox.insert(tk.END, email)
+        self.log(f"Loaded {stats.valid} valid email(s) "
+                 f"({stats.invalid} invalid, {stats.undeliverable} undeliverable, "
+                 f"{stats.duplicate} duplicate skipped).")
+        for email, reason in stats.rejected[:20]:
+            self.log(f"  skipped {email}: {reason}")
 
     def send_emails(self):
         email = self.email.get()
@@ -149,12 +174,101 @@ class BulkEmailApp:
             messagebox.showerror("Error", "No valid emails to send.")
             return
 
+        if self.runner is not None:
+            messagebox.showerror("Error", "A campaign is already being sent.")
+            return
+
         self.log("Sending emails...")
-        try:
-            es.logic(email, password, body, subject, self.email_list, self.attachments)
+        self.start_runner(CampaignRunner.start_send(
+            email, password, body, subject, self.email_list, self.attachments, campaign_db=es.CAMPAIGN_DB))
+
+    def resume_campaign(self):
+        email = self.email.get()
+        password = self.password.get()
+        if not (email and password):
+            messagebox.showerror("Error", "Enter your email and app password to resume.")
+            return
+
+        if self.runner is not None:
+            messagebox.showerror("Error", "A campaign is already being sent.")
+            return
+
+        with CampaignQueue(es.CAMPAIGN_DB) as queue:
+            unfinished = queue.unfinished(sender=email)
+        if not unfinished:
+            messagebox.showinfo("Resume", "No unfinished campaigns for this address.")
+            return
+
+        c = unfinished[0]
+        if not messagebox.askyesno("Resume", f"Resume '{c['subject']}' ({c['remaining']} recipient(s) left)?"):
+            return
+        self.log(f"Resuming '{c['subject']}'...")
+        self.start_runner(CampaignRunner.start_resume(c['id'], password, c['remaining'], campaign_db=es.CAMPAIGN_DB))
+
+    # --- background sending: SMTP runs on the runner's thread, the UI only polls its queue ---
+
+    def start_runner(self, runner):
+        self.runner = runner
+        self.send_button.config(state="disabled")
+        self.pause_button.config(state="normal", text="Pause")
+        self.cancel_button.config(state="normal")
+        self.progress["value"] = 0
+        self.root.after(POLL_MS, self.poll_progress)
+
+    def poll_progress(self):
+        for event in self.runner.drain(limit=200):
+            r = event.result
+            if r is not None:
+                if r.ok:
+                    self.log(f"✅ Sent to {r.email}")
+                elif r.status == "retrying":
+                    self.log(f"⏳ Will retry {r.email}: {r.error}")
+                else:
+                    self.log(f"❌ Failed to send to {r.email}: {r.error}")
+            self.show_progress(event)
+            if event.done:
+                self.finish_runner(event)
+                return
+        self.root.after(POLL_MS, self.poll_progress)
+
+    def show_progress(self, event):
+        self.progress["value"] = event.fraction
+        eta = f", about {int(event.eta)}s left" if event.eta >= 0 and not event.done else ""
+        state = " (paused)" if event.paused else ""
+        self.progress_label.config(
+            text=f"{event.sent} sent, {event.failed} failed of {event.total} "
+                 f"- {event.rate:.1f}/s{eta}{state}")
+
+    def finish_runner(self, event):
+        if event.error:
+            self.log(f"❌ Error sending emails: {event.error}")
+        elif event.cancelled:
+            self.log("⏹ Cancelled. Use 'Resume Unfinished Campaign' to send the rest.")
+        elif event.sent + event.failed < event.total:
+            self.log("⏸ Stopped early (daily limit). Resume later to send the rest.")
+        else:
             self.log("✅ All emails processed.")
-        except Exception as e:
-            self.log(f"❌ Error sending emails: {e}")
+        self.send_button.config(state="normal")
+        self.pause_button.config(state="disabled", text="Pause")
+        self.cancel_button.config(state="disabled")
+        self.runner = None
+
+    def toggle_pause(self):
+        if self.runner is None:
+            return
+        if self.runner.control.paused:
+            self.runner.resume()
+            self.pause_button.config(text="Pause")
+            self.log("▶ Resumed.")
+        else:
+            self.runner.pause()
+            self.pause_button.config(text="Resume")
+            self.log("⏸ Paused.")
+
+    def cancel_sending(self):
+        if self.runner is not None:
+            self.runner.cancel()
+            self.log("Cancelling...")
 
     def log(self, message):
         self.log_text.insert(tk.END, message + "\n")
@@ -0,0 +1,106 @@
+"""SMTP round trips and CPU per recipient: one transaction each vs. prepared messages vs. envelopes.
+
+    python bench_envelopes.py --recipients 1000 --size-kb 200 --envelope-size 50
+
+All three modes deliver to a local SMTPSink through the same pool:
+
+    per-recipient  what logic() used to do: build an EmailMessage per
+                   recipient (cached attachment parts) and send_message it
+    prepared       PreparedMessage.render: headers and attachments serialized
+                   once, To and the base64 body spliced in per recipient
+    envelopes      a template without {name}: one serialized message sent to
+                   --envelope-size recipients per SMTP transaction
+
+Round trips are the command lines the sink received plus one per DATA
+payload (smtplib does not pipeline). CPU is this process's time, so it
+covers message building, serialization and smtplib but not the sink.
+"""
+import argparse
+import os
+import tempfile
+import time
+from email.message import EmailMessage
+
+from attachments import AttachmentCache
+from prepared import PreparedMessage
+from smtp_pool import RawMessage, SMTPPool, deliver
+from smtp_sink import SMTPSink
+
+SENDER = "sender@example.com"
+SUBJECT = "Benchmark"
+
+
+def run(name, recipients, paths, pool_size, send):
+    with SMTPSink() as sink:
+        with SMTPPool(sink.host, sink.port, SENDER, "x", size=pool_size, use_ssl=False) as pool:
+            pool.warm()
+            # the connections are open; count only the sending itself
+            start_commands, start_bytes = sink.commands, sink.bytes_received
+            cpu = time.process_time()
+            wall = time.perf_counter()
+            results = send(pool, recipients, AttachmentCache(paths))
+            cpu = time.process_time() - cpu
+            wall = time.perf_counter() - wall
+        failed = sum(not r.ok for r in results)
+        round_trips = sink.commands - start_commands + sink.messages
+        n = len(recipients)
+        print(f"{name:<14} {sink.messages:>7} {round_trips:>8} {round_trips / n:>8.2f} "
+              f"{(sink.bytes_received - start_bytes) / n / 1024:>9.1f} {cpu / n * 1000:>9.3f} "
+              f"{n / wall:>9.0f} {failed:>6}")
+    return round_trips, cpu
+
+
+def per_recipient(pool, recipients, cache):
+    def make_message(name, email):
+        msg = EmailMessage()
+        msg['Subject'] = SUBJECT
+        msg['From'] = SENDER
+        msg['To'] = email
+        msg.set_content(f"Hello {name},\n\nThis is the benchmark message.")
+        return cache.attach_to(msg)
+    return deliver(pool, recipients, make_message)
+
+
+def prepared(pool, recipients, cache):
+    message = PreparedMessage(SENDER, SUBJECT, "Hello {name},\n\nThis is the benchmark message.", cache)
+    return deliver(pool, recipients, lambda name, email: RawMessage(SENDER, message.render(name, email)))
+
+
+def envelopes(size):
+    def send(pool, recipients, cache):
+        message = PreparedMessage(SENDER, SUBJECT, "Hello,\n\nThis is the benchmark message.", cache)
+        return deliver(pool, recipients, None, shared=RawMessage(SENDER, message.shared), batch_size=size)
+    return send
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--size-kb", type=float, default=100, help="attachment size (0 for none)")
+    parser.add_argument("--envelope-size", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=3)
+    args = parser.parse_args()
+
+    recipients = [(f"User {i}", f"user{i}@example.com") for i in range(args.recipients)]
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        if args.size_kb:
+            path = os.path.join(tmp, "brochure.pdf")
+            with open(path, "wb") as f:
+                f.write(os.urandom(int(args.size_kb * 1024)))
+            paths.append(path)
+
+        print(f"{args.recipients} recipients, {args.size_kb:g} KB attachment, pool of {args.pool_size}")
+        print(f"{'mode':<14} {'txns':>7} {'trips':>8} {'trips/r':>8} {'KB/r':>9} {'cpu ms/r':>9} "
+              f"{'r/s':>9} {'failed':>6}")
+        base_trips, base_cpu = run("per-recipient", recipients, paths, args.pool_size, per_recipient)
+        _, prep_cpu = run("prepared", recipients, paths, args.pool_size, prepared)
+        env_trips, env_cpu = run(f"envelopes/{args.envelope_size}", recipients, paths, args.pool_size,
+                                 envelopes(args.envelope_size))
+    print(f"prepared: {base_cpu / prep_cpu:.1f}x less CPU per recipient; envelopes: "
+          f"{base_trips - env_trips} fewer round trips ({base_trips / env_trips:.1f}x), "
+          f"{base_cpu / env_cpu:.1f}x less CPU")
+
+
+if __name__ == "__main__":
+    main()
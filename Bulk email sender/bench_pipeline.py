@@ -0,0 +1,228 @@
+"""End-to-end throughput of the bulk sender against a local SMTP sink, no UI.
+
+    python bench_pipeline.py --recipients 10000 --format csv --attachment-kb 200
+    python bench_pipeline.py --recipients 5000 --format xlsx,txt --static --json results.json
+
+For each list format a recipient file is generated (names, a share of
+malformed and duplicate addresses), then the same path the Streamlit and
+Tk front ends use is run on it: recipients.load_recipients (read,
+pre-filter, dedupe, validate) and email_sender.logic (campaign queue,
+MIME building, pooled delivery) against an SMTPSink on localhost with no
+rate limit. --static uses a body without {name}, which logic() sends in
+multi-recipient envelopes.
+
+Per stage it reports wall time, and for the send workers the summed
+thread time spent building messages and in SMTP; "rss MB" is the peak
+resident set size of the process after that stage. Building and sending
+are timed by wrapping email_sender's PreparedMessage and SMTPPool for
+the duration of the run, so the code path itself is unchanged.
+Deliverability (DNS) checks are off unless --check-deliverability is
+given, since they measure the resolver rather than this code.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import email_sender as es
+from recipients import load_recipients
+from smtp_sink import SMTPSink
+from validation import EmailValidationService
+
+SENDER = "bench@example.com"
+DOMAINS = ("example.com", "example.org", "mail.example.net", "corp.example.io")
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+def make_rows(n, invalid, duplicate, seed=1):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        r = rng.random()
+        if r < invalid:
+            email = f"user{i}@@{rng.choice(DOMAINS)}"
+        elif r < invalid + duplicate and rows:
+            email = rng.choice(rows)[1]
+        else:
+            email = f"user{i}@{rng.choice(DOMAINS)}"
+        rows.append((f"User {i}", email))
+    return rows
+
+
+def write_list(path, fmt, rows):
+    if fmt == "csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("Name", "Email"))
+            writer.writerows(rows)
+    elif fmt == "xlsx":
+        import openpyxl
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(("Name", "Email"))
+        for row in rows:
+            ws.append(row)
+        wb.save(path)
+    else:
+        with open(path, "w") as f:
+            for name, email in rows:
+                f.write(f"{name} <{email}> - please add to the newsletter\n")
+
+
+class TimedValidator:
+    """The validation service, adding up the time spent in validate_many."""
+
+    def __init__(self, service):
+        self.service = service
+        self.seconds = 0.0
+
+    def validate_many(self, emails):
+        report = self.service.validate_many(emails)
+        self.seconds += report.seconds
+        return report
+
+
+class Timings:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.build = 0.0
+        self.smtp = 0.0
+
+    def add(self, stage, seconds):
+        with self.lock:
+            setattr(self, stage, getattr(self, stage) + seconds)
+
+
+def instrument(timings):
+    """Subclasses of email_sender's PreparedMessage and SMTPPool that record where the time goes."""
+
+    class TimedPreparedMessage(es.PreparedMessage):
+        def __init__(self, *args, **kwargs):
+            started = time.perf_counter()
+            super().__init__(*args, **kwargs)
+            timings.add("build", time.perf_counter() - started)
+
+        def render(self, name, email):
+            started = time.perf_counter()
+            try:
+                return super().render(name, email)
+            finally:
+                timings.add("build", time.perf_counter() - started)
+
+    class TimedPool(es.SMTPPool):
+        def send(self, msg, to_addrs=None):
+            started = time.perf_counter()
+            try:
+                return super().send(msg, to_addrs)
+            finally:
+                timings.add("smtp", time.perf_counter() - started)
+
+    return TimedPreparedMessage, TimedPool
+
+
+def run(fmt, args, tmp, attachments):
+    path = os.path.join(tmp, f"recipients.{fmt}")
+    started = time.perf_counter()
+    write_list(path, fmt, make_rows(args.recipients, args.invalid, args.duplicate))
+    generate = time.perf_counter() - started
+    stages = {"generate": {"seconds": generate, "rssMb": peak_rss_mb(), "bytes": os.path.getsize(path)}}
+
+    validator = TimedValidator(EmailValidationService(check_deliverability=args.check_deliverability))
+    started = time.perf_counter()
+    recipients, stats = load_recipients(path, validator=validator)
+    ingest = time.perf_counter() - started
+    stages["ingest"] = {"seconds": ingest - validator.seconds, "rssMb": peak_rss_mb()}
+    stages["validate"] = {"seconds": validator.seconds, "rssMb": peak_rss_mb(),
+                          "valid": stats.valid, "invalid": stats.invalid, "duplicate": stats.duplicate}
+
+    body = "Hello,\n\nOur news this month." if args.static else "Hello {name},\n\nOur news this month."
+    timings = Timings()
+    original = es.PreparedMessage, es.SMTPPool
+    es.PreparedMessage, es.SMTPPool = instrument(timings)
+    try:
+        with SMTPSink() as sink:
+            cpu = time.process_time()
+            started = time.perf_counter()
+            results = es.logic(SENDER, "x", body, "Benchmark", recipients, attachments,
+                               campaign_db=os.path.join(tmp, f"campaign-{fmt}.db"),
+                               host=sink.host, port=sink.port, use_ssl=False, pool_size=args.pool_size,
+                               per_second=0, per_day=None, envelope_size=args.envelope_size)
+            send = time.perf_counter() - started
+            cpu = time.process_time() - cpu
+    finally:
+        es.PreparedMessage, es.SMTPPool = original
+    sent = sum(r.ok for r in results)
+    stages["send"] = {"seconds": send, "rssMb": peak_rss_mb(), "cpuSeconds": cpu,
+                      "buildThreadSeconds": timings.build, "smtpThreadSeconds": timings.smtp,
+                      "sent": sent, "failed": len(results) - sent, "transactions": sink.messages,
+                      "wireBytes": sink.bytes_received}
+    return {"format": fmt, "recipients": len(recipients), "stages": stages,
+            "messagesPerSecond": sent / send if send else 0.0,
+            "pipelineMessagesPerSecond": sent / (ingest + send) if ingest + send else 0.0,
+            "wireBytesPerMessage": sink.bytes_received / sent if sent else 0.0}
+
+
+def report(result):
+    s = result["stages"]
+    print(f"\n{result['format']}: {result['recipients']} recipients after ingestion "
+          f"({s['validate']['invalid']} invalid, {s['validate']['duplicate']} duplicate)")
+    print(f"  {'stage':<10} {'seconds':>9} {'rss MB':>8}")
+    for name in ("generate", "ingest", "validate", "send"):
+        print(f"  {name:<10} {s[name]['seconds']:9.3f} {s[name]['rssMb']:8.1f}")
+    send = s["send"]
+    print(f"  send: {send['sent']} sent, {send['failed']} failed in {send['transactions']} SMTP transactions; "
+          f"cpu {send['cpuSeconds']:.2f} s, build {send['buildThreadSeconds']:.2f} thread-s, "
+          f"smtp {send['smtpThreadSeconds']:.2f} thread-s")
+    print(f"  {result['messagesPerSecond']:.0f} msgs/s sending, {result['pipelineMessagesPerSecond']:.0f} msgs/s "
+          f"including ingestion; {send['wireBytes'] / 1e6:.1f} MB on the wire "
+          f"({result['wireBytesPerMessage'] / 1024:.1f} KB/msg)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=2000)
+    parser.add_argument("--format", default="csv", help="csv, xlsx and/or txt, comma separated")
+    parser.add_argument("--invalid", type=float, default=0.02, help="share of malformed addresses")
+    parser.add_argument("--duplicate", type=float, default=0.03, help="share of repeated addresses")
+    parser.add_argument("--attachments", type=int, default=1)
+    parser.add_argument("--attachment-kb", type=float, default=100)
+    parser.add_argument("--static", action="store_true", help="body without {name} (envelope batching)")
+    parser.add_argument("--pool-size", type=int, default=es.POOL_SIZE)
+    parser.add_argument("--envelope-size", type=int, default=es.ENVELOPE_SIZE)
+    parser.add_argument("--check-deliverability", action="store_true")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        attachments = []
+        for n in range(args.attachments if args.attachment_kb else 0):
+            path = os.path.join(tmp, f"attachment{n}.pdf")
+            with open(path, "wb") as f:
+                f.write(os.urandom(int(args.attachment_kb * 1024)))
+            attachments.append(path)
+        print(f"{args.recipients} rows, {len(attachments)} x {args.attachment_kb:g} KB attachment(s), "
+              f"{'static' if args.static else 'personalized'} body, pool of {args.pool_size}")
+        for fmt in args.format.split(","):
+            result = run(fmt, args, tmp, attachments)
+            report(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from smtp_pool import SendResult
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+RETRYING = "retrying"
+
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 5      # seconds before the first retry, doubled on each attempt
+BACKOFF_MAX = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    sender TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    attachments TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recipients (
+    campaign_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    error TEXT NOT NULL DEFAULT '',
+    updated REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (campaign_id, seq)
+);
+CREATE INDEX IF NOT EXISTS recipients_due ON recipients (campaign_id, state, next_attempt);
+CREATE INDEX IF NOT EXISTS recipients_sent ON recipients (state, updated);
+"""
+
+
+def backoff(attempts):
+    # exponential with +-50% jitter so retries from parallel workers spread out
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.5)
+
+
+class CampaignQueue:
+    """Persistent per-recipient campaign state in SQLite (WAL mode).
+
+    Every recipient is `pending`, `sent`, `failed` or `retrying`. State
+    changes are buffered and committed every `commit_every` results or
+    `commit_interval` seconds, whichever comes first, so a crash can lose at
+    most one batch of `sent` marks (those recipients are sent again on resume).
+    """
+
+    def __init__(self, path=":memory:", commit_every=50, commit_interval=1.0):
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.RLock()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def create(self, recipients, sender, subject, body, attachments=None, campaign_id=None):
+        """Store a new campaign of (name, email) recipients and return its id.
+
+        Creating a campaign whose id already exists is a no-op, so callers can
+        pass a stable id and simply call `create` again to resume.
+        """
+        campaign_id = campaign_id or uuid.uuid4().hex
+        with self.lock:
+            exists = self.conn.execute("SELECT 1 FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+            if exists:
+                return campaign_id
+            self.conn.execute(
+                "INSERT INTO campaigns (id, created, sender, subject, body, attachments) VALUES (?, ?, ?, ?, ?, ?)",
+                (campaign_id, time.time(), sender, subject, body, json.dumps(list(attachments or []))))
+            self.conn.executemany(
+                "INSERT INTO recipients (campaign_id, seq, name, email, state) VALUES (?, ?, ?, ?, ?)",
+                ((campaign_id, seq, name, email, PENDING) for seq, (name, email) in enumerate(recipients)))
+            self.conn.commit()
+        return campaign_id
+
+    def campaign(self, campaign_id):
+        row = self.conn.execute("SELECT * FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown campaign {campaign_id}")
+        info = dict(row)
+        info["attachments"] = json.loads(info["attachments"])
+        return info
+
+    def unfinished(self, sender=None):
+        """Campaigns that still have pending or retrying recipients, newest first."""
+        sql = """SELECT c.id, c.created, c.sender, c.subject, COUNT(r.seq) AS remaining
+                 FROM campaigns c JOIN recipients r ON r.campaign_id = c.id
+                 WHERE r.state IN (?, ?)"""
+        params = [PENDING, RETRYING]
+        if sender:
+            sql += " AND c.sender = ?"
+            params.append(sender)
+        sql += " GROUP BY c.id ORDER BY c.created DESC"
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def due(self, campaign_id, limit=500):
+        with self.lock:
+            self.flush()
+            return [dict(row) for row in self.conn.execute(
+                """SELECT seq, name, email, attempts FROM recipients
+                   WHERE campaign_id = ? AND state IN (?, ?) AND next_attempt <= ?
+                   ORDER BY next_attempt, seq LIMIT ?""",
+                (campaign_id, PENDING, RETRYING, time.time(), limit))]
+
+    def next_due_in(self, campaign_id):
+        """Seconds until the next retry is due, or None when nothing is left to send."""
+        with self.lock:
+            self.flush()
+            row = self.conn.execute(
+                "SELECT MIN(next_attempt) FROM recipients WHERE campaign_id = ? AND state IN (?, ?)",
+                (campaign_id, PENDING, RETRYING)).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def mark(self, campaign_id, seq, attempts, result, max_attempts=MAX_ATTEMPTS):
+        """Record a SendResult for one recipient. Returns the new state."""
+        attempts += 1
+        next_attempt = 0
+        if result.status == "sent":
+            state = SENT
+        elif result.status == "deferred":
+            # not attempted (e.g. daily limit) - leave it for a later run
+            state, attempts = PENDING, attempts - 1
+        elif result.transient and attempts < max_attempts:
+            state = RETRYING
+            next_attempt = time.time() + backoff(attempts)
+        else:
+            state = FAILED
+        with self.lock:
+            self.conn.execute(
+                """UPDATE recipients SET state = ?, attempts = ?, next_attempt = ?, error = ?, updated = ?
+                   WHERE campaign_id = ? AND seq = ?""",
+                (state, attempts, next_attempt, result.error, time.time(), campaign_id, seq))
+            self._uncommitted += 1
+            if (self._uncommitted >= self.commit_every
+                    or time.monotonic() - self._last_commit >= self.commit_interval):
+                self.flush()
+        return state
+
+    def flush(self):
+        with self.lock:
+            if self._uncommitted:
+                self.conn.commit()
+                self._uncommitted = 0
+            self._last_commit = time.monotonic()
+
+    def counts(self, campaign_id):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT state, COUNT(*) FROM recipients WHERE campaign_id = ? GROUP BY state",
+                (campaign_id,)).fetchall()
+        return {state: n for state, n in rows}
+
+    def sent_since(self, since, sender=None):
+        """Recipients marked sent at or after `since`, from `sender`'s campaigns only if given.
+
+        Providers cap sends per account, so the daily limit counts one sender.
+        """
+        sql = "SELECT COUNT(*) FROM recipients r"
+        params = [SENT, since]
+        where = " WHERE r.state = ? AND r.updated >= ?"
+        if sender:
+            sql += " JOIN campaigns c ON c.id = r.campaign_id"
+            where += " AND c.sender = ?"
+            params.append(sender)
+        with self.lock:
+            return self.conn.execute(sql + where, params).fetchone()[0]
+
+    def results(self, campaign_id):
+        """Final SendResult per recipient, in the campaign's original order."""
+        with self.lock:
+            self.flush()
+            rows = self.conn.execute(
+                "SELECT name, email, state, error FROM recipients WHERE campaign_id = ? ORDER BY seq",
+                (campaign_id,)).fetchall()
+        return [SendResult(row["email"], row["name"], status=row["state"], error=row["error"]) for row in rows]
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,145 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+import email_sender as es
+
+
+class CampaignControl:
+    """Pause/cancel switches shared between a UI thread and the send workers."""
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()  # wake paused workers so they can exit
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def wait_if_paused(self):
+        self._running.wait()
+
+    def sleep(self, seconds):
+        # sleep that returns early on cancel
+        self._cancelled.wait(seconds)
+
+
+@dataclass
+class ProgressEvent:
+    sent: int
+    failed: int
+    total: int
+    rate: float             # emails finished per second so far
+    eta: float              # seconds left at the current rate, -1 if unknown
+    result: object = None   # the SendResult behind this event, None for the final event
+    done: bool = False
+    error: str = ""
+    paused: bool = False
+    cancelled: bool = False
+
+    @property
+    def fraction(self):
+        return min(1.0, (self.sent + self.failed) / self.total) if self.total else 1.0
+
+
+class CampaignRunner:
+    """Run a campaign on a background thread and publish ProgressEvents.
+
+    The UI thread never touches SMTP: it starts the runner, calls `drain()`
+    periodically (Tk's `root.after`, a Streamlit rerun) to collect events
+    from the thread-safe queue, and uses `pause`/`resume`/`cancel`.
+    """
+
+    def __init__(self, fn, *args, total=0, **kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.total = total
+        self.control = CampaignControl()
+        self.events = queue.Queue()
+        self.sent = 0
+        self.failed = 0
+        self.results = None
+        self.error = ""
+        self.started = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @classmethod
+    def start_send(cls, *args, **kwargs):
+        """Background equivalent of email_sender.logic(...)."""
+        emails = args[4]
+        return cls(es.logic, *args, total=len(emails), **kwargs).start()
+
+    @classmethod
+    def start_resume(cls, campaign_id, password, remaining, **kwargs):
+        """Background equivalent of email_sender.resume(...)."""
+        return cls(es.resume, campaign_id, password, total=remaining, **kwargs).start()
+
+    def start(self):
+        self.started = time.monotonic()
+        self._thread.start()
+        return self
+
+    def _event(self, result=None, done=False):
+        finished = self.sent + self.failed
+        elapsed = time.monotonic() - self.started
+        rate = finished / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - finished) / rate if rate and self.total else -1
+        return ProgressEvent(self.sent, self.failed, self.total, rate, eta, result, done,
+                             self.error, self.control.paused, self.control.cancelled)
+
+    def _on_result(self, res):
+        with self._lock:
+            if res.ok:
+                self.sent += 1
+            elif res.status == "failed":
+                self.failed += 1
+            self.events.put(self._event(res))
+
+    def _run(self):
+        try:
+            self.results = self.fn(*self.args, on_result=self._on_result, control=self.control, **self.kwargs)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            with self._lock:
+                self.events.put(self._event(done=True))
+
+    def drain(self, limit=None):
+        events = []
+        while limit is None or len(events) < limit:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    @property
+    def done(self):
+        return self.started is not None and not self._thread.is_alive()
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def cancel(self):
+        self.control.cancel()
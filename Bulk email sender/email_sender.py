@@ -1,60 +1,133 @@
-import smtplib
 from email.message import EmailMessage
-import time
-from email_validator import validate_email, EmailNotValidError
-import re
-import streamlit as st
 import os
-import mimetypes
+import re
+import time
+from attachments import AttachmentCache
+from campaign_queue import CampaignQueue, RETRYING
+from prepared import PreparedMessage
+from smtp_pool import RawMessage, SMTPPool, TokenBucket, deliver
+from validation import default_service
+
+# === SMTP CONFIGURATION ===
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+POOL_SIZE = 3       # authenticated connections used in parallel
+PER_SECOND = 5      # max emails per second across all connections
+PER_DAY = 500       # Gmail's daily sending limit
+BATCH_SIZE = 500    # recipients taken from the campaign queue at a time
+ENVELOPE_SIZE = 50  # recipients per SMTP transaction when everyone gets the same message
+CAMPAIGN_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "campaigns.db")
 
 
 #check email format
 def is_valid_email(email):
-    try:
-        valid = validate_email(email)
-        return True
-    except EmailNotValidError:
-        return False
+    return default_service.is_valid(email)
     
 def get_email_txt(file):
     content = file.read().decode('utf-8')  # Read file content
     email_pattern = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
     return list(set(re.findall(email_pattern, content)))  # Unique emails
 
+def parse_recipient(line):
+    # Support optional name,email format
+    if "," in line:
+        name, email = map(str.strip, line.split(",", 1))
+    else:
+        email = line.strip()
+        name = ""
+    return name, email
+
 #send emails
-def logic(EMAIL_ADDRESS,EMAIL_PASSWORD,EMAIL_BODY,SUBJECT,emails,attachments=None):
-
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
-        smtp.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-
-        for line in emails:
-            # Support optional name,email format
-            if "," in line:
-                name, email = map(str.strip, line.split(",", 1))
-            else:
-                email = line
-                name = ""
-
-            msg = EmailMessage()
-            msg['Subject'] = SUBJECT
-            msg['From'] = EMAIL_ADDRESS
-            msg['To'] = email
-            msg.set_content(EMAIL_BODY.format(name=name))
-            if attachments:
-                for file in attachments:
-                    mime_type, _ = mimetypes.guess_type(file)
-                    if mime_type:
-                        maintype, subtype = mime_type.split('/')
-                    else:
-                        maintype, subtype = 'application', 'octet-stream'
-                    
-                    with open(file,"rb") as f:
-                        file_data = f.read()
-                        msg.add_attachment(file_data, maintype=maintype, subtype=subtype, filename=os.path.basename(file))
-
-            try:
-                smtp.send_message(msg)
-                st.write(f"✅ Sent email to {name} <{email}>")
-                time.sleep(0.5)  # Delay between emails
-            except Exception as e:
-                st.write(f"❌ Failed to send to {email}: {e}")
\ No newline at end of file
+def logic(EMAIL_ADDRESS,EMAIL_PASSWORD,EMAIL_BODY,SUBJECT,emails,attachments=None,
+          campaign_db=None,campaign_id=None,**options):
+    """Queue the campaign, send it and return one SendResult per recipient.
+
+    With `campaign_db` the queue is persisted, so an interrupted campaign can
+    be finished later with `resume` (or by calling logic again with the same
+    `campaign_id`) without mailing anyone twice.
+    """
+    queue = CampaignQueue(campaign_db or ":memory:")
+    try:
+        recipients = [parse_recipient(line) for line in emails]
+        campaign_id = queue.create(recipients, EMAIL_ADDRESS, SUBJECT, EMAIL_BODY, attachments, campaign_id)
+        return run_campaign(queue, campaign_id, EMAIL_PASSWORD, **options)
+    finally:
+        queue.close()
+
+def resume(campaign_id,EMAIL_PASSWORD,campaign_db=CAMPAIGN_DB,**options):
+    """Finish a stored campaign, skipping recipients that were already sent."""
+    with CampaignQueue(campaign_db) as queue:
+        return run_campaign(queue, campaign_id, EMAIL_PASSWORD, **options)
+
+def run_campaign(queue,campaign_id,EMAIL_PASSWORD,host=SMTP_HOST,port=SMTP_PORT,use_ssl=True,
+                 pool_size=POOL_SIZE,per_second=PER_SECOND,per_day=PER_DAY,envelope_size=ENVELOPE_SIZE,
+                 on_result=None,control=None):
+    campaign = queue.campaign(campaign_id)
+    EMAIL_ADDRESS = campaign["sender"]
+
+    # each attachment is read and encoded once for the whole campaign
+    attachment_cache = AttachmentCache(campaign["attachments"])
+    # and headers + attachments are serialized once; only To and the body change per recipient
+    prepared = PreparedMessage(EMAIL_ADDRESS, campaign["subject"], campaign["body"], attachment_cache)
+
+    def build_message(name, email):
+        msg = EmailMessage()
+        msg['Subject'] = campaign["subject"]
+        msg['From'] = EMAIL_ADDRESS
+        msg['To'] = email
+        msg.set_content(campaign["body"].format(name=name))
+        return attachment_cache.attach_to(msg)
+
+    def make_message(name, email):
+        data = prepared.render(name, email)
+        if data is None:
+            return build_message(name, email)  # non-ASCII address: smtplib negotiates SMTPUTF8
+        return RawMessage(EMAIL_ADDRESS, data)
+
+    # no {name} in the body: one message, many envelope recipients per transaction (Bcc-style)
+    shared = None
+    if prepared.shared is not None and envelope_size > 1:
+        shared = RawMessage(EMAIL_ADDRESS, prepared.shared)
+
+    # count what this account already sent today (from this database) against the daily cap
+    limiter = TokenBucket(per_second=per_second, per_day=per_day,
+                          sent_today=queue.sent_since(time.time() - 86400, sender=EMAIL_ADDRESS))
+
+    with SMTPPool(host, port, EMAIL_ADDRESS, EMAIL_PASSWORD, size=pool_size, use_ssl=use_ssl) as pool:
+        pool.warm()
+        while not (control is not None and control.cancelled):
+            batch = queue.due(campaign_id, BATCH_SIZE)
+            if not batch:
+                wait = queue.next_due_in(campaign_id)
+                if wait is None:
+                    break
+                # only retries are left; wait for the next one
+                if control is not None:
+                    control.sleep(wait)
+                else:
+                    time.sleep(wait)
+                continue
+
+            def recorder(rows):
+                def record(res):
+                    row = rows[res.index]
+                    if queue.mark(campaign_id, row["seq"], row["attempts"], res) == RETRYING:
+                        res.status = "retrying"
+                    if on_result is not None:
+                        on_result(res)
+                return record
+
+            groups = [(batch, {})]
+            if shared is not None:
+                groups = [([row for row in batch if row["email"].isascii()],
+                           {"shared": shared, "batch_size": envelope_size}),
+                          ([row for row in batch if not row["email"].isascii()], {})]
+            results = []
+            for rows, mode in groups:
+                if rows:
+                    results += deliver(pool, [(row["name"], row["email"]) for row in rows], make_message,
+                                       limiter=limiter, on_result=recorder(rows), control=control, **mode)
+            if any(r.status == "deferred" for r in results):
+                break  # daily limit reached or cancelled; the rest stays pending for a later resume
+
+    return queue.results(campaign_id)
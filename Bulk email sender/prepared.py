@@ -0,0 +1,86 @@
+import base64
+from email.message import EmailMessage
+from string import Formatter
+
+# stand-ins serialized into the template and replaced per recipient; both
+# survive serialization unchanged (a short ASCII address, a base64 body)
+TO_SLOT = "recipient@prepared.invalid"
+BODY_SLOT = "prepared-body-slot"
+UNDISCLOSED = "undisclosed-recipients:;"
+
+BASE64_LINE = 57  # input bytes per 76-character base64 line, as the email package writes them
+
+
+def is_personalized(body):
+    """True if the body template has any {field} to fill in per recipient."""
+    try:
+        return any(field is not None for _, field, _, _ in Formatter().parse(body))
+    except ValueError:
+        return True  # unbalanced braces: leave it to str.format to report
+
+
+def wire_bytes(msg):
+    # CRLF line endings, as send_message would put them on the wire
+    return msg.as_bytes(policy=msg.policy.clone(linesep="\r\n"))
+
+
+def encode_body(text):
+    """`text` as the base64 body lines set_content(text, cte="base64") would write."""
+    data = b"\n".join(text.encode("utf-8").splitlines()) + b"\n"
+    return b"".join(base64.b64encode(data[i:i + BASE64_LINE]) + b"\r\n"
+                    for i in range(0, len(data), BASE64_LINE))
+
+
+class PreparedMessage:
+    """A campaign message serialized to bytes once, completed per recipient by splicing.
+
+    Headers and attachments are written once (attachments come already
+    encoded from the campaign's AttachmentCache). `render(name, email)`
+    inserts the recipient's address and their base64-encoded body between
+    the pre-serialized pieces. For templates without placeholders, `shared`
+    is the single message sent to many envelope recipients at once, with
+    "To: undisclosed-recipients:;" like a Bcc.
+
+    Addresses that are not ASCII need SMTPUTF8, which only smtplib's
+    send_message negotiates; `render` returns None for those (and for every
+    recipient if the sender is not ASCII) so the caller builds an
+    EmailMessage instead.
+    """
+
+    def __init__(self, sender, subject, body, attachment_cache):
+        self.sender = sender
+        self.body = body
+        self.personalized = is_personalized(body)
+        self.supported = sender.isascii()
+        self.shared = None
+        self._static_body = None if self.personalized else encode_body(body.format(name=""))
+        if not self.supported:
+            return
+
+        msg = self._template(subject, TO_SLOT)
+        msg.set_content(BODY_SLOT, cte="base64")
+        data = wire_bytes(attachment_cache.attach_to(msg))
+        head, to_slot, rest = data.partition(TO_SLOT.encode())
+        middle, body_slot, tail = rest.partition(encode_body(BODY_SLOT))
+        if not (to_slot and body_slot):
+            raise ValueError("could not locate the recipient and body in the serialized message")
+        self._pieces = (head, middle, tail)
+
+        if not self.personalized:
+            msg = self._template(subject, UNDISCLOSED)
+            msg.set_content(body.format(name=""))
+            self.shared = wire_bytes(attachment_cache.attach_to(msg))
+
+    def _template(self, subject, to):
+        msg = EmailMessage()
+        msg['Subject'] = subject
+        msg['From'] = self.sender
+        msg['To'] = to
+        return msg
+
+    def render(self, name, email):
+        if not (self.supported and email.isascii()):
+            return None
+        head, middle, tail = self._pieces
+        body = self._static_body or encode_body(self.body.format(name=name))
+        return b"".join((head, email.encode("ascii"), middle, body, tail))
@@ -0,0 +1,162 @@
+import hashlib
+import io
+import os
+import re
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from validation import default_service
+
+EMAIL_COLUMNS = ('email', 'emails')
+NAME_COLUMNS = ('name', 'names', 'full name')
+CHUNK_ROWS = 50_000
+MAX_REJECTED = 1000  # rejected addresses kept for display
+
+# cheap syntax pre-filter run on whole chunks before the expensive validate_email call
+SYNTAX_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+# addresses pulled out of free text in .txt uploads
+TXT_PATTERN = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+
+
+class MissingEmailColumn(ValueError):
+    pass
+
+
+@dataclass
+class IngestStats:
+    valid: int = 0
+    invalid: int = 0
+    duplicate: int = 0
+    empty: int = 0
+    undeliverable: int = 0
+    rejected: list = field(default_factory=list)  # (email, reason), first MAX_REJECTED only
+
+    @property
+    def total(self):
+        return self.valid + self.invalid + self.duplicate + self.empty
+
+
+def _normalize(col):
+    return str(col).strip().lower()
+
+
+def _read_csv(source, chunk_rows):
+    reader = pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False,
+                         usecols=lambda c: _normalize(c) in EMAIL_COLUMNS + NAME_COLUMNS)
+    for chunk in reader:
+        yield chunk
+
+
+def _read_xlsx(source, chunk_rows):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"column{i}" for i, c in enumerate(header)]
+        batch = []
+        for row in rows:
+            batch.append(row[:len(columns)])
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        wb.close()
+
+
+def _read_txt(source, chunk_rows):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from _read_txt(f, chunk_rows)
+        return
+    text = io.TextIOWrapper(source, encoding='utf-8', errors='replace')
+    try:
+        batch = []
+        for line in text:
+            batch.extend(TXT_PATTERN.findall(line))
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame({'email': batch})
+                batch = []
+        if batch:
+            yield pd.DataFrame({'email': batch})
+    finally:
+        # don't let the wrapper close the caller's file object
+        text.detach()
+
+
+class RecipientStream:
+    """Lazily read, pre-filter, dedupe and validate a recipient list.
+
+    Iterating yields recipients ready for `email_sender.logic` ("email", or
+    "name, email" when the file has a name column) while `stats` keeps the
+    running valid/invalid/duplicate/empty counts. The file is read in
+    chunks of `chunk_rows`, and only a fixed-size digest per unique address
+    is kept for deduplication.
+    """
+
+    def __init__(self, source, filename=None, validator=None, chunk_rows=CHUNK_ROWS):
+        self.source = source
+        self.filename = str(filename or getattr(source, 'name', None) or source).lower()
+        self.validator = validator or default_service
+        self.chunk_rows = chunk_rows
+        self.stats = IngestStats()
+        self._seen = set()
+
+    def _chunks(self):
+        if self.filename.endswith('.txt'):
+            return _read_txt(self.source, self.chunk_rows)
+        if self.filename.endswith(('.xlsx', '.xlsm')):
+            return _read_xlsx(self.source, self.chunk_rows)
+        return _read_csv(self.source, self.chunk_rows)
+
+    def __iter__(self):
+        for chunk in self._chunks():
+            columns = {_normalize(c): c for c in chunk.columns}
+            email_col = next((columns[c] for c in EMAIL_COLUMNS if c in columns), None)
+            if email_col is None:
+                raise MissingEmailColumn(
+                    "File must contain at least one column named: 'email', 'emails', 'Email', or 'Emails'")
+            name_col = next((columns[c] for c in NAME_COLUMNS if c in columns), None)
+            yield from self._process(chunk, email_col, name_col)
+
+    def _process(self, chunk, email_col, name_col):
+        emails = chunk[email_col].fillna('').astype(str).str.strip()
+        empty = emails.eq('') | emails.str.lower().isin(('nan', 'none'))
+        self.stats.empty += int(empty.sum())
+
+        plausible = emails.str.match(SYNTAX_PATTERN) & ~empty
+        self.stats.invalid += int((~plausible & ~empty).sum())
+
+        names = chunk[name_col].fillna('').astype(str).str.strip() if name_col else None
+        candidates = []
+        for idx, email in emails[plausible].items():
+            key = hashlib.blake2b(email.lower().encode(), digest_size=8).digest()
+            if key in self._seen:
+                self.stats.duplicate += 1
+                continue
+            self._seen.add(key)
+            candidates.append((idx, email))
+
+        report = self.validator.validate_many(email for _, email in candidates)
+        for (idx, _), result in zip(candidates, report.results):
+            if not result.ok:
+                self.stats.invalid += 1
+                self.stats.undeliverable += result.undeliverable
+                if len(self.stats.rejected) < MAX_REJECTED:
+                    self.stats.rejected.append((result.email, result.error))
+                continue
+            self.stats.valid += 1
+            name = names[idx].replace(',', ' ') if names is not None else ''
+            yield f"{name}, {result.normalized}" if name and name.lower() != 'nan' else result.normalized
+
+
+def load_recipients(source, filename=None, **kwargs):
+    """Read a whole recipient list; returns (recipients, stats)."""
+    stream = RecipientStream(source, filename, **kwargs)
+    return list(stream), stream.stats
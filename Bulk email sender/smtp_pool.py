@@ -0,0 +1,291 @@
+import smtplib
+import socket
+import ssl
+import queue
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+
+# errors that mean the connection itself is gone and must be re-opened
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+
+
+class DailyLimitReached(Exception):
+    pass
+
+
+# an already serialized message (CRLF line endings), sent as-is with SMTP.sendmail
+RawMessage = namedtuple("RawMessage", "sender data")
+
+
+class TokenBucket:
+    """Token-bucket rate limiter with a per-second rate and a per-day cap.
+
+    `per_second` of None/0 disables the per-second limit, `per_day` of None
+    disables the daily cap, and `sent_today` carries over sends already made
+    in the last 24 hours. `acquire(n)` takes one token for an SMTP
+    transaction to `n` recipients, blocking until one is available, and
+    returns how many of those recipients fit in what is left of the daily cap
+    (providers count the cap per recipient). It raises DailyLimitReached once
+    the cap is used up.
+    """
+
+    def __init__(self, per_second=5, per_day=500, burst=None, sent_today=0):
+        self.rate = float(per_second or 0)
+        self.capacity = float(burst or max(1, self.rate))
+        self.per_day = per_day
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.day_start = time.time()
+        self.sent_today = sent_today
+        self.lock = threading.Lock()
+
+    def acquire(self, n=1):
+        while True:
+            with self.lock:
+                granted = n
+                if self.per_day is not None:
+                    if time.time() - self.day_start >= 86400:
+                        self.day_start = time.time()
+                        self.sent_today = 0
+                    if self.sent_today >= self.per_day:
+                        raise DailyLimitReached(f"Daily limit of {self.per_day} emails reached")
+                    granted = min(n, self.per_day - self.sent_today)
+
+                if not self.rate:
+                    self.sent_today += granted
+                    return granted
+
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.sent_today += granted
+                    return granted
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SMTPPool:
+    """A fixed-size pool of authenticated SMTP connections.
+
+    Connections are opened lazily and reused. A connection that drops while
+    in use is discarded, and `send` re-opens and re-logs-in before retrying.
+    """
+
+    def __init__(self, host, port, username=None, password=None, size=3,
+                 use_ssl=True, starttls=False, timeout=30, reconnects=2):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.timeout = timeout
+        self.reconnects = reconnects
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+        try:
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            _close(smtp)
+            raise
+        return smtp
+
+    def warm(self):
+        # open (and log in) one connection up front so bad credentials
+        # fail the whole campaign immediately instead of once per recipient
+        with self.connection():
+            pass
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                smtp = self._idle.get_nowait()
+            except queue.Empty:
+                smtp = self._connect()
+            try:
+                yield smtp
+            except CONNECTION_ERRORS:
+                _close(smtp)
+                smtp = None
+                raise
+            finally:
+                # smtplib closes the socket itself on a 421 reply
+                if smtp is not None and smtp.sock is not None:
+                    self._idle.put(smtp)
+        finally:
+            self._slots.release()
+
+    def send(self, msg, to_addrs=None):
+        """Send an EmailMessage or a RawMessage; returns the refused recipients like sendmail."""
+        for attempt in range(self.reconnects + 1):
+            try:
+                with self.connection() as smtp:
+                    if isinstance(msg, RawMessage):
+                        return smtp.sendmail(msg.sender, to_addrs, msg.data)
+                    return smtp.send_message(msg, to_addrs=to_addrs)
+            except CONNECTION_ERRORS:
+                if attempt == self.reconnects:
+                    raise
+            except smtplib.SMTPResponseException as e:
+                if e.smtp_code != 421 or attempt == self.reconnects:
+                    raise
+
+    def close(self):
+        while True:
+            try:
+                smtp = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _close(smtp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_transient(exc):
+    """True for errors worth retrying later: dropped connections and 4xx replies."""
+    if isinstance(exc, CONNECTION_ERRORS):
+        return True
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return False
+
+
+def _close(smtp):
+    try:
+        smtp.quit()
+    except Exception:
+        smtp.close()
+
+
+@dataclass
+class SendResult:
+    email: str
+    name: str = ""
+    status: str = "sent"  # "sent", "failed" or "deferred" (not attempted, e.g. daily limit)
+    error: str = ""
+    seconds: float = 0.0
+    transient: bool = False
+    index: int = -1  # position in the `recipients` passed to deliver()
+
+    @property
+    def ok(self):
+        return self.status == "sent"
+
+
+def deliver(pool, recipients, make_message, limiter=None, on_result=None, control=None,
+            shared=None, batch_size=1):
+    """Send to every (name, email) in `recipients` through all pool connections at once.
+
+    `make_message(name, email)` builds the EmailMessage (or RawMessage) for
+    one recipient. When every recipient gets the same message, pass it as
+    `shared` (a RawMessage) instead: it is sent once per SMTP transaction to
+    up to `batch_size` envelope recipients.
+
+    `on_result` is called from the worker threads as each send finishes, and
+    an optional `control` (see campaign_runner.CampaignControl) can pause or
+    cancel the run between transactions. Returns the list of SendResult in
+    the same order as `recipients`; anything not attempted because of the
+    daily cap or a cancel is returned as "deferred".
+    """
+    recipients = list(recipients)
+    size = batch_size if shared is not None else 1
+    pending = iter([(i, name, email) for i, (name, email) in enumerate(recipients[start:start + size], start)]
+                   for start in range(0, len(recipients), size))
+    lock = threading.Lock()
+    results = {}
+    stopped = threading.Event()
+    stop_reason = ["Daily sending limit reached"]
+
+    def finish(res, i, started):
+        res.seconds = time.perf_counter() - started
+        res.index = i
+        with lock:
+            results[i] = res
+        if on_result is not None:
+            on_result(res)
+
+    def worker():
+        while not stopped.is_set():
+            if control is not None:
+                control.wait_if_paused()
+                if control.cancelled:
+                    stop_reason[0] = "Cancelled"
+                    stopped.set()
+                    return
+            with lock:
+                try:
+                    chunk = next(pending)
+                except StopIteration:
+                    return
+            started = time.perf_counter()
+            try:
+                granted = limiter.acquire(len(chunk)) if limiter is not None else len(chunk)
+            except DailyLimitReached as e:
+                stopped.set()
+                for i, name, email in chunk:
+                    finish(SendResult(email, name, status="deferred", error=str(e)), i, started)
+                continue
+            if granted < len(chunk):
+                # the daily cap ends inside this envelope: send what fits, leave the rest
+                stopped.set()
+                for i, name, email in chunk[granted:]:
+                    finish(SendResult(email, name, status="deferred", error=stop_reason[0]), i, started)
+                chunk = chunk[:granted]
+
+            emails = [email for _, _, email in chunk]
+            try:
+                if shared is not None:
+                    refused = pool.send(shared, emails)
+                else:
+                    _, name, email = chunk[0]
+                    refused = pool.send(make_message(name, email), emails)
+            except smtplib.SMTPRecipientsRefused as e:
+                refused = e.recipients  # every recipient refused; report each one's reply below
+            except Exception as e:
+                for i, name, email in chunk:
+                    finish(SendResult(email, name, status="failed", error=str(e), transient=is_transient(e)),
+                           i, started)
+                continue
+            for i, name, email in chunk:
+                if email in (refused or {}):
+                    code, reply = refused[email]
+                    error = f"{code} {reply.decode('utf-8', 'replace') if isinstance(reply, bytes) else reply}"
+                    res = SendResult(email, name, status="failed", error=error, transient=400 <= code < 500)
+                else:
+                    res = SendResult(email, name)
+                finish(res, i, started)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(pool.size)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for i, (name, email) in enumerate(recipients):
+        if i not in results:
+            results[i] = SendResult(email, name, status="deferred", error=stop_reason[0], index=i)
+    return [results[i] for i in sorted(results)]
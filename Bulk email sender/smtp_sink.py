@@ -0,0 +1,153 @@
+"""Local SMTP sink for development and benchmarks.
+
+Speaks just enough SMTP (EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+for smtplib to deliver to it, accepts any credentials and discards the mail,
+keeping only counters. Addresses in `refuse` get a 550 at RCPT. With
+`keep=True` every transaction is also kept in `received` as (sender,
+recipients, data), for tests. Run it directly or start it from code:
+
+    sink = SMTPSink(port=0).start()
+    es.logic(..., host="127.0.0.1", port=sink.port, use_ssl=False)
+"""
+import socketserver
+import threading
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        sink = self.server.sink
+        with sink.lock:
+            sink.connections += 1
+        self.reply("220 localhost SMTP sink ready")
+        sent_here = 0
+        sender, recipients = "", []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            sink.add_bytes(len(line))
+            sink.add_command()
+            cmd = line.decode("utf-8", "replace").strip()
+            verb = cmd[:4].upper()
+            if verb == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250-SMTPUTF8")
+                self.reply("250 8BITMIME")
+            elif verb == "HELO":
+                self.reply("250 localhost")
+            elif verb == "AUTH" and len(cmd.split()) < 2:
+                self.reply("501 Syntax: AUTH mechanism [initial-response]")
+            elif verb == "AUTH":
+                parts = cmd.split()
+                if parts[1].upper() == "LOGIN" and len(parts) == 2:
+                    self.reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                if parts[1].upper() == "LOGIN":
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                sender, recipients = (cmd.partition(":")[2].split() or [""])[0].strip("<>"), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = cmd.partition(":")[2].strip().strip("<>").lower()
+                if address in sink.refuse:
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data:
+                        return
+                    sink.add_bytes(len(data))
+                    if data in (b".\r\n", b".\n"):
+                        break
+                    if sink.keep:
+                        lines.append(data[1:] if data.startswith(b".") else data)
+                sink.add_message(sender, recipients, b"".join(lines))
+                sent_here += 1
+                self.reply("250 OK queued")
+                if sink.drop_after and sent_here >= sink.drop_after:
+                    # simulate a server that silently hangs up after N messages
+                    return
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    def __init__(self, host="127.0.0.1", port=0, drop_after=0, refuse=(), keep=False):
+        self.server = _Server((host, port), _Handler)
+        self.server.sink = self
+        self.host, self.port = self.server.server_address[:2]
+        self.drop_after = drop_after
+        self.refuse = {a.lower() for a in refuse}
+        self.keep = keep
+        self.received = []  # (sender, recipients, data) per transaction when `keep`
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.recipients = 0
+        self.connections = 0
+        self.commands = 0  # command lines, i.e. client->server round trips (no pipelining)
+        self.bytes_received = 0
+
+    def add_bytes(self, n):
+        with self.lock:
+            self.bytes_received += n
+
+    def add_command(self):
+        with self.lock:
+            self.commands += 1
+
+    def add_message(self, sender, recipients, data):
+        with self.lock:
+            self.messages += 1
+            self.recipients += len(recipients)
+            if self.keep:
+                self.received.append((sender, recipients, data))
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local SMTP sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    sink = SMTPSink(args.host, args.port)
+    print(f"SMTP sink listening on {sink.host}:{sink.port}")
+    try:
+        sink.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"{sink.messages} message(s), {sink.recipients} recipient(s), {sink.bytes_received} bytes")
@@ -0,0 +1,118 @@
+"""Durable campaign queue: resume, retry backoff and the daily count.
+
+    pytest test_campaign_queue.py
+"""
+import threading
+import time
+
+import pytest
+
+import campaign_queue
+from campaign_queue import FAILED, MAX_ATTEMPTS, PENDING, RETRYING, SENT, CampaignQueue
+from smtp_pool import SendResult
+
+RECIPIENTS = [(f"User {i}", f"user{i}@example.com") for i in range(5)]
+
+
+def sent(email):
+    return SendResult(email)
+
+
+def failed(email, transient):
+    return SendResult(email, status="failed", error="421 try later" if transient else "550 no such user",
+                      transient=transient)
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "campaigns.db")
+
+
+def test_resume_sends_only_what_is_left(db):
+    with CampaignQueue(db) as queue:
+        campaign_id = queue.create(RECIPIENTS, "me@example.com", "Subject", "Body", ["a.pdf"])
+        rows = queue.due(campaign_id)
+        assert [row["email"] for row in rows] == [email for _, email in RECIPIENTS]
+        queue.mark(campaign_id, rows[0]["seq"], rows[0]["attempts"], sent(rows[0]["email"]))
+        queue.mark(campaign_id, rows[1]["seq"], rows[1]["attempts"], failed(rows[1]["email"], transient=False))
+        queue.mark(campaign_id, rows[2]["seq"], rows[2]["attempts"],
+                   SendResult(rows[2]["email"], status="deferred", error="Daily sending limit reached"))
+
+    # a new process: the same id is a no-op create, and only unsent recipients are due
+    with CampaignQueue(db) as queue:
+        assert queue.create(RECIPIENTS, "me@example.com", "Subject", "Body", campaign_id=campaign_id) == campaign_id
+        assert queue.campaign(campaign_id)["attachments"] == ["a.pdf"]
+        assert [row["email"] for row in queue.due(campaign_id)] == [e for _, e in RECIPIENTS[2:]]
+        assert queue.counts(campaign_id) == {SENT: 1, FAILED: 1, PENDING: 3}
+        assert queue.unfinished(sender="me@example.com")[0]["remaining"] == 3
+        assert queue.unfinished(sender="other@example.com") == []
+        results = queue.results(campaign_id)
+        assert [r.status for r in results] == [SENT, FAILED, PENDING, PENDING, PENDING]
+        assert results[2].error == "Daily sending limit reached"
+
+
+def test_transient_failures_back_off_then_fail(db, monkeypatch):
+    monkeypatch.setattr(campaign_queue.random, "uniform", lambda low, high: 1.0)
+    with CampaignQueue(db) as queue:
+        campaign_id = queue.create(RECIPIENTS[:1], "me@example.com", "Subject", "Body")
+        row = queue.due(campaign_id)[0]
+
+        delays = []
+        for attempt in range(MAX_ATTEMPTS - 1):
+            assert queue.mark(campaign_id, row["seq"], attempt, failed(row["email"], transient=True)) == RETRYING
+            assert queue.due(campaign_id) == []
+            delays.append(queue.next_due_in(campaign_id))
+        assert [round(d) for d in delays] == [5, 10, 20]
+
+        assert queue.mark(campaign_id, row["seq"], MAX_ATTEMPTS - 1, failed(row["email"], transient=True)) == FAILED
+        assert queue.next_due_in(campaign_id) is None
+
+
+def test_retry_becomes_due_after_its_backoff(db, monkeypatch):
+    with CampaignQueue(db) as queue:
+        campaign_id = queue.create(RECIPIENTS[:1], "me@example.com", "Subject", "Body")
+        row = queue.due(campaign_id)[0]
+        queue.mark(campaign_id, row["seq"], 0, failed(row["email"], transient=True))
+        later = time.time() + campaign_queue.BACKOFF_BASE * 1.5 + 1
+        monkeypatch.setattr(campaign_queue.time, "time", lambda: later)
+        assert [(r["email"], r["attempts"]) for r in queue.due(campaign_id)] == [(row["email"], 1)]
+
+
+def test_backoff_is_capped():
+    assert campaign_queue.backoff(30) <= campaign_queue.BACKOFF_MAX * 1.5
+
+
+def test_sent_since_counts_one_sender(db):
+    with CampaignQueue(db) as queue:
+        mine = queue.create(RECIPIENTS[:3], "me@example.com", "Subject", "Body")
+        theirs = queue.create(RECIPIENTS[3:], "other@example.com", "Subject", "Body")
+        for campaign_id in (mine, theirs):
+            for row in queue.due(campaign_id):
+                queue.mark(campaign_id, row["seq"], row["attempts"], sent(row["email"]))
+
+        since = time.time() - 60
+        assert queue.sent_since(since, sender="me@example.com") == 3
+        assert queue.sent_since(since, sender="other@example.com") == 2
+        assert queue.sent_since(since) == 5
+        assert queue.sent_since(time.time() + 60, sender="me@example.com") == 0
+
+
+def test_marks_from_many_threads(db):
+    recipients = [(f"User {i}", f"user{i}@example.com") for i in range(400)]
+    with CampaignQueue(db, commit_every=7) as queue:
+        campaign_id = queue.create(recipients, "me@example.com", "Subject", "Body")
+        rows = queue.due(campaign_id, limit=len(recipients))
+
+        def mark(part):
+            for row in part:
+                queue.mark(campaign_id, row["seq"], row["attempts"], sent(row["email"]))
+
+        threads = [threading.Thread(target=mark, args=(rows[i::8],)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert queue.counts(campaign_id) == {SENT: len(recipients)}
+
+    with CampaignQueue(db) as queue:
+        assert queue.counts(campaign_id) == {SENT: len(recipients)}
@@ -0,0 +1,109 @@
+"""Pre-serialized messages and envelope batching, checked byte for byte through the SMTP sink.
+
+    pytest test_envelopes.py
+"""
+import email
+import os
+from collections import Counter
+from email.message import EmailMessage
+
+import pytest
+
+import email_sender as es
+from attachments import AttachmentCache
+from prepared import UNDISCLOSED, wire_bytes
+from smtp_sink import SMTPSink
+
+SENDER = "sender@example.com"
+SUBJECT = "Spring update"
+RECIPIENTS = ["Ann, ann@example.com", "Zoë, zoe@example.com", "bob@example.com", "José, josé@example.com",
+              "Cy, cy@example.org"]
+
+
+@pytest.fixture
+def attachment(tmp_path):
+    path = tmp_path / "brochure.pdf"
+    path.write_bytes(os.urandom(5000))
+    return [str(path)]
+
+
+def campaign(body, attachments, envelope_size):
+    with SMTPSink(keep=True) as sink:
+        results = es.logic(SENDER, "secret", body, SUBJECT, RECIPIENTS, attachments, host=sink.host,
+                           port=sink.port, use_ssl=False, per_second=0, per_day=None, envelope_size=envelope_size)
+    assert all(r.ok for r in results)
+    return sink.received
+
+
+def expected(to, text, attachments, boundary, cte=None, utf8=False):
+    """What EmailMessage serializes for this recipient, with the boundary the campaign used."""
+    msg = EmailMessage()
+    msg['Subject'] = SUBJECT
+    msg['From'] = SENDER
+    msg['To'] = to
+    msg.set_content(text, cte=cte) if cte else msg.set_content(text)
+    AttachmentCache(attachments).attach_to(msg)
+    msg.set_boundary(boundary)
+    if utf8:
+        # what smtplib's send_message writes when it negotiates SMTPUTF8
+        return msg.as_bytes(policy=msg.policy.clone(utf8=True, linesep="\r\n"))
+    return wire_bytes(msg)
+
+
+def boundary(data):
+    return email.message_from_bytes(data).get_boundary()
+
+
+def by_recipient(received):
+    counts = Counter(rcpt for _, rcpts, _ in received for rcpt in rcpts)
+    assert all(n == 1 for n in counts.values())
+    assert set(counts) == {line.rpartition(",")[2].strip() for line in RECIPIENTS}
+    return {rcpt: (rcpts, data) for _, rcpts, data in received for rcpt in rcpts}
+
+
+def test_personalized_messages_match_email_message(attachment):
+    body = "Hello {name},\n\nOur spring update is attached.\n"
+    received = campaign(body, attachment, envelope_size=50)
+    assert len(received) == len(RECIPIENTS)
+
+    for line in RECIPIENTS:
+        name, email_address = es.parse_recipient(line)
+        rcpts, data = by_recipient(received)[email_address]
+        assert rcpts == [email_address]
+        if email_address.isascii():
+            # spliced from the pre-serialized template, whose body part is base64
+            want = expected(email_address, body.format(name=name), attachment, boundary(data), cte="base64")
+        else:
+            want = expected(email_address, body.format(name=name), attachment, boundary(data), utf8=True)
+        assert data == want
+
+
+def test_envelopes_match_email_message(attachment):
+    body = "Hello,\n\nOur spring update is attached.\n"
+    received = campaign(body, attachment, envelope_size=2)
+    recipients = by_recipient(received)
+
+    ascii_recipients = [address for address in recipients if address.isascii()]
+    envelopes = [rcpts for _, rcpts, _ in received if rcpts[0].isascii()]
+    assert sorted(r for rcpts in envelopes for r in rcpts) == sorted(ascii_recipients)
+    assert [len(rcpts) for rcpts in envelopes] == [2, 2]  # four ASCII recipients, two per envelope
+
+    for _, rcpts, data in received:
+        if rcpts[0].isascii():
+            assert data == expected(UNDISCLOSED, body, attachment, boundary(data))
+        else:
+            # non-ASCII addresses are sent on their own, addressed to the recipient
+            assert rcpts == ["josé@example.com"]
+            assert data == expected(rcpts[0], body, attachment, boundary(data), utf8=True)
+
+
+def test_no_attachments():
+    body = "Hi {name}"
+    received = campaign(body, [], envelope_size=50)
+    _, data = by_recipient(received)["ann@example.com"]
+    msg = EmailMessage()
+    msg['Subject'] = SUBJECT
+    msg['From'] = SENDER
+    msg['To'] = "ann@example.com"
+    msg.set_content("Hi Ann", cte="base64")
+    assert data == wire_bytes(msg)
@@ -0,0 +1,105 @@
+"""SMTP pool, rate limiter and deliver() against a local SMTP sink.
+
+    pytest test_smtp_pool.py
+"""
+import time
+from email.message import EmailMessage
+
+import pytest
+
+import email_sender as es
+from smtp_pool import DailyLimitReached, SMTPPool, TokenBucket, deliver
+from smtp_sink import SMTPSink
+
+SENDER = "sender@example.com"
+RECIPIENTS = [(f"User {i}", f"user{i}@example.com") for i in range(6)]
+
+
+def make_message(name, email):
+    msg = EmailMessage()
+    msg['Subject'] = "Test"
+    msg['From'] = SENDER
+    msg['To'] = email
+    msg.set_content(f"Hello {name}")
+    return msg
+
+
+def pool_for(sink, size=2):
+    return SMTPPool(sink.host, sink.port, SENDER, "secret", size=size, use_ssl=False, timeout=5)
+
+
+def test_deliver_returns_a_result_per_recipient_in_order():
+    refused = "user3@example.com"
+    seen = []
+    with SMTPSink(refuse=[refused], keep=True) as sink, pool_for(sink) as pool:
+        results = deliver(pool, RECIPIENTS, make_message, on_result=seen.append)
+
+    assert [(r.name, r.email, r.index) for r in results] == [(n, e, i) for i, (n, e) in enumerate(RECIPIENTS)]
+    assert sorted(r.index for r in seen) == list(range(len(RECIPIENTS)))
+    for r in results:
+        if r.email == refused:
+            assert (r.status, r.ok, r.transient) == ("failed", False, False)
+            assert r.error.startswith("550")
+        else:
+            assert (r.status, r.ok, r.error) == ("sent", True, "")
+    assert sorted(rcpts[0] for _, rcpts, _ in sink.received) == sorted(
+        e for _, e in RECIPIENTS if e != refused)
+
+
+def test_pool_reconnects_when_the_server_hangs_up():
+    with SMTPSink(drop_after=2) as sink, pool_for(sink, size=1) as pool:
+        results = deliver(pool, RECIPIENTS, make_message)
+
+    assert all(r.ok for r in results)
+    assert sink.messages == len(RECIPIENTS)
+    assert sink.connections >= len(RECIPIENTS) // 2
+
+
+def test_failed_connection_is_reported_as_transient():
+    with SMTPSink() as sink:
+        port = sink.port
+    pool = SMTPPool("127.0.0.1", port, SENDER, "secret", size=1, use_ssl=False, timeout=2, reconnects=0)
+    results = deliver(pool, RECIPIENTS[:2], make_message)
+    assert [(r.status, r.transient) for r in results] == [("failed", True)] * 2
+
+
+def test_rate_limit_spaces_out_transactions():
+    limiter = TokenBucket(per_second=20, per_day=None, burst=1)
+    with SMTPSink() as sink, pool_for(sink, size=3) as pool:
+        started = time.perf_counter()
+        results = deliver(pool, RECIPIENTS, make_message, limiter=limiter)
+        elapsed = time.perf_counter() - started
+
+    assert all(r.ok for r in results)
+    # the first token is there at once, the other five come 1/20 s apart
+    assert elapsed >= (len(RECIPIENTS) - 1) / 20 * 0.9
+
+
+def test_daily_cap_defers_the_rest():
+    limiter = TokenBucket(per_second=0, per_day=4, sent_today=1)
+    with SMTPSink() as sink, pool_for(sink, size=1) as pool:
+        results = deliver(pool, RECIPIENTS, make_message, limiter=limiter)
+
+    assert [r.status for r in results] == ["sent"] * 3 + ["deferred"] * 3
+    assert sink.messages == 3
+    with pytest.raises(DailyLimitReached):
+        limiter.acquire()
+
+
+def test_daily_cap_counts_envelope_recipients():
+    limiter = TokenBucket(per_second=0, per_day=5)
+    assert limiter.acquire(3) == 3
+    assert limiter.acquire(3) == 2
+    with pytest.raises(DailyLimitReached):
+        limiter.acquire(1)
+
+
+def test_run_campaign_delivers_through_the_sink():
+    with SMTPSink(keep=True) as sink:
+        results = es.logic(SENDER, "secret", "Hello {name}", "Test", ["Ann, ann@example.com", "bob@example.com"],
+                           host=sink.host, port=sink.port, use_ssl=False, per_second=0, per_day=None)
+
+    assert [(r.name, r.email, r.status) for r in results] == [
+        ("Ann", "ann@example.com", "sent"), ("", "bob@example.com", "sent")]
+    assert sorted(rcpts for _, rcpts, _ in sink.received) == [["ann@example.com"], ["bob@example.com"]]
+    assert all(sender == SENDER for sender, _, _ in sink.received)
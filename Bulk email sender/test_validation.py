@@ -0,0 +1,135 @@
+"""Email validation service with a stub resolver instead of DNS.
+
+    pytest test_validation.py
+"""
+import threading
+import time
+
+import pytest
+from email_validator import EmailNotValidError
+
+import validation
+from validation import EmailValidationService, TTLCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class StubResolver:
+    """Counts lookups per domain; `bad` domains have no mail server."""
+
+    def __init__(self, bad=(), delay=0.0):
+        self.bad = set(bad)
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, domain):
+        with self.lock:
+            self.calls.append(domain)
+        time.sleep(self.delay)
+        if domain in self.bad:
+            raise EmailNotValidError(f"The domain name {domain} does not accept email.")
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(validation, "time", clock)
+    cache = TTLCache(ttl=60)
+    cache.set("k", "v")
+    clock.advance(59)
+    assert cache.get("k") == "v"
+    clock.advance(2)
+    assert cache.get("k") is None
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 0)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_one_lookup_per_domain_in_a_batch():
+    resolver = StubResolver()
+    service = EmailValidationService(check_deliverability=True, resolver=resolver)
+    emails = [f"user{i}@{domain}" for i in range(50) for domain in ("example.com", "example.org")]
+
+    report = service.validate_many(emails)
+    assert report.valid == len(emails)
+    assert sorted(resolver.calls) == ["example.com", "example.org"]
+
+    report = service.validate_many(f"other{i}@example.com" for i in range(10))
+    assert report.domain_cache_hits == 1  # one check per distinct domain, answered from the cache
+    assert len(resolver.calls) == 2
+
+
+def test_concurrent_lookups_of_one_domain_are_shared():
+    resolver = StubResolver(delay=0.2)
+    service = EmailValidationService(check_deliverability=True, resolver=resolver)
+    barrier = threading.Barrier(20)
+    results = []
+
+    def validate(i):
+        barrier.wait()
+        results.append(service.validate(f"user{i}@example.com"))
+
+    threads = [threading.Thread(target=validate, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert resolver.calls == ["example.com"]
+    assert len(results) == 20 and all(r.ok for r in results)
+
+
+def test_undeliverable_domain():
+    resolver = StubResolver(bad={"nomail.example.org"})
+    service = EmailValidationService(check_deliverability=True, resolver=resolver)
+
+    report = service.validate_many(["ann@example.com", "bob@nomail.example.org", "cy@nomail.example.org",
+                                    "not an address"])
+    assert (report.valid, report.invalid, report.undeliverable) == (1, 3, 2)
+    bob = report.results[1]
+    assert (bob.ok, bob.undeliverable, bob.normalized) == (False, True, "bob@nomail.example.org")
+    assert "does not accept email" in bob.error
+    assert not report.results[3].undeliverable
+    assert set(report.errors) == {"bob@nomail.example.org", "cy@nomail.example.org", "not an address"}
+
+    assert not service.is_valid("dee@nomail.example.org")
+    assert sorted(resolver.calls) == ["example.com", "nomail.example.org"]
+
+
+def test_syntax_only_never_resolves():
+    resolver = StubResolver(bad={"example.com"})
+    service = EmailValidationService(resolver=resolver)
+    assert service.validate_many(["ann@example.com", "bob@example.com"]).valid == 2
+    assert resolver.calls == []
+
+
+@pytest.mark.parametrize("email", ["ann@example.com", " Ann@Example.com "])
+def test_addresses_are_cached(email):
+    service = EmailValidationService()
+    first = service.validate(email)
+    assert service.validate(email) is first
+    assert service.addresses.hits == 1
+
+
+def test_default_service_checks_deliverability():
+    assert validation.default_service.check_deliverability
@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from email_validator import validate_email, EmailNotValidError
+from email_validator.deliverability import validate_email_deliverability
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after being set."""
+
+    def __init__(self, maxsize=10_000, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires = item
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+@dataclass
+class ValidationResult:
+    email: str
+    normalized: str = ""
+    error: str = ""
+    undeliverable: bool = False
+
+    @property
+    def ok(self):
+        return not self.error
+
+
+@dataclass
+class ValidationReport:
+    results: list = field(default_factory=list)
+    valid: int = 0
+    invalid: int = 0
+    undeliverable: int = 0
+    domains: int = 0
+    address_cache_hits: int = 0
+    domain_cache_hits: int = 0
+    seconds: float = 0.0
+
+    @property
+    def errors(self):
+        return {r.email: r.error for r in self.results if not r.ok}
+
+
+class EmailValidationService:
+    """Email validation with memoized addresses and domains.
+
+    Syntax results are cached per address and, when `check_deliverability`
+    is on, DNS results are cached per domain so a list with thousands of
+    gmail.com addresses does a single lookup, even when several threads ask
+    for the same domain at once. `resolver(domain)` replaces the DNS check
+    (it should raise EmailNotValidError for a bad domain), which lets tests
+    run against a local stub instead of real DNS.
+    """
+
+    def __init__(self, check_deliverability=False, resolver=None, dns_resolver=None,
+                 dns_timeout=5, max_workers=8, cache_size=100_000, domain_cache_size=10_000, ttl=3600):
+        self.check_deliverability = check_deliverability
+        self.resolver = resolver
+        self.dns_resolver = dns_resolver
+        self.dns_timeout = dns_timeout
+        self.max_workers = max_workers
+        self.addresses = TTLCache(cache_size, ttl)
+        self.domains = TTLCache(domain_cache_size, ttl)
+        self._lookups = {}  # domain -> Future of the lookup in progress
+        self._lookups_lock = threading.Lock()
+
+    def _lookup(self, ascii_domain, domain):
+        try:
+            if self.resolver is not None:
+                self.resolver(ascii_domain)
+            else:
+                validate_email_deliverability(ascii_domain, domain, timeout=self.dns_timeout,
+                                              dns_resolver=self.dns_resolver)
+            return ""
+        except EmailNotValidError as e:
+            return str(e)
+
+    def _check_domain(self, ascii_domain, domain):
+        # single flight: concurrent checks of an uncached domain wait for one lookup
+        with self._lookups_lock:
+            error = self.domains.get(ascii_domain)
+            if error is not None:
+                return error
+            future = self._lookups.get(ascii_domain)
+            owner = future is None
+            if owner:
+                future = self._lookups[ascii_domain] = Future()
+        if not owner:
+            return future.result()
+        try:
+            error = self._lookup(ascii_domain, domain)
+            self.domains.set(ascii_domain, error)
+            future.set_result(error)
+            return error
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lookups_lock:
+                del self._lookups[ascii_domain]
+
+    def _check_syntax(self, email):
+        """(ValidationResult, ascii domain, domain); the domains are None for a malformed address."""
+        try:
+            info = validate_email(email.strip(), check_deliverability=False)
+        except EmailNotValidError as e:
+            return ValidationResult(email, error=str(e)), None, None
+        return ValidationResult(email, info.normalized), info.ascii_domain, info.domain
+
+    @staticmethod
+    def _with_domain(result, error):
+        if not error:
+            return result
+        return ValidationResult(result.email, result.normalized, error, undeliverable=True)
+
+    def validate(self, email):
+        key = email.strip()
+        result = self.addresses.get(key)
+        if result is not None:
+            return result
+        result, ascii_domain, domain = self._check_syntax(email)
+        if ascii_domain and self.check_deliverability:
+            result = self._with_domain(result, self._check_domain(ascii_domain, domain))
+        self.addresses.set(key, result)
+        return result
+
+    def is_valid(self, email):
+        return self.validate(email).ok
+
+    def validate_many(self, emails):
+        """Validate a batch and return a ValidationReport in input order.
+
+        Syntax checks are CPU-bound and run inline; only the deliverability
+        lookups, one per distinct domain, go to a thread pool.
+        """
+        started = time.perf_counter()
+        hits = self.addresses.hits, self.domains.hits
+        emails = list(emails)
+        results = []
+        waiting = {}  # (ascii domain, domain) -> positions of addresses needing that check
+        for i, email in enumerate(emails):
+            result = self.addresses.get(email.strip())
+            if result is None:
+                result, ascii_domain, domain = self._check_syntax(email)
+                if ascii_domain and self.check_deliverability:
+                    waiting.setdefault((ascii_domain, domain), []).append(i)
+                else:
+                    self.addresses.set(email.strip(), result)
+            results.append(result)
+
+        domains = list(waiting)
+        if len(domains) > 1 and self.max_workers > 1:
+            with ThreadPoolExecutor(min(self.max_workers, len(domains))) as pool:
+                errors = list(pool.map(self._check_domain, *zip(*domains)))
+        else:
+            errors = [self._check_domain(*d) for d in domains]
+        for d, error in zip(domains, errors):
+            for i in waiting[d]:
+                results[i] = self._with_domain(results[i], error)
+                self.addresses.set(emails[i].strip(), results[i])
+
+        report = ValidationReport(results)
+        for r in results:
+            if r.ok:
+                report.valid += 1
+            else:
+                report.invalid += 1
+                report.undeliverable += r.undeliverable
+        report.domains = len({r.normalized.rsplit('@', 1)[-1] for r in results if r.normalized})
+        report.address_cache_hits = self.addresses.hits - hits[0]
+        report.domain_cache_hits = self.domains.hits - hits[1]
+        report.seconds = time.perf_counter() - started
+        return report
+
+
+# shared instance used by email_sender.is_valid_email and load_recipients when no
+# validator is given; like email_validator.validate_email, it checks deliverability
+default_service = EmailValidationService(check_deliverability=True)
@@ -1,14 +1,66 @@
 from flask import Flask, render_template, request, jsonify
+from flask_sock import Sock
 import cv2
-import numpy as np
-import base64
-import io
-from PIL import Image
+import os
+
+import decode
+import streaming
+import tracking
+from detector import Detector, BatchScheduler, DetectionTimeout, Overloaded
 
 app = Flask(__name__)
+app.config['SOCK_SERVER_OPTIONS'] = {
+    'ping_interval': 25,
+    'max_message_size': int(os.getenv('STREAM_MAX_FRAME_BYTES', str(4 * 1024 * 1024))),
+}
+sock = Sock(app)
+sessions = streaming.Sessions()
+
+# OpenCV's own thread pool would compete with the scheduler's workers
+cv2.setNumThreads(int(os.getenv('OPENCV_THREADS', '1')))
+
+# Face detector: per-thread cascades on downscaled frames, batched across requests
+detector = Detector(
+    scale_factor=float(os.getenv('DETECT_SCALE_FACTOR', '1.1')),
+    min_neighbors=int(os.getenv('DETECT_MIN_NEIGHBORS', '4')),
+    max_width=int(os.getenv('DETECT_MAX_WIDTH', '320')),
+)
+scheduler = BatchScheduler(
+    detector,
+    workers=int(os.getenv('DETECT_WORKERS', '0')) or None,
+    window=float(os.getenv('DETECT_BATCH_WINDOW_MS', '5')) / 1000,
+    max_pending=int(os.getenv('DETECT_MAX_PENDING', '256')),
+)
+DETECT_TIMEOUT = float(os.getenv('DETECT_TIMEOUT', '10'))
+# JPEG frames can be decoded at 1/2, 1/4 or 1/8 size; ?reduce= overrides per request
+DECODE_REDUCE = int(os.getenv('DETECT_DECODE_REDUCE', '1'))
+# Streams track faces between frames unless turned off (here or per session)
+STREAM_TRACKING = os.getenv('STREAM_TRACKING', '1') == '1'
+TRACK_FULL_EVERY = int(os.getenv('TRACK_FULL_EVERY', '15'))
 
-# Load OpenCV face detector
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+def make_tracker():
+    return tracking.Tracker(scheduler, full_every=TRACK_FULL_EVERY, timeout=DETECT_TIMEOUT)
+
+def find_faces(image_bytes, reduce=DECODE_REDUCE, tracker=None):
+    # Decode straight to grayscale, optionally at reduced size
+    gray, scale = decode.gray(image_bytes, reduce)
+    
+    # Detect faces: a full scan, or whatever the session's tracker needs
+    if tracker is not None:
+        faces, path = tracker.update(gray)
+    else:
+        faces, path = scheduler.detect(gray, timeout=DETECT_TIMEOUT), tracking.FULL
+    
+    # Convert faces to list for JSON response, in full-size image coordinates
+    faces_list = []
+    for (x, y, w, h) in faces:
+        faces_list.append({
+            'x': int(x * scale),
+            'y': int(y * scale),
+            'width': int(w * scale),
+            'height': int(h * scale)
+        })
+    return faces_list, path
 
 @app.route('/')
 def index():
@@ -17,32 +69,17 @@ def index():
 @app.route('/detect', methods=['POST'])
 def detect_faces():
     try:
-        # Get image data from request
-        image_data = request.json['image']
-        
-        # Remove data URL prefix
-        image_data = image_data.split(',')[1]
-        
-        # Decode base64 image
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to OpenCV format
-        opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        gray = cv2.cvtColor(opencv_image, cv2.COLOR_BGR2GRAY)
-        
-        # Detect faces
-        faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+        # Get image bytes from request: a raw image body, a multipart
+        # "image" field, or the original JSON {"image": <data URL>}
+        if request.is_json:
+            image_bytes = decode.data_url(request.json['image'])
+        elif 'image' in request.files:
+            image_bytes = request.files['image'].read()
+        else:
+            image_bytes = request.get_data()
         
-        # Convert faces to list for JSON response
-        faces_list = []
-        for (x, y, w, h) in faces:
-            faces_list.append({
-                'x': int(x),
-                'y': int(y),
-                'width': int(w),
-                'height': int(h)
-            })
+        reduce = request.args.get('reduce', DECODE_REDUCE, type=int)
+        faces_list, _ = find_faces(image_bytes, reduce)
         
         return jsonify({
             'success': True,
@@ -50,11 +87,38 @@ def detect_faces():
             'count': len(faces_list)
         })
         
+    except Overloaded as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    except DetectionTimeout as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 504
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 400
 
+@sock.route('/stream')
+def stream(ws):
+    # One camera per connection: binary frames in, JSON results out
+    session = sessions.open(reduce=DECODE_REDUCE, make_tracker=make_tracker, tracking=STREAM_TRACKING)
+    try:
+        streaming.serve(ws, session,
+                        lambda frame, session: find_faces(frame, session.reduce, session.tracker))
+    finally:
+        sessions.close(session)
+
+@app.route('/stats')
+def stats():
+    return jsonify({
+        'detector': scheduler.stats(),
+        'streams': sessions.stats()
+    })
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
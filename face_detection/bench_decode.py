@@ -0,0 +1,70 @@
+"""Bytes on the wire and decode time per frame: JSON/base64 vs. binary uploads.
+
+    python bench_decode.py --frames 50 --resolutions vga,hd
+
+"json+pil" is the original /detect path: parse the JSON body, strip the
+data URL prefix, base64-decode, open with PIL, copy to a NumPy array and
+convert RGB->BGR->GRAY. "binary" is a raw JPEG body decoded straight to
+grayscale by decode.gray; "binary/N" decodes at 1/N size. Every frame is
+a different synthetic JPEG at the browser's default quality.
+"""
+import argparse
+import base64
+import io
+import json
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import decode
+import samples
+
+QUALITY = 92  # what canvas.toDataURL / toBlob use for image/jpeg when no quality is given
+
+
+def json_pil(body):
+    image_data = json.loads(body)["image"].split(",")[1]
+    image = Image.open(io.BytesIO(base64.b64decode(image_data)))
+    return cv2.cvtColor(cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR), cv2.COLOR_BGR2GRAY)
+
+
+def timed(fn, payloads, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for p in payloads:
+            fn(p)
+        best = min(best, time.perf_counter() - started)
+    return best / len(payloads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--resolutions", default="vga,hd,fhd", help=",".join(samples.RESOLUTIONS))
+    args = parser.parse_args()
+
+    print(f"{'resolution':<11} {'path':<10} {'bytes/frame':>12} {'decode ms':>10} {'output':>10}")
+    for name in args.resolutions.split(","):
+        width, height = samples.RESOLUTIONS[name]
+        jpegs = [samples.encode(f, quality=QUALITY)
+                 for f in samples.frames(width, height, count=args.frames)]
+        bodies = [json.dumps({"image": "data:image/jpeg;base64," + base64.b64encode(j).decode()}).encode()
+                  for j in jpegs]
+
+        paths = [("json+pil", json_pil, bodies)]
+        paths += [("binary" if r == 1 else f"binary/{r}", lambda j, r=r: decode.gray(j, r)[0], jpegs)
+                  for r in (1, 2, 4)]
+        for label, fn, payloads in paths:
+            size = sum(len(p) for p in payloads) / len(payloads)
+            seconds = timed(fn, payloads, args.repeat)
+            out = fn(payloads[0])
+            print(f"{name:<11} {label:<10} {size:12.0f} {seconds * 1000:10.2f} "
+                  f"{out.shape[1]:>5}x{out.shape[0]:<4}")
+
+
+if __name__ == "__main__":
+    main()
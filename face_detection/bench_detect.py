@@ -0,0 +1,108 @@
+"""Detection throughput and latency for N concurrent clients, in process.
+
+    python bench_detect.py --clients 8 --seconds 5 --width 640 --height 480
+    python bench_detect.py --images 'photos/*.jpg'
+
+Each client thread sends a grayscale frame, waits for the boxes and sends
+the next one (closed loop; --interval makes it pace itself like the
+browser's 500 ms timer). Modes:
+
+    baseline   one shared cascade at full resolution, the way app.py used to
+               work (behind a lock, since sharing one classifier across
+               threads is not safe)
+    detector   Detector with thread-local cascades and downscaling, called
+               directly from every client thread
+    scheduler  the same Detector behind BatchScheduler, as app.py uses it
+
+Frames come from --images or are synthetic (samples.py). "found" is the
+number of boxes per frame averaged over the run, to check that
+downscaling still finds the faces.
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import cv2
+
+import samples
+from detector import CASCADE_PATH, BatchScheduler, Detector
+
+
+def p95(latencies):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+def run(detect, frames, clients, seconds, interval):
+    latencies = []
+    found = []
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def client(offset):
+        i = offset
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            boxes = detect(frames[i % len(frames)])
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                found.append(len(boxes))
+            i += 1
+            if interval:
+                time.sleep(max(0.0, interval - elapsed))
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    return len(latencies) / wall, statistics.median(latencies), p95(latencies), statistics.mean(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds between a client's frames")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--images", help="glob of sample images (default: synthetic frames)")
+    parser.add_argument("--max-width", type=int, default=320, help="detection width (0 = full resolution)")
+    parser.add_argument("--workers", type=int, default=0, help="scheduler workers (default: one per core)")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--modes", default="baseline,detector,scheduler")
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)
+    frames = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY)
+              for f in samples.frames(args.width, args.height, images=args.images)]
+
+    shared = cv2.CascadeClassifier(CASCADE_PATH)
+    shared_lock = threading.Lock()
+
+    def baseline(gray):
+        with shared_lock:
+            return shared.detectMultiScale(gray, 1.1, 4)
+
+    detector = Detector(max_width=args.max_width)
+    scheduler = BatchScheduler(detector, workers=args.workers or None, window=args.window_ms / 1000)
+    modes = {"baseline": baseline, "detector": detector.detect, "scheduler": scheduler.detect}
+
+    print(f"{args.clients} clients, {args.width}x{args.height} frames, detection width "
+          f"{args.max_width or 'full'}, {scheduler.workers} scheduler workers")
+    print(f"{'mode':<10} {'frames/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'found':>6}")
+    for name in args.modes.split(","):
+        fps, p50, p95_latency, found = run(modes[name], frames, args.clients, args.seconds, args.interval)
+        print(f"{name:<10} {fps:9.1f} {p50 * 1000:8.1f} {p95_latency * 1000:8.1f} {found:6.2f}")
+    stats = scheduler.stats()
+    if stats["batches"]:
+        print(f"scheduler: {stats['batches']} batches, {stats['meanBatch']:.1f} frames per batch, "
+              f"{stats['cascades']} cascades loaded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Benchmark and profiling suite for the face-detection service.
+
+    python bench_suite.py --out results.json
+    python bench_suite.py --resolutions vga --clients 1,8 --out new.json --compare results.json
+    python bench_suite.py --profile detect.prof
+
+Four parts, all on synthetic frames (samples.py) JPEG-encoded at the
+browser's default quality:
+
+    stages  per-stage time for one frame: decode (original PIL path and
+            cv2.imdecode, full and 1/2 size), color conversion (the
+            original RGB->BGR->GRAY), detection and JSON serialization
+    params  detection time and faces found over a grid of scaleFactor,
+            minNeighbors and detection width
+    http    requests/s and p50/p95/p99 latency for N concurrent clients
+            POSTing frames to /detect on the app served in this process
+    profile with --profile, cProfile of decode + detect + serialize over
+            the frames, saved for pstats/snakeviz and summarized here
+
+Everything measured is written to --out as JSON; --compare prints the
+ratio of every shared number against an earlier results file. For a
+sampling profile of the live server, run it under py-spy instead:
+py-spy record -o profile.svg -- python app.py
+"""
+import argparse
+import cProfile
+import io
+import json
+import logging
+import os
+import platform
+import pstats
+import statistics
+import threading
+import time
+import urllib.request
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import decode
+import samples
+from detector import Detector
+
+QUALITY = 92
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def best_ms(fn, items, repeat):
+    """Fastest mean time per item over `repeat` passes, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, (time.perf_counter() - started) / len(items))
+    return best * 1000
+
+
+def stages(jpegs, repeat):
+    detector = Detector()
+    pil = [np.array(Image.open(io.BytesIO(j))) for j in jpegs]
+    grays = [decode.gray(j)[0] for j in jpegs]
+    faces = [[{"x": x, "y": y, "width": w, "height": h} for x, y, w, h in detector.detect(g)] for g in grays]
+    results = [{"success": True, "faces": f, "count": len(f)} for f in faces]
+    return {
+        "decodePilMs": best_ms(lambda j: np.array(Image.open(io.BytesIO(j))), jpegs, repeat),
+        "decodeCv2Ms": best_ms(lambda j: decode.gray(j), jpegs, repeat),
+        "decodeCv2HalfMs": best_ms(lambda j: decode.gray(j, 2), jpegs, repeat),
+        "colorMs": best_ms(lambda a: cv2.cvtColor(cv2.cvtColor(a, cv2.COLOR_RGB2BGR), cv2.COLOR_BGR2GRAY),
+                           pil, repeat),
+        "detectFullMs": best_ms(Detector(max_width=0).detect, grays, repeat),
+        "detectMs": best_ms(detector.detect, grays, repeat),
+        "jsonMs": best_ms(json.dumps, results, repeat),
+    }
+
+
+def params(grays, scale_factors, min_neighbors, widths, repeat):
+    rows = []
+    for sf in scale_factors:
+        for mn in min_neighbors:
+            for width in widths:
+                detector = Detector(scale_factor=sf, min_neighbors=mn, max_width=width)
+                rows.append({"scaleFactor": sf, "minNeighbors": mn, "maxWidth": width,
+                             "ms": best_ms(detector.detect, grays, repeat),
+                             "faces": statistics.mean(len(detector.detect(g)) for g in grays)})
+    return rows
+
+
+def serve():
+    from werkzeug.serving import make_server
+
+    from app import app
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def http(url, jpegs, clients, seconds):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def client(offset):
+        i = offset
+        while time.monotonic() < stop:
+            request = urllib.request.Request(url + "/detect", data=jpegs[i % len(jpegs)],
+                                             headers={"Content-Type": "image/jpeg"})
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    response.read()
+                ok = True
+            except OSError:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                (latencies if ok else errors).append(elapsed)
+            i += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    return {"clients": clients, "requests": len(latencies), "errors": len(errors),
+            "rps": len(latencies) / wall,
+            "p50Ms": percentile(latencies, 0.5) * 1000 if latencies else None,
+            "p95Ms": percentile(latencies, 0.95) * 1000 if latencies else None,
+            "p99Ms": percentile(latencies, 0.99) * 1000 if latencies else None}
+
+
+def profile(jpegs, path, passes=5):
+    detector = Detector()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(passes):
+        for j in jpegs:
+            gray, _ = decode.gray(j)
+            json.dumps({"faces": [list(map(int, f)) for f in detector.detect(gray)]})
+    profiler.disable()
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+    print(out.getvalue())
+
+
+def flatten(value, prefix=""):
+    """{"a.b": number} for every number in nested results (list items keyed by their settings)."""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = (("/".join(f"{k}={v}" for k, v in row.items() if k in ("scaleFactor", "minNeighbors",
+                                                                         "maxWidth", "clients")), row)
+                 for row in value)
+    else:
+        return {prefix: value} if isinstance(value, (int, float)) and not isinstance(value, bool) else {}
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    return flat
+
+
+def compare(results, path):
+    with open(path) as f:
+        before = flatten(json.load(f)["results"])
+    after = flatten(results)
+    print(f"\n{'metric':<60} {'before':>10} {'after':>10} {'ratio':>7}")
+    for key in sorted(before.keys() & after.keys()):
+        b, a = before[key], after[key]
+        ratio = f"{a / b:7.2f}" if b else "      -"
+        print(f"{key:<60} {b:10.2f} {a:10.2f} {ratio}")
+
+
+def ms(value):
+    """A latency for printing; None when no request succeeded."""
+    return "n/a" if value is None else f"{value:.1f} ms"
+
+
+def numbers(text, cast):
+    return [cast(v) for v in text.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", default="qvga,vga,hd", help=",".join(samples.RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale-factors", default="1.05,1.1,1.2,1.3")
+    parser.add_argument("--min-neighbors", default="3,4,5")
+    parser.add_argument("--widths", default="0,320", help="detection widths (0 = full resolution)")
+    parser.add_argument("--clients", default="1,4,8", help="concurrent clients for the HTTP runs")
+    parser.add_argument("--seconds", type=float, default=5.0, help="length of each HTTP run")
+    parser.add_argument("--skip", default="", help="parts to leave out: stages,params,http")
+    parser.add_argument("--profile", help="write a cProfile of the detection path to this file")
+    parser.add_argument("--out", help="write the results as JSON")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    skip = set(args.skip.split(","))
+    # OpenCV threads as app.py sets them, whether or not the app is served
+    cv2.setNumThreads(int(os.getenv("OPENCV_THREADS", "1")))
+    url = serve() if "http" not in skip else None
+    results = {}
+    for name in args.resolutions.split(","):
+        width, height = samples.RESOLUTIONS[name]
+        jpegs = [samples.encode(f, quality=QUALITY) for f in samples.frames(width, height, count=args.frames)]
+        grays = [decode.gray(j)[0] for j in jpegs]
+        section = results[name] = {"width": width, "height": height,
+                                   "jpegBytes": statistics.mean(len(j) for j in jpegs)}
+        if "stages" not in skip:
+            section["stages"] = stages(jpegs, args.repeat)
+            print(name, " ".join(f"{k}={v:.2f}" for k, v in section["stages"].items()))
+        if "params" not in skip:
+            section["params"] = params(grays, numbers(args.scale_factors, float),
+                                       numbers(args.min_neighbors, int), numbers(args.widths, int), args.repeat)
+            for row in section["params"]:
+                print(f"{name} scaleFactor={row['scaleFactor']} minNeighbors={row['minNeighbors']} "
+                      f"width={row['maxWidth'] or 'full'}: {row['ms']:.2f} ms, {row['faces']:.2f} faces")
+        if url:
+            section["http"] = [http(url, jpegs, n, args.seconds) for n in numbers(args.clients, int)]
+            for row in section["http"]:
+                print(f"{name} {row['clients']} clients: {row['rps']:.1f} req/s, p50 {ms(row['p50Ms'])}, "
+                      f"p95 {ms(row['p95Ms'])}, p99 {ms(row['p99Ms'])}, {row['errors']} errors")
+        if args.profile:
+            root, ext = os.path.splitext(args.profile)
+            profile(jpegs, f"{root}-{name}{ext or '.prof'}")
+
+    if args.out:
+        meta = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                "opencv": cv2.__version__, "cpus": os.cpu_count(), "machine": platform.machine(),
+                "env": {k: v for k, v in os.environ.items() if k.startswith(("DETECT_", "OPENCV_"))}}
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "args": vars(args), "results": results}, f, indent=2)
+        print(f"results written to {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Frame decoding for /detect: encoded image bytes straight to a grayscale array.
+
+`cv2.imdecode` reads from a NumPy view of the request body and writes the
+grayscale image directly, so there is no PIL image, RGB array or BGR copy in
+between. JPEG frames can also be decoded at 1/2, 1/4 or 1/8 size, which
+skips most of the IDCT work when the detector is going to downscale anyway.
+"""
+import base64
+
+import cv2
+import numpy as np
+
+REDUCED = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+def gray(data, reduce=1):
+    """(grayscale frame, factor from its coordinates to the full-size image's).
+
+    `data` is JPEG/PNG bytes (or any buffer); `reduce` is 1, 2, 4 or 8.
+    """
+    if reduce not in REDUCED:
+        raise ValueError(f"reduce must be one of {sorted(REDUCED)}")
+    frame = cv2.imdecode(np.frombuffer(data, np.uint8), REDUCED[reduce])
+    if frame is None:
+        raise ValueError("could not decode the image")
+    return frame, reduce
+
+
+def data_url(url):
+    """The bytes in a base64 data URL (the old JSON format), or in bare base64."""
+    _, _, encoded = url.rpartition(",")
+    return base64.b64decode(encoded)
@@ -0,0 +1,189 @@
+"""Face detection engine behind /detect.
+
+`Detector` runs the Haar cascade on a downscaled copy of the frame and maps
+the boxes back to the frame's own coordinates. `CascadePool` gives every
+thread its own CascadeClassifier, because one classifier must not be used
+by two threads at once. `BatchScheduler` collects frames from concurrent
+requests for a few milliseconds and spreads each batch over a fixed number
+of workers (one per core by default), so the CPU is kept busy without
+running more detections at once than there are cores.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import cv2
+
+CASCADE_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+
+class Overloaded(Exception):
+    """Raised by BatchScheduler.submit when `max_pending` frames are already waiting."""
+
+
+class DetectionTimeout(Exception):
+    """Raised by BatchScheduler.result when a frame's boxes are not ready in time."""
+
+
+class CascadePool:
+    """One CascadeClassifier per thread, loaded on first use in that thread."""
+
+    def __init__(self, path=CASCADE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.loaded = 0
+        # fail at startup rather than on the first request if the file is missing
+        if self.get().empty():
+            raise ValueError(f"could not load cascade {path}")
+
+    def get(self):
+        cascade = getattr(self._local, "cascade", None)
+        if cascade is None:
+            cascade = self._local.cascade = cv2.CascadeClassifier(self.path)
+            with self._lock:
+                self.loaded += 1
+        return cascade
+
+
+class Detector:
+    """Haar face detection on frames downscaled to at most `max_width` pixels wide.
+
+    Boxes are returned as (x, y, width, height) in the coordinates of the
+    image passed in. `min_size` is in those coordinates too. `max_width=0`
+    disables downscaling.
+    """
+
+    def __init__(self, scale_factor=1.1, min_neighbors=4, max_width=320, min_size=(30, 30),
+                 cascades=None):
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.max_width = max_width
+        self.min_size = min_size
+        self.cascades = cascades or CascadePool()
+
+    def downscale(self, gray, frame_width=None):
+        """(image to scan, factor from its coordinates back to `gray`'s).
+
+        `frame_width` is the width of the whole frame when `gray` is a region
+        of it, so a region is scanned at the same scale as the full frame.
+        """
+        height, width = gray.shape[:2]
+        frame_width = frame_width or width
+        if not self.max_width or frame_width <= self.max_width:
+            return gray, 1.0
+        scale = frame_width / self.max_width
+        small = cv2.resize(gray, (max(1, round(width / scale)), max(1, round(height / scale))),
+                           interpolation=cv2.INTER_AREA)
+        return small, scale
+
+    def detect(self, gray, min_size=None, max_size=None, frame_width=None):
+        """Faces in `gray`; `min_size`/`max_size` narrow the scales searched."""
+        small, scale = self.downscale(gray, frame_width)
+        min_size = min_size or self.min_size
+        options = {"minSize": (max(1, round(min_size[0] / scale)), max(1, round(min_size[1] / scale)))}
+        if max_size:
+            options["maxSize"] = (round(max_size[0] / scale), round(max_size[1] / scale))
+        faces = self.cascades.get().detectMultiScale(small, self.scale_factor, self.min_neighbors, **options)
+        return [(round(x * scale), round(y * scale), round(w * scale), round(h * scale))
+                for (x, y, w, h) in faces]
+
+
+class BatchScheduler:
+    """Micro-batching front end for a Detector.
+
+    `submit` queues a grayscale frame and returns a Future of its boxes. A
+    dispatcher thread takes the first waiting frame, keeps collecting for up
+    to `window` seconds (or `max_batch` frames), and splits the batch into
+    one slice per worker; each slice runs on its own thread and cascade.
+    OpenCV releases the GIL inside detectMultiScale, so the slices run in
+    parallel.
+    """
+
+    def __init__(self, detector, workers=None, window=0.005, max_batch=None, max_pending=256):
+        self.detector = detector
+        self.workers = workers or os.cpu_count() or 1
+        self.window = window
+        self.max_batch = max_batch or 4 * self.workers
+        self.max_pending = max_pending
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="detect")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.frames = 0
+        self.batches = 0
+        self.rejected = 0
+        self._dispatcher = threading.Thread(target=self._dispatch, name="detect-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, gray, **options):
+        """Queue `gray` for Detector.detect(gray, **options); returns a Future of the boxes."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise Overloaded(f"{self.max_pending} frames already waiting")
+            self.pending += 1
+        future = Future()
+        self._queue.put((gray, options, future))
+        return future
+
+    def result(self, future, timeout=None):
+        """The boxes from a submitted frame; a frame not yet started when time runs out is dropped."""
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise DetectionTimeout(f"no detection result within {timeout:g} s") from None
+
+    def detect(self, gray, timeout=None, **options):
+        return self.result(self.submit(gray, **options), timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch(self):
+        while True:
+            batch = self._collect()
+            with self._lock:
+                self.batches += 1
+                self.frames += len(batch)
+            # contiguous slices, at most one per worker
+            step = -(-len(batch) // self.workers)
+            for start in range(0, len(batch), step):
+                self._executor.submit(self._run, batch[start:start + step])
+
+    def _run(self, frames):
+        for gray, options, future in frames:
+            if not future.set_running_or_notify_cancel():
+                self._done()
+                continue
+            try:
+                future.set_result(self.detector.detect(gray, **options))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._done()
+
+    def _done(self):
+        with self._lock:
+            self.pending -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "pending": self.pending, "frames": self.frames,
+                    "batches": self.batches, "rejected": self.rejected,
+                    "meanBatch": self.frames / self.batches if self.batches else 0.0,
+                    "cascades": self.detector.cascades.loaded}
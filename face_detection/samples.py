@@ -0,0 +1,97 @@
+"""Sample frames for the benchmarks: image files if given, otherwise synthetic ones.
+
+The synthetic frames are noisy backgrounds with drawn faces (skin-tone
+oval, brows, eyes, nose, mouth) that the frontal Haar cascade does detect,
+so the cascade does the same kind of work as on a real webcam frame.
+"""
+import glob
+
+import cv2
+import numpy as np
+
+RESOLUTIONS = {"qvga": (320, 240), "vga": (640, 480), "hd": (1280, 720), "fhd": (1920, 1080)}
+
+
+def draw_face(img, cx, cy, size, tone=200):
+    s = size
+    cv2.ellipse(img, (cx, cy), (int(s * 0.8), s), 0, 0, 360, tone, -1)
+    for side in (-1, 1):
+        ex, ey = cx + side * int(s * 0.35), cy - int(s * 0.2)
+        cv2.ellipse(img, (ex, ey - int(s * 0.18)), (int(s * 0.22), int(s * 0.05)), 0, 0, 360, 70, -1)
+        cv2.ellipse(img, (ex, ey), (int(s * 0.18), int(s * 0.09)), 0, 0, 360, 40, -1)
+    cv2.ellipse(img, (cx, cy + int(s * 0.15)), (int(s * 0.08), int(s * 0.18)), 0, 0, 360, tone - 30, -1)
+    cv2.ellipse(img, (cx, cy + int(s * 0.5)), (int(s * 0.3), int(s * 0.08)), 0, 0, 360, 90, -1)
+
+
+def background(width, height, rng):
+    gray = np.full((height, width), 110, np.uint8)
+    gray = cv2.add(gray, rng.integers(0, 40, (height, width), dtype=np.uint8))
+    # a few background shapes so not every window is rejected by the first stage
+    for _ in range(6):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        cv2.rectangle(gray, (x, y), (x + width // 8, y + height // 6), int(rng.integers(40, 220)), -1)
+    return gray
+
+
+def synthetic_frame(width=640, height=480, faces=1, seed=0):
+    """(BGR frame, [(x, y, w, h)] of the faces drawn)."""
+    rng = np.random.default_rng(seed)
+    gray = background(width, height, rng)
+    boxes = []
+    for i in range(faces):
+        size = int(height * rng.uniform(0.12, 0.2))
+        # faces side by side in the middle band, each in its own column
+        column = width // faces
+        cx = column * i + column // 2 + int(rng.integers(-column // 8, column // 8 + 1))
+        cy = height // 2 + int(rng.integers(-height // 10, height // 10 + 1))
+        draw_face(gray, cx, cy, size, tone=int(rng.integers(180, 225)))
+        boxes.append((cx - size, cy - size, 2 * size, 2 * size))
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR), boxes
+
+
+def clip(width=640, height=480, count=60, seed=0):
+    """BGR frames of one static scene, like a webcam on a desk.
+
+    The face holds still for the first and third quarters of the clip and
+    drifts sideways in the second and fourth; every frame has a little
+    sensor noise.
+    """
+    rng = np.random.default_rng(seed)
+    scene = cv2.GaussianBlur(background(width, height, rng), (5, 5), 0)
+    size = height // 6
+    x, y = width // 3, height // 2
+    step = max(1, width // (2 * count))
+    out = []
+    for i in range(count):
+        if (4 * i // count) % 2 == 1:
+            x = min(width - size, x + step)
+        gray = scene.copy()
+        draw_face(gray, x, y, size)
+        noise = rng.integers(-2, 3, gray.shape)
+        gray = np.clip(gray + noise, 0, 255).astype(np.uint8)
+        out.append(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+    return out
+
+
+def frames(width=640, height=480, count=8, images=None):
+    """`count` BGR frames of `width`x`height`: the files matching `images`, resized, or synthetic."""
+    paths = sorted(glob.glob(images)) if images else []
+    out = []
+    for path in paths[:count]:
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is not None:
+            out.append(cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA))
+    seed = 0
+    while len(out) < count:
+        out.append(synthetic_frame(width, height, faces=1 + seed % 2, seed=seed)[0])
+        seed += 1
+    return out
+
+
+def encode(frame, ext=".jpg", quality=80):
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext == ".jpg" else []
+    ok, buf = cv2.imencode(ext, frame, params)
+    if not ok:
+        raise ValueError(f"could not encode frame as {ext}")
+    return buf.tobytes()
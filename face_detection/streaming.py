@@ -0,0 +1,145 @@
+"""One WebSocket per camera: latest-frame-wins detection with per-session state.
+
+The client sends each frame as a binary message (JPEG/PNG bytes) and gets a
+JSON result back for the frames the server actually processed. Before
+decoding, the server reads everything already queued on the socket and keeps
+only the newest frame, so when detection is slower than the camera the
+stale frames are dropped rather than queued, and latency stays at about one
+detection. With tracking on (tracking.py), each result says which path
+served the frame: "cached", "roi" or "full". Text messages are JSON
+settings, e.g. {"reduce": 2} or {"tracking": false}.
+"""
+import json
+import threading
+import time
+import uuid
+
+FPS_SMOOTHING = 0.2  # weight of the newest frame interval in the moving average
+
+
+class Session:
+    """State of one stream: counters, frame rate, the last boxes found and the tracker.
+
+    `make_tracker()` builds a Tracker; it is used while tracking is on.
+    """
+
+    def __init__(self, reduce=1, make_tracker=None, tracking=False):
+        self.id = uuid.uuid4().hex
+        self.reduce = reduce
+        self.make_tracker = make_tracker
+        self.tracker = make_tracker() if make_tracker and tracking else None
+        self.paths = {}
+        self.started = time.monotonic()
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.boxes = []
+        self.fps = 0.0
+        self._last = None
+
+    def configure(self, message):
+        settings = json.loads(message)
+        if "reduce" in settings and int(settings["reduce"]) != self.reduce:
+            self.reduce = int(settings["reduce"])
+            if self.tracker is not None:
+                # the tracked boxes and thumbnail are in the old frame scale
+                self.tracker = self.make_tracker()
+        if "tracking" in settings:
+            if not settings["tracking"]:
+                self.tracker = None
+            elif self.tracker is None and self.make_tracker:
+                self.tracker = self.make_tracker()
+
+    def record(self, boxes, path):
+        now = time.monotonic()
+        if self._last is not None and now > self._last:
+            rate = 1.0 / (now - self._last)
+            self.fps = rate if not self.fps else (1 - FPS_SMOOTHING) * self.fps + FPS_SMOOTHING * rate
+        self._last = now
+        self.processed += 1
+        self.boxes = boxes
+        self.paths[path] = self.paths.get(path, 0) + 1
+
+    def result(self, boxes, path, elapsed):
+        return {
+            "success": True,
+            "frame": self.received,
+            "faces": boxes,
+            "count": len(boxes),
+            "path": path,
+            "latencyMs": round(elapsed * 1000, 1),
+            "fps": round(self.fps, 1),
+            "dropped": self.dropped,
+        }
+
+    def summary(self):
+        return {"id": self.id, "received": self.received, "processed": self.processed,
+                "dropped": self.dropped, "fps": round(self.fps, 1), "paths": dict(self.paths),
+                "seconds": round(time.monotonic() - self.started, 1)}
+
+
+class Sessions:
+    """Open sessions in this process, for the stats endpoint."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def open(self, **kwargs):
+        session = Session(**kwargs)
+        with self._lock:
+            self._sessions[session.id] = session
+            self.opened += 1
+        return session
+
+    def close(self, session):
+        with self._lock:
+            self._sessions.pop(session.id, None)
+
+    def stats(self):
+        with self._lock:
+            active = [s.summary() for s in self._sessions.values()]
+        return {"opened": self.opened, "active": active}
+
+
+def latest(ws, session, first):
+    """The newest frame already waiting on `ws`, starting from `first`; settings are applied on the way."""
+    frame = first if isinstance(first, bytes) else None
+    if frame is None:
+        session.configure(first)
+    while True:
+        message = ws.receive(timeout=0)
+        if message is None:
+            return frame
+        if isinstance(message, bytes):
+            session.received += 1
+            if frame is not None:
+                session.dropped += 1
+            frame = message
+        else:
+            session.configure(message)
+
+
+def serve(ws, session, detect):
+    """Run a session until the client disconnects. `detect(bytes, session)` returns (box dicts, path)."""
+    while True:
+        message = ws.receive()
+        if isinstance(message, bytes):
+            session.received += 1
+        try:
+            frame = latest(ws, session, message)
+        except (ValueError, TypeError) as e:
+            ws.send(json.dumps({"success": False, "error": f"invalid settings: {e}", "dropped": session.dropped}))
+            continue
+        if frame is None:
+            continue
+        started = time.perf_counter()
+        try:
+            boxes, path = detect(frame, session)
+        except Exception as e:
+            ws.send(json.dumps({"success": False, "frame": session.received, "error": str(e),
+                                "dropped": session.dropped}))
+            continue
+        session.record(boxes, path)
+        ws.send(json.dumps(session.result(boxes, path, time.perf_counter() - started)))
@@ -0,0 +1,111 @@
+"""Temporal tracking for a stream of frames from one camera.
+
+Consecutive webcam frames are mostly the same picture, so `Tracker.update`
+picks the cheapest way to answer each one:
+
+    cached  the frame barely differs from the last one scanned (frame
+            difference on a small thumbnail); the previous boxes are returned
+    roi     each face from the last frame is searched for again in a padded
+            region around it, only at scales close to its previous size
+    full    the whole frame is scanned: every `full_every` frames, when there
+            was no face to track, or when a tracked face was lost
+
+The path taken is returned with the boxes so clients and benchmarks can see
+how much detection work was skipped.
+"""
+import cv2
+import numpy as np
+
+CACHED = "cached"
+ROI = "roi"
+FULL = "full"
+PATHS = (CACHED, ROI, FULL)
+
+THUMB_WIDTH = 80
+
+
+class Tracker:
+    """Per-session tracking state on top of a BatchScheduler (or anything with its `submit`).
+
+    `motion_delta` is the change in gray level that counts a thumbnail
+    pixel as changed, `motion_fraction` the share of changed pixels below
+    which a frame counts as unchanged. Regions are padded by `pad` times the
+    box size on every side; re-detection looks for faces between
+    1 - `size_margin` and 1 + `size_margin` times the previous size.
+    """
+
+    def __init__(self, scheduler, full_every=15, motion_delta=12, motion_fraction=0.005,
+                 pad=0.5, size_margin=0.3, timeout=None):
+        self.scheduler = scheduler
+        self.full_every = full_every
+        self.motion_delta = motion_delta
+        self.motion_fraction = motion_fraction
+        self.pad = pad
+        self.size_margin = size_margin
+        self.timeout = timeout
+        self.boxes = []
+        self.paths = dict.fromkeys(PATHS, 0)
+        self._reference = None
+        self._since_full = 0
+
+    def _thumbnail(self, gray):
+        height, width = gray.shape[:2]
+        size = (THUMB_WIDTH, max(1, round(height * THUMB_WIDTH / width)))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+    def _unchanged(self, thumb):
+        if self._reference is None or self._reference.shape != thumb.shape:
+            return False
+        changed = np.count_nonzero(cv2.absdiff(thumb, self._reference) > self.motion_delta)
+        return changed < self.motion_fraction * thumb.size
+
+    def _region(self, box, width, height):
+        x, y, w, h = box
+        px, py = round(w * self.pad), round(h * self.pad)
+        return max(0, x - px), max(0, y - py), min(width, x + w + px), min(height, y + h + py)
+
+    def _redetect(self, gray):
+        """Boxes of the tracked faces found again in their regions, or None if any is lost."""
+        height, width = gray.shape[:2]
+        searches = []
+        for box in self.boxes:
+            x0, y0, x1, y1 = self._region(box, width, height)
+            w, h = box[2], box[3]
+            low, high = 1 - self.size_margin, 1 + self.size_margin
+            future = self.scheduler.submit(
+                gray[y0:y1, x0:x1], frame_width=width,
+                min_size=(round(w * low), round(h * low)), max_size=(round(w * high), round(h * high)))
+            searches.append((box, x0, y0, future))
+
+        found = []
+        for box, x0, y0, future in searches:
+            faces = self.scheduler.result(future, self.timeout)
+            if not faces:
+                return None
+            # several hits in one region: keep the one nearest the old box
+            cx, cy = box[0] + box[2] / 2, box[1] + box[3] / 2
+            fx, fy, fw, fh = min(faces, key=lambda f: (x0 + f[0] + f[2] / 2 - cx) ** 2
+                                 + (y0 + f[1] + f[3] / 2 - cy) ** 2)
+            found.append((x0 + fx, y0 + fy, fw, fh))
+        return found
+
+    def update(self, gray):
+        """(boxes, path) for the next frame."""
+        thumb = self._thumbnail(gray)
+        if self._unchanged(thumb):
+            path, boxes = CACHED, self.boxes
+        else:
+            boxes = None
+            if self.boxes and self._since_full < self.full_every:
+                boxes = self._redetect(gray)
+            if boxes is not None:
+                path = ROI
+                self._since_full += 1
+            else:
+                path = FULL
+                boxes = self.scheduler.detect(gray, timeout=self.timeout)
+                self._since_full = 0
+            self.boxes = boxes
+            self._reference = thumb
+        self.paths[path] += 1
+        return boxes, path
@@ -0,0 +1,166 @@
+"""Simulated cameras against /stream (WebSocket) and /detect (HTTP polling).
+
+    python ws_client_sim.py --clients 8 --fps 15 --seconds 10
+    python ws_client_sim.py --url http://127.0.0.1:5000 --modes stream
+
+Every client produces frames at --fps. In "stream" mode it sends them all
+down one WebSocket and the server keeps only the newest; latency is from
+sending a frame to receiving its result. In "http" mode each frame is
+POSTed to /detect on its own request as soon as it is produced, like the
+page's setInterval + fetch did, so slow responses overlap and queue up.
+Without --url the app is served in this process on a free port.
+
+--clip sends a webcam-like clip (static scene, one face that holds still
+and then drifts) instead of unrelated frames; with tracking on, the
+"paths" column shows how many stream frames were answered from the cache,
+by region re-detection and by full scans.
+"""
+import argparse
+import json
+import logging
+import statistics
+import threading
+import time
+import urllib.request
+
+from simple_websocket import Client, ConnectionClosed
+
+import samples
+
+
+def quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.sent = 0
+        self.errors = 0
+        self.paths = {}
+        self._lock = threading.Lock()
+
+    def add(self, latency=None, sent=0, error=False, path=None):
+        with self._lock:
+            self.sent += sent
+            if latency is not None:
+                self.latencies.append(latency)
+            if path is not None:
+                self.paths[path] = self.paths.get(path, 0) + 1
+            self.errors += error
+
+
+def stream_client(url, frames, fps, stop, recorder, tracking=True):
+    ws = Client.connect(url.replace("http", "ws", 1) + "/stream")
+    ws.send(json.dumps({"tracking": tracking}))
+    sent_at = []
+
+    def send():
+        i = 0
+        next_at = time.monotonic()
+        while time.monotonic() < stop:
+            sent_at.append(time.perf_counter())
+            ws.send(frames[i % len(frames)])
+            recorder.add(sent=1)
+            i += 1
+            next_at += 1 / fps
+            time.sleep(max(0.0, next_at - time.monotonic()))
+
+    sender = threading.Thread(target=send)
+    sender.start()
+    try:
+        while time.monotonic() < stop:
+            message = ws.receive(timeout=0.5)
+            if message is None:
+                continue
+            result = json.loads(message)
+            if result["success"]:
+                recorder.add(time.perf_counter() - sent_at[result["frame"] - 1], path=result["path"])
+            else:
+                recorder.add(error=True)
+    except ConnectionClosed:
+        recorder.add(error=True)
+    sender.join()
+    ws.close()
+
+
+def http_client(url, frames, fps, stop, recorder, tracking=False):
+    requests = []
+
+    def post(frame):
+        started = time.perf_counter()
+        request = urllib.request.Request(url + "/detect", data=frame, headers={"Content-Type": "image/jpeg"})
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+            recorder.add(time.perf_counter() - started)
+        except OSError:
+            recorder.add(error=True)
+
+    i = 0
+    next_at = time.monotonic()
+    while time.monotonic() < stop:
+        t = threading.Thread(target=post, args=(frames[i % len(frames)],))
+        t.start()
+        requests.append(t)
+        recorder.add(sent=1)
+        i += 1
+        next_at += 1 / fps
+        time.sleep(max(0.0, next_at - time.monotonic()))
+    for t in requests:
+        t.join()
+
+
+def serve_locally():
+    from werkzeug.serving import make_server
+
+    from app import app
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="running app (default: serve it in this process)")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--fps", type=float, default=15.0, help="frames per second each camera produces")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--modes", default="stream,http")
+    parser.add_argument("--clip", action="store_true", help="send a webcam-like clip")
+    parser.add_argument("--no-tracking", action="store_true", help="full scan of every stream frame")
+    args = parser.parse_args()
+
+    url = (args.url or serve_locally()).rstrip("/")
+    source = samples.clip(args.width, args.height) if args.clip else samples.frames(args.width, args.height)
+    frames = [samples.encode(f, quality=92) for f in source]
+    clients = {"stream": stream_client, "http": http_client}
+
+    print(f"{args.clients} clients at {args.fps:g} fps, {args.width}x{args.height}, {url}")
+    print(f"{'mode':<7} {'sent':>6} {'served':>7} {'fps/client':>11} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}  paths")
+    for mode in args.modes.split(","):
+        recorder = Recorder()
+        stop = time.monotonic() + args.seconds
+        started = time.perf_counter()
+        threads = [threading.Thread(target=clients[mode],
+                                    args=(url, frames, args.fps, stop, recorder, not args.no_tracking))
+                   for _ in range(args.clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - started
+        served = len(recorder.latencies)
+        print(f"{mode:<7} {recorder.sent:6d} {served:7d} {served / wall / args.clients:11.1f} "
+              f"{statistics.median(recorder.latencies) * 1000 if served else float('nan'):8.1f} "
+              f"{quantile(recorder.latencies, 0.95) * 1000:8.1f} {quantile(recorder.latencies, 0.99) * 1000:8.1f} "
+              f"{recorder.errors:7d}  {' '.join(f'{k}={v}' for k, v in sorted(recorder.paths.items()))}")
+
+
+if __name__ == "__main__":
+    main()
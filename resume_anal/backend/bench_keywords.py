@@ -0,0 +1,68 @@
+"""Per-request parse time of keyword extraction, before and after the engine.
+
+    python bench_keywords.py --requests 50
+
+"baseline" is the original get_tailoring_suggestions: the full
+en_core_web_sm pipeline run twice per request. "engine (new JD)" parses
+resume and JD in one nlp.pipe batch with the lemmatizer disabled;
+"engine (cached JD)" is the common screening case where the same JD is
+matched against many resumes and only the resume is parsed.
+"""
+import argparse
+import statistics
+import time
+
+import spacy
+
+from keywords import KeywordExtractor
+
+RESUME = """Software engineer with five years of experience building Python and Flask
+web services, REST APIs and data pipelines. Led a team of four developers at
+Acme Corp, migrated services to AWS, and improved API latency by 40 percent.
+Skills: Python, SQL, Docker, Git, unit testing, agile delivery."""
+
+JD = """We are hiring a backend engineer to design scalable microservices on
+Kubernetes and Google Cloud. You will own the payments platform, write Go and
+Python services, build CI/CD pipelines, and mentor junior engineers. Experience
+with Kafka, PostgreSQL, observability tooling and incident response is required.
+Knowledge of PCI compliance and the payments domain is a plus."""
+
+
+def baseline(nlp, resume, jd):
+    doc_resume = nlp(resume.lower())
+    doc_jd = nlp(jd.lower())
+    resume_keywords = {c.text.strip() for c in doc_resume.noun_chunks} | {e.text.strip() for e in doc_resume.ents}
+    jd_keywords = {c.text.strip() for c in doc_jd.noun_chunks} | {e.text.strip() for e in doc_jd.ents}
+    return list({kw for kw in jd_keywords if kw not in resume_keywords and len(kw) > 3})[:10]
+
+
+def measure(name, fn, requests):
+    times = []
+    for i in range(requests):
+        t = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - t) * 1000)
+    print(f"{name:<20} mean {statistics.mean(times):7.2f} ms   median {statistics.median(times):7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    full = spacy.load("en_core_web_sm")
+    print(f"load full pipeline     {(time.perf_counter() - t) * 1000:7.1f} ms")
+    t = time.perf_counter()
+    extractor = KeywordExtractor()
+    extractor.nlp  # loaded lazily; force it so the parse timings below exclude the load
+    print(f"load engine pipeline   {(time.perf_counter() - t) * 1000:7.1f} ms")
+
+    measure("baseline", lambda i: baseline(full, RESUME + f" {i}", JD + f" {i}"), args.requests)
+    measure("engine (new JD)", lambda i: extractor.missing_keywords(RESUME + f" {i}", JD + f" {i}"), args.requests)
+    measure("engine (cached JD)", lambda i: extractor.missing_keywords(RESUME + f" {i}", JD), args.requests)
+    print("top missing keywords:", extractor.missing_keywords(RESUME, JD))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Requests per second with sync gunicorn workers vs. the job-submission mode.
+
+    python bench_load.py --workers 2 --clients 32 --duration 20 --latency 1.0
+
+Starts a FakeMistral that answers every completion after `--latency`
+seconds and a `gunicorn main:app` with `--workers` sync workers pointed at
+it, then drives it with `--clients` concurrent clients:
+
+  sync  POST /cover_letter and wait for the response; each request holds a
+        gunicorn worker for the whole LLM call.
+  jobs  POST /jobs, then poll GET /jobs/<id> every `--poll` seconds; a worker
+        is only held for the few milliseconds each of those calls takes.
+
+Jobs are kept in a temporary SQLite store so a poll answered by a different
+worker still finds them. Every request uses a distinct resume so the LLM
+cache never answers for the fake server. Pass --url to drive a server that
+is already running (it must be configured against --fake-port itself).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from fake_mistral import FakeMistral
+
+RESUME = "Backend developer, five years of Python, Flask and PostgreSQL. Request {n}."
+JD = "We are hiring a Python backend engineer to build REST APIs on Flask."
+
+
+class Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.n = 0
+
+    def next(self):
+        with self.lock:
+            self.n += 1
+            return self.n
+
+
+def sync_request(session, base, n, poll):
+    response = session.post(f"{base}/cover_letter", json={"resume": RESUME.format(n=n), "jd": JD}, timeout=120)
+    return response.status_code == 200
+
+
+def job_request(session, base, n, poll):
+    while True:
+        response = session.post(f"{base}/jobs", json={"type": "cover_letter", "resume": RESUME.format(n=n), "jd": JD},
+                                timeout=30)
+        if response.status_code != 429:
+            break
+        time.sleep(float(response.headers.get("Retry-After", 1)))
+    if response.status_code != 202:
+        return False
+    job_id = response.json()["id"]
+    while True:
+        time.sleep(poll)
+        job = session.get(f"{base}/jobs/{job_id}", timeout=30).json()
+        if job.get("status") in ("done", "failed"):
+            return job["status"] == "done"
+
+
+def run(name, request, base, clients, duration, poll):
+    ids = Counter()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client():
+        session = requests.Session()
+        while time.monotonic() < stop:
+            t = time.perf_counter()
+            try:
+                ok = request(session, base, ids.next(), poll)
+            except requests.RequestException:
+                ok = False
+            with lock:
+                (latencies if ok else errors).append(time.perf_counter() - t)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    if latencies:
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{name:<5} {len(latencies) / elapsed:7.2f} req/s   {len(latencies):5d} ok  {len(errors):4d} failed   "
+              f"p50 {statistics.median(latencies) * 1000:7.0f} ms   p95 {p95 * 1000:7.0f} ms")
+    else:
+        print(f"{name:<5} no successful requests ({len(errors)} failed)")
+
+
+def wait_ready(base, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base}/jobs", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"server at {base} did not come up within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn sync workers")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20, help="seconds per mode")
+    parser.add_argument("--latency", type=float, default=1.0, help="fake LLM seconds per completion")
+    parser.add_argument("--poll", type=float, default=0.25, help="seconds between job polls")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--fake-port", type=int, default=0)
+    parser.add_argument("--url", help="drive an already running server instead of starting gunicorn")
+    args = parser.parse_args()
+
+    fake = FakeMistral(port=args.fake_port, latency=args.latency).start()
+    server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        base = args.url
+        if base is None:
+            base = f"http://127.0.0.1:{args.port}"
+            env = dict(os.environ, MISTRAL_API_URL=fake.url, MISTRAL_API_KEY="load-test",
+                       JOB_STORE_PATH=os.path.join(tmp, "jobs.db"))
+            server = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "main:app", "--workers", str(args.workers),
+                 "--bind", f"127.0.0.1:{args.port}", "--log-level", "warning"],
+                cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+        try:
+            wait_ready(base)
+            print(f"{args.workers} sync worker(s), {args.clients} clients, {args.latency:.2f}s fake LLM latency, "
+                  f"{args.duration:.0f}s per mode")
+            run("sync", sync_request, base, args.clients, args.duration, args.poll)
+            run("jobs", job_request, base, args.clients, args.duration, args.poll)
+            print(f"fake LLM calls: {fake.calls}")
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+            fake.stop()
+
+
+if __name__ == "__main__":
+    main()
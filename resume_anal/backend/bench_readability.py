@@ -0,0 +1,83 @@
+"""Readability scoring cost per resume: textstat calls vs. the single-pass scorer.
+
+    python bench_readability.py --resumes 200
+
+"textstat" is what get_res used to do: flesch_reading_ease and
+flesch_kincaid_grade called separately (plus gunning_fog and smog_index for
+"textstat x4", the same metric set the scorer returns). Every resume is
+distinct, so textstat's per-text caches never hit. "scorer" runs
+ReadabilityScorer.analyze per resume, "scorer batch" one analyze_many
+call, and "scorer memoized" repeats resumes that were already scored.
+The script first checks that every metric equals textstat's value.
+"""
+import argparse
+import random
+import statistics
+import time
+
+import textstat
+
+from readability import ReadabilityScorer
+
+SENTENCES = [
+    "Led a cross-functional team of six engineers delivering payment integrations.",
+    "Designed and implemented RESTful APIs in Python and Flask serving two million requests a day.",
+    "Reduced infrastructure costs by 30 percent through containerization and autoscaling.",
+    "Collaborated with product managers to prioritize the roadmap.",
+    "Mentored junior developers and introduced code review guidelines.",
+    "Skills: Python, SQL, Docker, Kubernetes, AWS, Terraform.",
+    "Bachelor of Science in Computer Science, University of Somewhere, 2016.",
+    "Automated the deployment pipeline, cutting release time from days to hours.",
+]
+
+
+def make_resumes(n, seed=7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(15, 40))) + f" Reference {i}."
+            for i in range(n)]
+
+
+def per_resume(name, fn, resumes):
+    t = time.perf_counter()
+    for r in resumes:
+        fn(r)
+    elapsed = time.perf_counter() - t
+    print(f"{name:<18} {elapsed / len(resumes) * 1e6:9.1f} us/resume")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=200)
+    args = parser.parse_args()
+
+    scorer = ReadabilityScorer(cache_size=4 * args.resumes)
+    check = make_resumes(20, seed=1)
+    for text, got in zip(check, scorer.analyze_many(check)):
+        for key, fn in (("fleschReadingEase", textstat.flesch_reading_ease),
+                        ("fleschKincaidGrade", textstat.flesch_kincaid_grade),
+                        ("gunningFog", textstat.gunning_fog), ("smogIndex", textstat.smog_index)):
+            assert got[key] == fn(text), (key, got[key], fn(text))
+    print(f"metrics identical to textstat on {len(check)} resumes")
+
+    base = per_resume("textstat x2", lambda r: (textstat.flesch_reading_ease(r), textstat.flesch_kincaid_grade(r)),
+                      make_resumes(args.resumes, seed=2))
+    per_resume("textstat x4", lambda r: (textstat.flesch_reading_ease(r), textstat.flesch_kincaid_grade(r),
+                                         textstat.gunning_fog(r), textstat.smog_index(r)),
+               make_resumes(args.resumes, seed=3))
+    single = per_resume("scorer", scorer.analyze, make_resumes(args.resumes, seed=4))
+
+    batch = make_resumes(args.resumes, seed=5)
+    t = time.perf_counter()
+    scorer.analyze_many(batch)
+    batched = time.perf_counter() - t
+    print(f"{'scorer batch':<18} {batched / len(batch) * 1e6:9.1f} us/resume")
+    per_resume("scorer memoized", scorer.analyze, batch)
+
+    lengths = [scorer.analyze(r)["sentenceLength"]["median"] for r in batch]
+    print(f"speed-up vs textstat x2: {base / single:.1f}x single, {base / batched:.1f}x batch "
+          f"(median sentence length across resumes {statistics.median(lengths):.0f} words)")
+
+
+if __name__ == "__main__":
+    main()
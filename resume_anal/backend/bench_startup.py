@@ -0,0 +1,120 @@
+"""Cold-start time and memory of the resume backend, lazy vs. eager models.
+
+    python bench_startup.py --workers 4
+
+import   time to `import main` in a fresh interpreter, with the spaCy model
+         left to the registry (lazy) and with it loaded straight away
+         (eager, what every worker used to pay at import).
+gunicorn for PRELOAD_MODELS=0 (each worker loads its own copy after forking)
+         and PRELOAD_MODELS=1 (loaded once in the master, shared by the
+         forked workers): seconds until the first and until every worker
+         answers /ready with 200, and the total PSS of master + workers.
+
+PSS is read from /proc/<pid>/smaps_rollup, so the gunicorn part is Linux only.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_LAZY = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+IMPORT_EAGER = ("import time; t = time.perf_counter(); import main; from models import registry; "
+                "registry.preload(); print(time.perf_counter() - t)")
+
+
+def time_import(code, runs):
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def children(pid):
+    kids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # the ppid follows the parenthesised command name
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            kids.append(int(entry))
+    return kids
+
+
+def pss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def run_gunicorn(preload, workers, port, timeout=180):
+    env = dict(os.environ, PRELOAD_MODELS="1" if preload else "0", WEB_CONCURRENCY=str(workers),
+               PORT=str(port), MISTRAL_API_KEY=os.getenv("MISTRAL_API_KEY", "bench"))
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app",
+                               "--log-level", "warning"], cwd=HERE, env=env)
+    first = None
+    ready_pids = set()
+    try:
+        deadline = time.monotonic() + timeout
+        while len(ready_pids) < workers and time.monotonic() < deadline:
+            try:
+                response = requests.get(f"http://127.0.0.1:{port}/ready", timeout=5)
+            except requests.RequestException:
+                time.sleep(0.1)
+                continue
+            if response.status_code == 200:
+                if first is None:
+                    first = time.perf_counter() - started
+                ready_pids.add(response.json()["pid"])
+            else:
+                time.sleep(0.05)
+        all_ready = time.perf_counter() - started if len(ready_pids) == workers else None
+        time.sleep(1)  # let lazily started threads settle before reading memory
+        pids = [server.pid] + children(server.pid)
+        total = sum(pss_kb(p) for p in pids)
+        return first, all_ready, total, len(pids) - 1
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def fmt(seconds):
+    return f"{seconds:6.2f} s" if seconds is not None else "  n/a  "
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=3, help="imports per mode (the fastest is reported)")
+    parser.add_argument("--port", type=int, default=8012)
+    args = parser.parse_args()
+
+    lazy = time_import(IMPORT_LAZY, args.runs)
+    eager = time_import(IMPORT_EAGER, args.runs)
+    print(f"import main (lazy models)   {lazy * 1000:8.0f} ms")
+    print(f"import main (eager models)  {eager * 1000:8.0f} ms")
+
+    for preload in (False, True):
+        first, all_ready, total, n = run_gunicorn(preload, args.workers, args.port)
+        print(f"gunicorn PRELOAD_MODELS={int(preload)}  first ready {fmt(first)}   all {args.workers} ready {fmt(all_ready)}   "
+              f"PSS {total / 1024:7.1f} MiB across master + {n} worker(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Shared fixtures: `fake` points llm at a local FakeMistral with a fresh cache.
+
+A test module changes how the fake answers by overriding `fake_options`.
+"""
+import pytest
+
+import llm
+from cache import ResponseCache
+from fake_mistral import FakeMistral
+from mistral_client import MistralClient
+
+
+@pytest.fixture
+def fake_options():
+    """Keyword arguments for FakeMistral."""
+    return {}
+
+
+@pytest.fixture
+def fake(monkeypatch, fake_options):
+    with FakeMistral(**fake_options) as server:
+        monkeypatch.setattr(llm, "client", MistralClient(server.url, "test-key", max_retries=0))
+        monkeypatch.setattr(llm, "cache", ResponseCache())
+        yield server
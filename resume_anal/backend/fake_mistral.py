@@ -0,0 +1,148 @@
+"""Local stand-in for the Mistral chat-completions API.
+
+Answers POST /v1/chat/completions with canned content after an optional
+delay (streamed word by word when the request sets "stream": true) and
+counts the calls it received. Point the backend at it with
+
+    MISTRAL_API_URL=http://127.0.0.1:8089/v1/chat/completions
+
+or start it from code:
+
+    server = FakeMistral(latency=0.5).start()
+    llm.client.url = server.url
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANALYSIS = {
+    "matchScore": 72,
+    "strengths": ["Python and Flask experience", "Shipped production APIs"],
+    "weaknesses": ["Impact of projects is not quantified"],
+    "missingSkills": ["Kubernetes"],
+    "areasForImprovement": ["Add metrics to each role"],
+    "recruiterPerspective": "Solid mid-level candidate",
+    "summary": "A good fit for the backend role with minor gaps.",
+}
+COVER_LETTER = "Dear Hiring Manager,\n\nI am excited to apply for this role.\n\nSincerely,\nApplicant"
+SUGGESTIONS = "- Mention Kubernetes in your deployment work\n- Quantify API traffic you handled"
+
+
+def reply_for(prompt):
+    if '"matchScore"' in prompt:
+        return json.dumps(ANALYSIS)
+    if "cover letter" in prompt:
+        return COVER_LETTER
+    return SUGGESTIONS
+
+
+def usage(prompt, content):
+    # roughly four characters per token
+    return {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+            "total_tokens": (len(prompt) + len(content)) // 4}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server.fake
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        payload = json.loads(body or b"{}")
+        with server.lock:
+            server.calls += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        prompt = payload["messages"][-1]["content"]
+        content = server.reply(prompt)
+        if payload.get("stream"):
+            self.stream(content, payload.get("model", "mistral-small"), prompt)
+            return
+        data = json.dumps({
+            "id": f"fake-{server.calls}",
+            "object": "chat.completion",
+            "model": payload.get("model", "mistral-small"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage(prompt, content),
+        }, ensure_ascii=False).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+    def stream(self, content, model, prompt=""):
+        # chat-completions SSE: one chunk per word, a final chunk with usage, then [DONE], over chunked
+        # transfer; non-ASCII text is sent as raw UTF-8 with no charset in the content type, as Mistral does
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            delta = word if i == len(words) - 1 else word + " "
+            chunk = {"object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+            self.write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            if self.server.fake.token_delay:
+                time.sleep(self.server.fake.token_delay)
+        final = {"object": "chat.completion.chunk", "model": model,
+                 "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                 "usage": usage(prompt, content)}
+        self.write_chunk(f"data: {json.dumps(final)}\n\n".encode())
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.write_chunk(b"")
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeMistral:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, token_delay=0.0, reply=reply_for):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.host, self.port = self.server.server_address[:2]
+        self.url = f"http://{self.host}:{self.port}/v1/chat/completions"
+        self.latency = latency
+        self.token_delay = token_delay
+        self.reply = reply
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake Mistral chat-completions server")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per completion")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="seconds between streamed chunks")
+    args = parser.parse_args()
+    fake = FakeMistral(port=args.port, latency=args.latency, token_delay=args.token_delay)
+    print(f"Fake Mistral at {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"{fake.calls} call(s)")
@@ -0,0 +1,35 @@
+"""gunicorn settings for the resume backend: gunicorn -c gunicorn.conf.py main:app
+
+PRELOAD_MODELS=1 (the default) imports the app and loads the spaCy model
+once in the master, then forks the workers, so every worker starts ready
+and shares the model's memory copy-on-write. PRELOAD_MODELS=0 forks first
+and each worker loads its own copy in the background right after forking.
+
+Jobs (POST /jobs) are kept in each worker's memory unless JOB_STORE_PATH
+names a SQLite file the workers share, so without it the default is a
+single worker; main.py refuses to start with more.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2" if os.getenv("JOB_STORE_PATH") else "1"))
+os.environ["GUNICORN_WORKERS"] = str(workers)  # read by main.py, in the master and every worker
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = os.getenv("PRELOAD_MODELS", "1") == "1"
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from models import registry
+    registry.preload()
+    server.log.info("models preloaded in master: %s", registry.status()["models"])
+    # keep the collector from touching (and so copying) the preloaded objects in every worker
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        from models import registry
+        registry.warm()
@@ -0,0 +1,191 @@
+"""Normalization, size limits and prompt-budget trimming for resume and JD text.
+
+Everything that builds a prompt from user text goes through `resume()` or
+`jd()`: unicode and whitespace are normalized (so the same resume pasted
+twice hashes the same), oversized input is rejected, and text over its
+token budget is cut section by section, least useful sections first.
+"""
+import hashlib
+import os
+import re
+import unicodedata
+from collections import namedtuple
+
+from metrics import metrics
+
+MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", str(100 * 1024)))
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "3000"))
+JD_TOKEN_BUDGET = int(os.getenv("JD_TOKEN_BUDGET", "1500"))
+CHARS_PER_TOKEN = 4  # rough average for English prose with the Mistral tokenizer
+
+# zero-width characters, BOM and C0/C1 controls other than tab and newline
+INVISIBLE = re.compile(r"[\u200b-\u200d\u2060\ufeff\x00-\x08\x0b-\x1f\x7f-\x9f]")
+SPACES = re.compile(r"[^\S\n]+")
+BLANK_LINES = re.compile(r"\n{3,}")
+
+# section headings in the order they are given up when over budget; anything
+# not listed ranks with "other", and the `keep` sections are never dropped
+RESUME_SECTIONS = {
+    "references": ("references",),
+    "interests": ("interests", "hobbies", "activities", "volunteering", "volunteer experience"),
+    "publications": ("publications", "patents"),
+    "awards": ("awards", "honors", "honours", "achievements"),
+    "languages": ("languages",),
+    "certifications": ("certifications", "certificates", "licenses", "courses"),
+    "other": (),
+    "projects": ("projects", "personal projects", "selected projects"),
+    "education": ("education", "academic background"),
+    "summary": ("summary", "profile", "professional summary", "objective", "about me"),
+    "skills": ("skills", "technical skills", "core competencies", "key skills", "tools", "technologies"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history"),
+}
+JD_SECTIONS = {
+    "legal": ("equal opportunity", "eeo statement", "disclaimer", "privacy notice"),
+    "benefits": ("benefits", "perks", "what we offer", "compensation", "why join us"),
+    "company": ("about us", "about the company", "who we are", "our mission", "company overview"),
+    "other": (),
+    "role": ("about the role", "the role", "overview", "job summary", "position summary"),
+    "responsibilities": ("responsibilities", "what you will do", "what you'll do", "key responsibilities",
+                         "duties"),
+    "requirements": ("requirements", "qualifications", "what you bring", "what we're looking for",
+                     "skills", "must have", "nice to have", "preferred qualifications"),
+}
+RESUME_KEEP = ("skills", "experience")
+JD_KEEP = ("requirements", "responsibilities")
+
+Document = namedtuple("Document", "text digest tokens trimmed dropped")
+
+
+class InputTooLarge(ValueError):
+    def __init__(self, field, size, limit=MAX_BYTES):
+        super().__init__(f"{field} is {size} bytes; the limit is {limit}")
+        self.field = field
+        self.size = size
+        self.limit = limit
+
+
+def normalize(text):
+    """NFKC, no invisible characters, single spaces, at most one blank line in a row."""
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = INVISIBLE.sub("", text)
+    text = "\n".join(SPACES.sub(" ", line).strip() for line in text.split("\n"))
+    return BLANK_LINES.sub("\n\n", text).strip()
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def digest(text):
+    """Canonical hash of normalized text, for cache and dedup keys."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def check_size(field, text, limit=MAX_BYTES):
+    size = len(text.encode("utf-8"))
+    if size > limit:
+        raise InputTooLarge(field, size, limit)
+
+
+def _heading(line, aliases):
+    label = line.strip().rstrip(":").strip().lower()
+    if not label or len(label) > 40:
+        return None
+    for name, names in aliases.items():
+        if label in names:
+            return name
+    return None
+
+
+def split_sections(text, aliases):
+    """[(section name, text)] in document order; text before the first heading is "other"."""
+    sections = []
+    name, lines = "other", []
+    for line in text.split("\n"):
+        heading = _heading(line, aliases)
+        if heading is not None:
+            if lines:
+                sections.append((name, "\n".join(lines)))
+            name, lines = heading, [line]
+        else:
+            lines.append(line)
+    if lines:
+        sections.append((name, "\n".join(lines)))
+    return sections
+
+
+def _cut(text, max_tokens):
+    # whole lines while they fit, so a bullet is never cut mid-sentence
+    budget = max_tokens * CHARS_PER_TOKEN
+    kept, used = [], 0
+    for line in text.split("\n"):
+        if used + len(line) + 1 > budget:
+            if not kept:
+                # a single line longer than the budget: cut it at a word boundary
+                head = line[:budget]
+                kept.append(head.rsplit(" ", 1)[0] if " " in head else head)
+            break
+        kept.append(line)
+        used += len(line) + 1
+    return "\n".join(kept)
+
+
+def trim(text, budget, aliases, keep):
+    """(text, dropped section names) fitting `budget` tokens.
+
+    Whole sections are dropped in `aliases` order, never those in `keep`
+    (or "other" when no `keep` section is present, e.g. text without
+    recognized headings) and never the last one left; if what remains is
+    still too long, it is shortened at line boundaries.
+    """
+    if estimate_tokens(text) <= budget:
+        return text, []
+    sections = split_sections(text, aliases)
+    if not any(name in keep for name, _ in sections):
+        keep = (*keep, "other")
+    rank = {name: i for i, name in enumerate(aliases)}
+    order = sorted((i for i, (name, _) in enumerate(sections) if name not in keep),
+                   key=lambda i: rank[sections[i][0]])
+    alive = set(range(len(sections)))
+    dropped = []
+
+    def total():
+        return estimate_tokens("\n".join(sections[i][1] for i in sorted(alive)))
+
+    for i in order:
+        if total() <= budget or len(alive) == 1:
+            break
+        alive.discard(i)
+        dropped.append(sections[i][0])
+
+    if total() > budget:
+        # share what is left evenly, smallest section first: a short skills list
+        # stays whole and the long sections split the rest between them
+        remaining = budget - estimate_tokens("\n" * (len(alive) - 1))  # the joining newlines
+        by_size = sorted(alive, key=lambda i: len(sections[i][1]))
+        for n, i in enumerate(by_size):
+            name, body = sections[i]
+            share = remaining // (len(by_size) - n)
+            if estimate_tokens(body) > share:
+                body = _cut(body, share)
+            sections[i] = (name, body)
+            remaining -= estimate_tokens(body)
+    return "\n".join(sections[i][1] for i in sorted(alive) if sections[i][1]).strip(), dropped
+
+
+def _document(field, text, budget, aliases, keep):
+    check_size(field, text)
+    text = normalize(text)
+    trimmed, dropped = trim(text, budget, aliases, keep)
+    if trimmed != text:
+        metrics.inc("resume_ingest_trimmed_total", field=field)
+    return Document(trimmed, digest(trimmed), estimate_tokens(trimmed), trimmed != text, dropped)
+
+
+def resume(text, budget=RESUME_TOKEN_BUDGET):
+    return _document("resume", text, budget, RESUME_SECTIONS, RESUME_KEEP)
+
+
+def jd(text, budget=JD_TOKEN_BUDGET):
+    return _document("jd", text, budget, JD_SECTIONS, JD_KEEP)
@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when `max_pending` jobs are already queued or running."""
+
+
+def _new_job(kind):
+    now = time.time()
+    return {"id": uuid.uuid4().hex, "type": kind, "status": QUEUED,
+            "result": None, "error": None, "errorStatus": None,
+            "created": now, "updated": now}
+
+
+class MemoryJobStore:
+    """Jobs kept in this process only; fine for a single worker."""
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, kind):
+        job = _new_job(kind)
+        with self._lock:
+            self._prune(job["created"])
+            self._jobs[job["id"]] = job
+        return dict(job)
+
+    def update(self, job_id, status, result=None, error=None, errorStatus=None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(status=status, result=result, error=error, errorStatus=errorStatus,
+                           updated=time.time())
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _prune(self, now):
+        expired = [k for k, job in self._jobs.items()
+                   if job["status"] in FINISHED and job["updated"] + self.ttl <= now]
+        for k in expired:
+            del self._jobs[k]
+
+
+class SQLiteJobStore:
+    """Jobs in a SQLite file, so any gunicorn worker can answer a poll for any job."""
+
+    def __init__(self, path, ttl=3600):
+        self.ttl = ttl
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = None
+        with self._lock:
+            conn = self._db()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, type TEXT NOT NULL, status TEXT NOT NULL,
+                result TEXT, error TEXT, error_status INTEGER,
+                created REAL NOT NULL, updated REAL NOT NULL)""")
+            conn.commit()
+
+    def _db(self):
+        # reopened after fork() so a store created in the gunicorn master is safe in workers
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._pid = os.getpid()
+        return self._conn
+
+    def create(self, kind):
+        job = _new_job(kind)
+        with self._lock:
+            conn = self._db()
+            conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND updated <= ?",
+                         (*FINISHED, job["created"] - self.ttl))
+            conn.execute(
+                "INSERT INTO jobs (id, type, status, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (job["id"], kind, QUEUED, job["created"], job["updated"]))
+            conn.commit()
+        return job
+
+    def update(self, job_id, status, result=None, error=None, errorStatus=None):
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, error_status = ?, updated = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, errorStatus,
+                 time.time(), job_id))
+            conn.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            conn = self._db()
+            row = conn.execute(
+                "SELECT id, type, status, result, error, error_status, created, updated FROM jobs WHERE id = ?",
+                (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "type": row[1], "status": row[2],
+                "result": json.loads(row[3]) if row[3] is not None else None,
+                "error": row[4], "errorStatus": row[5], "created": row[6], "updated": row[7]}
+
+
+class JobQueue:
+    """Background execution of slow requests with a bounded backlog.
+
+    `submit` stores a queued job and returns it at once; the work runs on a
+    thread pool and its result (or error) is written back to the store.
+    Once `max_pending` jobs are queued or running, `submit` raises QueueFull
+    instead of letting the backlog grow without bound.
+    """
+
+    def __init__(self, store, workers=16, max_pending=64, error_status=None):
+        self.store = store
+        self.max_pending = max_pending
+        self.error_status = error_status or (lambda e: 500)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._finished = threading.Condition()
+        self.submitted = 0
+        self.rejected = 0
+        self.pending = 0
+        self.deduplicated = 0
+        self._active = {}
+
+    def submit(self, kind, fn, *args, key=None):
+        """Queue `fn(*args)`. A `key` (e.g. canonical input hashes) matching a job this
+        process has not finished yet returns that job instead of queuing a duplicate."""
+        if key is not None:
+            with self._finished:
+                job_id = self._active.get(key)
+            job = self.store.get(job_id) if job_id else None
+            if job is not None and job["status"] not in FINISHED:
+                with self._finished:
+                    self.deduplicated += 1
+                return job
+        if not self._slots.acquire(blocking=False):
+            with self._finished:
+                self.rejected += 1
+            raise QueueFull(f"{self.max_pending} jobs already pending")
+        with self._finished:
+            self.pending += 1
+        try:
+            job = self.store.create(kind)
+            if key is not None:
+                with self._finished:
+                    self._active[key] = job["id"]
+            self._executor.submit(self._run, job["id"], fn, args, key)
+        except BaseException:
+            self._slots.release()
+            with self._finished:
+                self.pending -= 1
+            raise
+        with self._finished:
+            self.submitted += 1
+        return job
+
+    def _run(self, job_id, fn, args, key=None):
+        try:
+            self.store.update(job_id, status=RUNNING)
+            try:
+                result = fn(*args)
+            except Exception as e:
+                self.store.update(job_id, status=FAILED, error=str(e), errorStatus=self.error_status(e))
+            else:
+                self.store.update(job_id, status=DONE, result=result)
+        finally:
+            self._slots.release()
+            with self._finished:
+                self.pending -= 1
+                if key is not None and self._active.get(key) == job_id:
+                    del self._active[key]
+                self._finished.notify_all()
+
+    def wait(self, job_id, timeout=0.0, poll=0.25):
+        """The job once finished, or its current state after `timeout` seconds.
+
+        Jobs run by this process wake the waiter immediately; jobs run by
+        another worker (shared SQLite store) are noticed within `poll` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED or remaining <= 0:
+                return job
+            with self._finished:
+                self._finished.wait(min(poll, remaining))
+
+    def stats(self):
+        with self._finished:
+            return {"submitted": self.submitted, "rejected": self.rejected, "deduplicated": self.deduplicated,
+                    "pending": self.pending, "maxPending": self.max_pending}
@@ -0,0 +1,120 @@
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+from models import registry
+
+# noun_chunks need tagger/attribute_ruler/parser and entities need ner; nothing uses lemmas
+DISABLED_COMPONENTS = ["lemmatizer"]
+
+
+def load_pipeline(model):
+    # spaCy itself takes a second or more to import, so it is only imported when a model is needed
+    import spacy
+    return spacy.load(model, disable=DISABLED_COMPONENTS)
+
+
+def register(model="en_core_web_sm"):
+    """Register a spaCy model with the registry so preload()/warm() include it."""
+    registry.register(model, lambda: load_pipeline(model))
+
+
+def _phrase(span):
+    # drop leading determiners/pronouns so "a strong background" matches "strong background"
+    tokens = list(span)
+    while tokens and (tokens[0].is_stop or tokens[0].pos_ in ("DET", "PRON")):
+        tokens = tokens[1:]
+    return " ".join(t.text for t in tokens).strip()
+
+
+def doc_keywords(doc):
+    """Counter of noun-chunk and entity phrases in a parsed doc."""
+    counts = Counter()
+    for chunk in doc.noun_chunks:
+        phrase = _phrase(chunk)
+        if phrase:
+            counts[phrase] += 1
+    for ent in doc.ents:
+        phrase = ent.text.strip()
+        if phrase:
+            counts[phrase] += 1
+    return counts
+
+
+class KeywordExtractor:
+    """spaCy keyword extraction for resume tailoring.
+
+    The pipeline comes from the model registry on first use, with unused
+    components disabled; resume and JD are parsed in a single `nlp.pipe`
+    batch, and parsed JDs are cached by hash because the same JD is matched
+    against many resumes.
+    """
+
+    def __init__(self, nlp=None, model="en_core_web_sm", jd_cache_size=256):
+        self._nlp = nlp
+        self.model = model
+        if nlp is None:
+            register(model)
+        self.jd_cache_size = jd_cache_size
+        self._jd_cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.jd_hits = 0
+        self.jd_misses = 0
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._nlp = registry.get(self.model)
+        return self._nlp
+
+    def _cached_jd(self, key):
+        with self._lock:
+            counts = self._jd_cache.get(key)
+            if counts is not None:
+                self._jd_cache.move_to_end(key)
+                self.jd_hits += 1
+            else:
+                self.jd_misses += 1
+            return counts
+
+    def _store_jd(self, key, counts):
+        with self._lock:
+            self._jd_cache[key] = counts
+            while len(self._jd_cache) > self.jd_cache_size:
+                self._jd_cache.popitem(last=False)
+
+    def jd_keywords(self, jd):
+        jd = jd.lower()
+        key = hashlib.sha256(jd.encode("utf-8")).hexdigest()
+        counts = self._cached_jd(key)
+        if counts is None:
+            counts = doc_keywords(self.nlp(jd))
+            self._store_jd(key, counts)
+        return counts
+
+    def keywords_pair(self, resume, jd):
+        """(resume keywords, JD keywords), parsing whatever is not cached in one batch."""
+        resume, jd = resume.lower(), jd.lower()
+        key = hashlib.sha256(jd.encode("utf-8")).hexdigest()
+        jd_counts = self._cached_jd(key)
+        if jd_counts is not None:
+            return doc_keywords(self.nlp(resume)), jd_counts
+        doc_resume, doc_jd = self.nlp.pipe([resume, jd])
+        jd_counts = doc_keywords(doc_jd)
+        self._store_jd(key, jd_counts)
+        return doc_keywords(doc_resume), jd_counts
+
+    def keywords_many(self, texts, batch_size=32):
+        """Keyword counters for many documents, parsed in `nlp.pipe` batches."""
+        return [doc_keywords(doc) for doc in self.nlp.pipe((t.lower() for t in texts), batch_size=batch_size)]
+
+    def missing_keywords(self, resume, jd, limit=10):
+        """JD keywords absent from the resume, most frequent in the JD first."""
+        resume_counts, jd_counts = self.keywords_pair(resume, jd)
+        missing = [
+            (count, kw) for kw, count in jd_counts.items()
+            if len(kw) > 3 and kw not in resume_counts
+        ]
+        # by JD frequency, then longer (more specific) phrases, then alphabetically for stable output
+        missing.sort(key=lambda item: (-item[0], -len(item[1]), item[1]))
+        return [kw for _, kw in missing[:limit]]
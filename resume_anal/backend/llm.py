@@ -1,15 +1,50 @@
 import json
 from dotenv import load_dotenv
 import os
-import requests
-import textstat
-import spacy
+from cache import ResponseCache, prompt_key
+from mistral_client import MistralClient
+from pipeline import Pipeline
+from keywords import KeywordExtractor
+from metrics import metrics
+import structured
+import ingest
+from structured import ANALYSIS_SCHEMA, StructuredOutputError
+from readability import ReadabilityScorer
 
 load_dotenv()
 api_key=os.getenv("MISTRAL_API_KEY")
+MODEL="mistral-small"  # or "mixtral-8x7b-32768"
 
-def get_res(resume,jd):
-    prompt=f"""
+# all readability metrics from one tokenization, memoized per resume
+readability=ReadabilityScorer()
+
+# one pooled, rate-limited client per worker process
+client=MistralClient.from_env(api_key)
+
+# identical prompts (same resume/JD, frontend retries) are answered from here
+cache=ResponseCache(
+    max_entries=int(os.getenv("LLM_CACHE_ENTRIES", "512")),
+    ttl=int(os.getenv("LLM_CACHE_TTL", "86400")),
+    disk_path=os.getenv("LLM_CACHE_PATH") or None,
+)
+
+
+def chat(prompt, model=MODEL, postprocess=None):
+    """Completion text for `prompt`, served from the cache when possible.
+
+    `postprocess(text)` runs before caching and returns the text to cache
+    and return; if it raises, nothing is cached so a retry goes upstream again.
+    """
+    def compute():
+        text = client.complete(prompt, model)
+        if postprocess is not None:
+            text = postprocess(text)
+        return text
+
+    return cache.get_or_compute(prompt_key(model, prompt), compute)
+
+def analysis_prompt(resume,jd):
+    return f"""
 You are an expert career advisor, resume coach, and AI-powered evaluator.
 
 A user has submitted their resume and a specific job description. Your task is to provide a high-quality, job-targeted analysis that simulates how a recruiter or Applicant Tracking System (ATS) would assess this resume.
@@ -40,32 +75,76 @@ Here is the job description:
 {jd}
 """
 
-    
-    headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-    payload = {
-            "model": "mistral-small",  # or "mixtral-8x7b-32768"
-            "messages": [{"role": "user", "content": prompt}]
-        }
-    response = requests.post("https://api.mistral.ai/v1/chat/completions", json=payload, headers=headers)
-
-    data = response.json()
 
-    # now it's a dict, so you can safely index
-    raw_output = data["choices"][0]["message"]["content"]
-    result = json.loads(raw_output)
+def structured_analysis(text):
+    """Canonical JSON for raw analysis output.
 
-    result["fleschReadingEase"] = round(textstat.flesch_reading_ease(resume), 2)
-    result["fleschKincaidGrade"] = round(textstat.flesch_kincaid_grade(resume), 2)
-    result["tailoringSuggestions"] = suggestion_keyword(get_tailoring_suggestions(resume, jd),jd)
+    The output is parsed tolerantly and repaired locally; only if that fails
+    is the model asked to fix its own JSON, with a short prompt that does
+    not resend the resume and JD.
+    """
+    with metrics.timer("resume_stage_seconds", stage="parse_json"):
+        try:
+            obj, repaired = structured.parse(text, ANALYSIS_SCHEMA)
+            outcome = "repaired" if repaired else "clean"
+        except StructuredOutputError as e:
+            obj, error = None, e
+    if obj is None:
+        fixed = client.complete(structured.fix_json_prompt(text, error, ANALYSIS_SCHEMA), MODEL)
+        try:
+            obj, _ = structured.parse(fixed, ANALYSIS_SCHEMA)
+        except StructuredOutputError:
+            metrics.inc("resume_structured_output_total", outcome="failed")
+            raise
+        outcome = "reprompted"
+    metrics.inc("resume_structured_output_total", outcome=outcome)
+    return json.dumps(obj)
+
+
+def prepare(resume, jd):
+    """Resume and JD text as prompts should see it: size-checked, normalized
+    and trimmed to their token budgets (see ingest.py). Idempotent."""
+    return ingest.resume(resume).text, ingest.jd(jd).text
+
+
+def analyze_resume(resume,jd):
+    """The main LLM evaluation (matchScore, strengths, ...) as a dict."""
+    return _analyze(*prepare(resume, jd))
+
+
+def _analyze(resume, jd):
+    # resume and jd already prepared
+    return json.loads(chat(analysis_prompt(resume, jd), postprocess=structured_analysis))
+
+
+def get_res(resume,jd,timings=None):
+    """Full resume analysis. Per-stage seconds are written into `timings` if given."""
+    timings = {} if timings is None else timings
+    # prepared once here; the stages take the prepared text as is
+    resume, jd = prepare(resume, jd)
+    # keyword extraction and the suggestion call don't need the main analysis,
+    # so they run alongside it instead of after it
+    stages = (Pipeline()
+        .stage("analysis", lambda: _analyze(resume, jd))
+        .stage("readability", lambda: readability.analyze(resume))
+        .stage("keywords", lambda: get_tailoring_suggestions(resume, jd))
+        .stage("suggestions", lambda keywords: suggestion_keyword(keywords, jd), deps=["keywords"])
+        .run(timings))
+    for name, seconds in timings.items():
+        metrics.observe("resume_stage_seconds", seconds, stage=name)
+
+    result = stages["analysis"]
+    scores = stages["readability"]
+    result["fleschReadingEase"] = round(scores["fleschReadingEase"], 2)
+    result["fleschKincaidGrade"] = round(scores["fleschKincaidGrade"], 2)
+    result["readability"] = scores
+    result["tailoringSuggestions"] = stages["suggestions"]
 
     return result
 
 
-def gen_cover_letter(resume, jd, applicant_name):
-    prompt = f"""
+def cover_letter_prompt(resume, jd, applicant_name):
+    return f"""
 You are a professional career assistant.
 
 Generate a formal, customized **cover letter** based on the applicant's resume and the job description below.
@@ -91,22 +170,35 @@ Job Description:
 {jd}
 """
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
 
-    payload = {
-        "model": "mistral-small",
-        "messages": [{"role": "user", "content": prompt}]
-    }
+def gen_cover_letter(resume, jd, applicant_name):
+    resume, jd = prepare(resume, jd)
+    return chat(cover_letter_prompt(resume, jd, applicant_name))
+
+
+def stream_cover_letter(resume, jd, applicant_name):
+    """Yield the cover letter in chunks as Mistral generates it.
 
-    response = requests.post("https://api.mistral.ai/v1/chat/completions", json=payload, headers=headers)
-    print(response.json()["choices"][0]["message"]["content"])
-    return response.json()["choices"][0]["message"]["content"]
+    A cached letter is yielded in one piece; a freshly streamed one is
+    cached once it has been received in full.
+    """
+    resume, jd = prepare(resume, jd)
+    prompt = cover_letter_prompt(resume, jd, applicant_name)
+    key = prompt_key(MODEL, prompt)
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    for delta in client.stream(prompt, MODEL):
+        parts.append(delta)
+        yield delta
+    cache.set(key, "".join(parts))
 
 
 def suggestion_keyword(keywords, jd):
+    """Bullet-point tailoring suggestions for the missing `keywords`; `jd` as prepare() returns it."""
     prompt = f"""
 You are an expert resume consultant. A candidate's resume is missing several key terms that are present in the job description.
 
@@ -121,41 +213,17 @@ Please generate 3–5 short, natural-sounding suggestions to help the candidate
 Respond with only bullet points.
 """
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-
-    payload = {
-        "model": "mistral-small",
-        "messages": [{"role": "user", "content": prompt}]
-    }
+    return chat(prompt)
 
-    response = requests.post("https://api.mistral.ai/v1/chat/completions", json=payload, headers=headers)
-    return response.json()["choices"][0]["message"]["content"]
 
 
-
-# Load the English model
-nlp = spacy.load("en_core_web_sm")
+# the English model is loaded by the registry on first use (or preloaded by gunicorn)
+extractor = KeywordExtractor(model=os.getenv("SPACY_MODEL", "en_core_web_sm"))
 
 def get_tailoring_suggestions(resume: str, jd: str):
     """
     Suggest what to add or emphasize in the resume based on the job description.
-    Returns a list of missing but important keywords from the job description.
+    Returns up to 10 important keywords from the job description that are missing
+    from the resume, most frequent in the job description first.
     """
-    doc_resume = nlp(resume.lower())
-    doc_jd = nlp(jd.lower())
-
-    resume_phrases = set([chunk.text.strip() for chunk in doc_resume.noun_chunks])
-    jd_phrases = set([chunk.text.strip() for chunk in doc_jd.noun_chunks])
-
-    resume_ents = set([ent.text.strip() for ent in doc_resume.ents])
-    jd_ents = set([ent.text.strip() for ent in doc_jd.ents])
-
-    resume_keywords = resume_phrases.union(resume_ents)
-    jd_keywords = jd_phrases.union(jd_ents)
-
-    missing_keywords = [kw for kw in jd_keywords if kw not in resume_keywords and len(kw) > 3]
-
-    return list(set(missing_keywords))[:10]  # limit to top 10
+    return extractor.missing_keywords(resume, jd, limit=10)
@@ -1,12 +1,97 @@
+import time
+_import_started=time.perf_counter()
+
 import flask
 from flask import request, jsonify
 from flask_cors import CORS
-from llm import get_res,gen_cover_letter
+from llm import get_res,gen_cover_letter,stream_cover_letter,analyze_resume,prepare,cache,extractor,readability
+from metrics import metrics
+from ranking import rank
+from pipeline import server_timing
+from mistral_client import MistralError
+from structured import StructuredOutputError
+from ingest import InputTooLarge
+import ingest
+from jobs import JobQueue, MemoryJobStore, SQLiteJobStore, QueueFull, DONE, FINISHED
+from models import registry
 import requests
+import json
+import os
 
 app=flask.Flask(__name__)
 CORS(app)
 
+BATCH_MAX_RESUMES=1000
+BATCH_MAX_TOP_K=50
+BATCH_LLM_CONCURRENCY=4  # LLM evaluations in flight per /batch_rank request
+
+JOB_MAX_WAIT=30  # longest a GET /jobs/<id>?wait= long-poll is held open
+JOB_RETRY_AFTER=2  # seconds suggested to clients when the job backlog is full
+
+# with several gunicorn workers, point JOB_STORE_PATH at a shared SQLite file
+# so a poll that lands on a different worker still finds the job
+if not os.getenv('JOB_STORE_PATH') and int(os.getenv('GUNICORN_WORKERS', '1')) > 1:
+    raise RuntimeError(f"{os.environ['GUNICORN_WORKERS']} gunicorn workers need JOB_STORE_PATH: with the "
+                       "in-memory job store, polls that reach another worker would get 404")
+job_store=(SQLiteJobStore(os.environ['JOB_STORE_PATH']) if os.getenv('JOB_STORE_PATH')
+           else MemoryJobStore())
+jobs=JobQueue(job_store,
+              workers=int(os.getenv('JOB_WORKERS', '16')),
+              max_pending=int(os.getenv('JOB_MAX_PENDING', '64')),
+              error_status=lambda e: 502 if isinstance(e, (MistralError, StructuredOutputError)) else 500)
+
+JOB_TYPES={
+    'gen': lambda resume, jd: get_res(resume, jd),
+    'cover_letter': lambda resume, jd: {"cover_letter": gen_cover_letter(resume, jd, 'abc')},
+}
+
+registry.record_import("main", time.perf_counter()-_import_started)
+app.logger.info("main imported in %.0f ms", registry.import_seconds["main"]*1000)
+
+
+def failed(endpoint, e, status):
+    """Log and count a failed request, then answer with its message."""
+    metrics.inc("resume_errors_total", endpoint=endpoint, type=type(e).__name__)
+    app.logger.exception("%s failed", endpoint)
+    return jsonify({"error":str(e)}),status
+
+
+if metrics.enabled:
+    @app.before_request
+    def start_request_timer():
+        flask.g.request_started=time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        # streamed responses are measured to their headers, not to the last event
+        started=flask.g.get('request_started')
+        if started is not None:
+            endpoint=request.endpoint or 'unmatched'
+            metrics.observe("resume_http_request_seconds", time.perf_counter()-started, endpoint=endpoint)
+            metrics.inc("resume_http_requests_total", endpoint=endpoint, status=response.status_code)
+        return response
+
+
+@metrics.collect
+def cache_metrics():
+    llm_cache=cache.stats()
+    job_stats=jobs.stats()
+    return [
+        ("resume_llm_cache_hits_total", "counter", {"tier": "memory"}, llm_cache["hits"]),
+        ("resume_llm_cache_hits_total", "counter", {"tier": "disk"}, llm_cache["diskHits"]),
+        ("resume_llm_cache_hits_total", "counter", {"tier": "inflight"}, llm_cache["sharedInflight"]),
+        ("resume_llm_cache_misses_total", "counter", {}, llm_cache["misses"]),
+        ("resume_llm_cache_entries", "gauge", {}, llm_cache["memoryEntries"]),
+        ("resume_jd_cache_hits_total", "counter", {}, extractor.jd_hits),
+        ("resume_jd_cache_misses_total", "counter", {}, extractor.jd_misses),
+        ("resume_readability_cache_hits_total", "counter", {}, readability.hits),
+        ("resume_readability_cache_misses_total", "counter", {}, readability.misses),
+        ("resume_jobs_pending", "gauge", {}, job_stats["pending"]),
+        ("resume_jobs_rejected_total", "counter", {}, job_stats["rejected"]),
+        ("resume_models_ready", "gauge", {}, int(registry.ready())),
+    ]
+
+
 @app.route('/')
 def index():
     return flask.render_template('index.html')
@@ -22,10 +107,18 @@ def gen():
         if not resume or not jd:
             return jsonify({"error": "Resume and job description are required"}), 400
 
-        result=get_res(resume, jd)
-        return result
+        timings={}
+        result=get_res(resume, jd, timings)
+        app.logger.info("/gen stages: %s", server_timing(timings))
+        response=jsonify(result)
+        response.headers['Server-Timing']=server_timing(timings)
+        return response
+    except InputTooLarge as e:
+        return jsonify({"error":str(e)}),413
+    except (MistralError, StructuredOutputError) as e:
+        return failed('gen', e, 502)
     except Exception as e:
-        return jsonify({"error":str(e)}),500
+        return failed('gen', e, 500)
     
 
 @app.route('/cover_letter',methods=['GET','POST'])
@@ -38,8 +131,228 @@ def gen_cover():
         if not resume or not jd:
             return jsonify({"error": "Resume and job description are required"}), 400
 
+        # before any streaming starts, so oversized input is a 413 and not an SSE error
+        resume, jd = prepare(resume, jd)
+
+        if data.get('stream') or request.accept_mimetypes.best == 'text/event-stream':
+            return stream_cover(resume, jd, 'abc')
+
         result=gen_cover_letter(resume, jd,'abc')
         return jsonify({"cover_letter": result})
+    except InputTooLarge as e:
+        return jsonify({"error":str(e)}),413
+    except (MistralError, StructuredOutputError) as e:
+        return failed('cover_letter', e, 502)
     except Exception as e:
-        return jsonify({"error":str(e)}),500
-    
\ No newline at end of file
+        return failed('cover_letter', e, 500)
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_cover(resume, jd, applicant_name):
+    """Forward the cover letter to the browser as Server-Sent Events while it is generated."""
+    def events():
+        started=time.perf_counter()
+        first=None
+        chunks=0
+        try:
+            for delta in stream_cover_letter(resume, jd, applicant_name):
+                if first is None:
+                    first=time.perf_counter()-started
+                chunks+=1
+                yield sse("delta", {"text": delta})
+        except Exception as e:
+            metrics.inc("resume_errors_total", endpoint='cover_letter', type=type(e).__name__)
+            app.logger.exception("cover_letter stream failed")
+            yield sse("error", {"error": str(e)})
+            return
+        total=time.perf_counter()-started
+        app.logger.info("/cover_letter stream: first chunk %.1f ms, %d chunks, %.1f ms total",
+                        (first or 0)*1000, chunks, total*1000)
+        yield sse("done", {"chunks": chunks, "firstChunkMs": round((first or 0)*1000, 1),
+                           "totalMs": round(total*1000, 1)})
+
+    return flask.Response(flask.stream_with_context(events()), mimetype='text/event-stream',
+                          headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/batch_rank',methods=['POST'])
+def batch_rank():
+    """Rank many resumes against one JD.
+
+    Body: {"jd": str, "resumes": [str | {"id", "resume"}], "top_k": int, "stream": bool}.
+    Every resume gets a local pre-score; only the top_k go to the LLM. By default
+    the response is NDJSON, one event per line as work completes.
+    """
+    data=request.get_json(silent=True) or {}
+    jd=data.get('jd')
+    resumes=data.get('resumes') or []
+
+    if not jd or not resumes:
+        return jsonify({"error": "A job description and at least one resume are required"}), 400
+    if len(resumes) > BATCH_MAX_RESUMES:
+        return jsonify({"error": f"At most {BATCH_MAX_RESUMES} resumes per request"}), 413
+
+    candidates=[]
+    for i, r in enumerate(resumes):
+        if isinstance(r, dict):
+            candidates.append({"id": r.get('id', i), "resume": r.get('resume') or ''})
+        else:
+            candidates.append({"id": i, "resume": str(r)})
+    if len({c['id'] for c in candidates}) != len(candidates):
+        return jsonify({"error": "Resume ids must be unique"}), 400
+    try:
+        ingest.check_size('jd', jd)
+        for c in candidates:
+            ingest.check_size(f"resume {c['id']}", c['resume'])
+    except InputTooLarge as e:
+        return jsonify({"error":str(e)}),413
+
+    try:
+        top_k=max(0, min(int(data.get('top_k', 10)), BATCH_MAX_TOP_K))
+    except (TypeError, ValueError):
+        return jsonify({"error": "top_k must be an integer"}), 400
+
+    events=rank(extractor, analyze_resume, jd, candidates, top_k, BATCH_LLM_CONCURRENCY)
+
+    if not data.get('stream', True):
+        try:
+            final=[e for e in events if e['type'] == 'ranking'][0]
+            return jsonify({"ranking": final['ranking']})
+        except Exception as e:
+            return failed('batch_rank', e, 500)
+
+    def lines():
+        try:
+            for event in events:
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            metrics.inc("resume_errors_total", endpoint='batch_rank', type=type(e).__name__)
+            app.logger.exception("batch_rank stream failed")
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+
+    return flask.Response(flask.stream_with_context(lines()), mimetype='application/x-ndjson',
+                          headers={'X-Accel-Buffering': 'no'})
+
+
+@app.route('/jobs',methods=['POST'])
+def submit_job():
+    """Queue a /gen or /cover_letter request and return its job id at once.
+
+    Body: {"type": "gen" | "cover_letter", "resume": str, "jd": str}. The
+    result is fetched from GET /jobs/<id> (optionally long-polling with
+    ?wait=seconds) or followed as Server-Sent Events on /jobs/<id>/events.
+    """
+    data=request.get_json(silent=True) or {}
+    kind=data.get('type', 'gen')
+    resume = data.get('resume')
+    jd=data.get('jd')
+
+    if kind not in JOB_TYPES:
+        return jsonify({"error": f"Unknown job type {kind!r}"}), 400
+    if not resume or not jd:
+        return jsonify({"error": "Resume and job description are required"}), 400
+
+    try:
+        resume_doc, jd_doc=ingest.resume(resume), ingest.jd(jd)
+    except InputTooLarge as e:
+        return jsonify({"error":str(e)}),413
+
+    try:
+        # the same resume and JD (up to whitespace/unicode) joins the job already running
+        job=jobs.submit(kind, JOB_TYPES[kind], resume_doc.text, jd_doc.text,
+                        key=f"{kind}:{resume_doc.digest}:{jd_doc.digest}")
+    except QueueFull as e:
+        response=jsonify({"error": str(e)})
+        response.headers['Retry-After']=str(JOB_RETRY_AFTER)
+        return response, 429
+
+    response=jsonify({"id": job['id'], "type": kind, "status": job['status']})
+    response.headers['Location']=flask.url_for('get_job', job_id=job['id'])
+    return response, 202
+
+
+@app.route('/jobs',methods=['GET'])
+def job_stats():
+    return jsonify(jobs.stats())
+
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    try:
+        wait=min(max(float(request.args.get('wait', 0)), 0), JOB_MAX_WAIT)
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+
+    job=jobs.wait(job_id, wait)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job)
+
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Job status as Server-Sent Events: "status" while it runs, then "done" or "error"."""
+    if job_store.get(job_id) is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    def events():
+        last=None
+        idle=0
+        while True:
+            job=jobs.wait(job_id, 1.0)
+            if job is None:
+                yield sse("error", {"error": "Unknown or expired job"})
+                return
+            if job['status'] == DONE:
+                yield sse("done", job)
+                return
+            if job['status'] in FINISHED:
+                yield sse("error", job)
+                return
+            if job['status'] != last:
+                last=job['status']
+                idle=0
+                yield sse("status", {"id": job_id, "status": last})
+            else:
+                idle+=1
+                if idle % 15 == 0:
+                    yield ": keep-alive\n\n"
+
+    return flask.Response(flask.stream_with_context(events()), mimetype='text/event-stream',
+                          headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/health')
+def health():
+    """Liveness: the worker is up. Does not wait for models."""
+    return jsonify({"status": "ok"})
+
+
+@app.route('/ready')
+def ready():
+    """Readiness: 200 once the NLP models are loaded in this worker, 503 until then.
+
+    The first call on a cold worker starts loading them in the background,
+    so a health check against this endpoint also warms the worker.
+    """
+    if not registry.ready():
+        registry.warm()
+    status=registry.status()
+    status["pid"]=os.getpid()
+    return jsonify(status), (200 if status["ready"] else 503)
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """This worker's metrics in Prometheus text format (each gunicorn worker keeps its own)."""
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics are disabled (METRICS_ENABLED=0)"}), 404
+    return flask.Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/cache_stats')
+def cache_stats():
+    return jsonify(cache.stats())
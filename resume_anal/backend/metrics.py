@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Summary:
+    """Count and sum of every observation, quantiles over the most recent `window`."""
+
+    def __init__(self, window):
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def quantiles(self):
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {q: float("nan") for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "started")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+
+
+_NULL_TIMER = nullcontext()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _number(value):
+    if value != value:
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Counters and latency summaries for this worker, rendered as Prometheus text.
+
+    Latencies are summaries: `_count`/`_sum` over the process lifetime and
+    p50/p95/p99 over the last `window` observations of each label set.
+    Collectors registered with `collect()` contribute values computed at
+    scrape time (cache statistics and the like). With `enabled=False` every
+    recording call returns immediately and `timer`/`timed` add nothing.
+    """
+
+    def __init__(self, enabled=True, window=1024):
+        self.enabled = enabled
+        self.window = window
+        self._counters = {}
+        self._summaries = {}
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = _Summary(self.window)
+            summary.observe(seconds)
+
+    def timer(self, name, **labels):
+        """Context manager observing its duration into `name`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of `timer`."""
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def collect(self, fn):
+        """Register `fn() -> [(name, "counter" | "gauge", labels dict, value)]`, called at scrape time."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        families = {}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                families.setdefault((name, "counter"), []).append((name, labels, value))
+            for (name, labels), summary in self._summaries.items():
+                samples = families.setdefault((name, "summary"), [])
+                for q, value in summary.quantiles().items():
+                    samples.append((name, labels + (("quantile", q),), value))
+                samples.append((f"{name}_sum", labels, summary.sum))
+                samples.append((f"{name}_count", labels, summary.count))
+        for collector in self._collectors:
+            for name, kind, labels, value in collector():
+                families.setdefault((name, kind), []).append((name, tuple(sorted(labels.items())), value))
+
+        lines = []
+        for (name, kind), samples in sorted(families.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample, labels, value in samples:
+                lines.append(f"{sample}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(enabled=os.getenv("METRICS_ENABLED", "1") == "1",
+                  window=int(os.getenv("METRICS_WINDOW", "1024")))
+
+metrics.describe("resume_http_request_seconds", "Time to response headers per endpoint")
+metrics.describe("resume_http_requests_total", "Requests per endpoint and status code")
+metrics.describe("resume_stage_seconds", "Time per processing stage")
+metrics.describe("resume_errors_total", "Failed requests per endpoint and error type")
+metrics.describe("resume_llm_request_seconds", "Upstream chat-completions latency, retries included")
+metrics.describe("resume_llm_retries_total", "Upstream attempts retried, by reason")
+metrics.describe("resume_llm_tokens_total", "Upstream token usage reported in the usage field")
+metrics.describe("resume_structured_output_total", "LLM JSON outputs by outcome: clean, repaired, reprompted, failed")
+metrics.describe("resume_ingest_trimmed_total", "Inputs cut down to their prompt token budget")
@@ -0,0 +1,171 @@
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import metrics
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class MistralError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def retry_after(response):
+    """Seconds the server asked us to wait, from a Retry-After header (seconds or HTTP date)."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def record_usage(model, usage):
+    """Count the tokens from a chat-completions `usage` object."""
+    if not usage:
+        return
+    for kind in ("prompt", "completion"):
+        tokens = usage.get(f"{kind}_tokens")
+        if tokens:
+            metrics.inc("resume_llm_tokens_total", tokens, model=model, kind=kind)
+
+
+class MistralClient:
+    """Chat-completions client shared by the whole worker.
+
+    One pooled keep-alive `requests.Session`, connect/read timeouts, retries
+    on 429/5xx and connection errors with jittered exponential backoff that
+    honours Retry-After, and a semaphore capping concurrent upstream calls.
+    """
+
+    def __init__(self, url, api_key, connect_timeout=5.0, read_timeout=60.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=20.0, max_concurrency=8, pool_size=16):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls, api_key):
+        return cls(
+            os.getenv("MISTRAL_API_URL", "https://api.mistral.ai/v1/chat/completions"),
+            api_key,
+            connect_timeout=float(os.getenv("MISTRAL_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("MISTRAL_READ_TIMEOUT", "60")),
+            max_retries=int(os.getenv("MISTRAL_MAX_RETRIES", "3")),
+            max_concurrency=int(os.getenv("MISTRAL_MAX_CONCURRENCY", "8")),
+        )
+
+    def _backoff(self, attempt, response=None):
+        delay = retry_after(response) if response is not None else None
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return min(delay, self.backoff_max)
+
+    def _request(self, payload, stream):
+        """POST with retries. The response comes back still holding a concurrency slot; release it when done."""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            self.limiter.acquire()
+            try:
+                response = self.session.post(self.url, json=payload, headers=headers,
+                                             timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.limiter.release()
+                if last:
+                    raise MistralError(f"Mistral request failed: {e}") from e
+                metrics.inc("resume_llm_retries_total", reason=type(e).__name__)
+                time.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                self.limiter.release()
+                raise
+            if response.status_code < 400:
+                return response
+            self.limiter.release()
+
+            if response.status_code in RETRY_STATUSES and not last:
+                metrics.inc("resume_llm_retries_total", reason=str(response.status_code))
+                delay = self._backoff(attempt, response)
+                response.close()
+                time.sleep(delay)
+                continue
+            raise MistralError(f"Mistral returned {response.status_code}: {response.text[:200]}",
+                               response.status_code)
+
+    def post(self, payload):
+        """POST a chat-completions payload, retrying transient failures. Returns the Response."""
+        response = self._request(payload, stream=False)
+        self.limiter.release()  # the body has been read
+        return response
+
+    def chat(self, prompt, model):
+        """Full chat-completions response body for a single user message."""
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        with metrics.timer("resume_llm_request_seconds", model=model, mode="complete"):
+            body = self.post(payload).json()
+        record_usage(model, body.get("usage"))
+        return body
+
+    def complete(self, prompt, model):
+        return self.chat(prompt, model)["choices"][0]["message"]["content"]
+
+    def stream(self, prompt, model):
+        """Yield content deltas as the completion is generated (`stream: true`, SSE)."""
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True,
+        }
+        started = time.perf_counter()
+        # the slot is held until the body is read (or the caller stops reading)
+        response = self._request(payload, stream=True)
+        try:
+            with response:
+                # bytes, decoded here: text/event-stream is UTF-8, but without a charset
+                # parameter requests would decode it as ISO-8859-1
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[len(b"data:"):].decode("utf-8").strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    # the last chunk carries the usage for the whole completion
+                    record_usage(model, chunk.get("usage"))
+                    for choice in chunk.get("choices", []):
+                        delta = choice.get("delta", {}).get("content")
+                        if delta:
+                            yield delta
+        finally:
+            self.limiter.release()
+        metrics.observe("resume_llm_request_seconds", time.perf_counter() - started, model=model, mode="stream")
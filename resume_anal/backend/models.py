@@ -0,0 +1,91 @@
+import threading
+import time
+
+
+class ModelRegistry:
+    """Heavy models (spaCy pipelines), loaded once per process on first use.
+
+    Nothing is loaded at import, so a worker can serve `/` immediately.
+    `preload()` loads everything registered up front, which is what the
+    gunicorn master does with `preload_app` so forked workers share the
+    pages copy-on-write; `warm()` does the same on a background thread.
+    Load and import times are kept for the readiness endpoint.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.load_seconds = {}
+        self.import_seconds = {}
+        self.errors = {}
+        self._warm_thread = None
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders.setdefault(name, loader)
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name, loader=None):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if loader is not None:
+            self.register(name, loader)
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                started = time.perf_counter()
+                try:
+                    model = self._loaders[name]()
+                except Exception as e:
+                    self.errors[name] = str(e)
+                    raise
+                self.load_seconds[name] = time.perf_counter() - started
+                self.errors.pop(name, None)
+                self._models[name] = model
+        return model
+
+    def preload(self):
+        for name in list(self._loaders):
+            self.get(name)
+
+    def warm(self):
+        """Load every registered model on a daemon thread, unless one is already doing so."""
+        with self._lock:
+            if self._warm_thread is None or not self._warm_thread.is_alive():
+                self._warm_thread = threading.Thread(target=self._warm, name="model-warm", daemon=True)
+                self._warm_thread.start()
+            return self._warm_thread
+
+    def _warm(self):
+        for name in list(self._loaders):
+            try:
+                self.get(name)
+            except Exception:
+                pass  # recorded in self.errors and retried on first use
+
+    def loaded(self, name):
+        return name in self._models
+
+    def ready(self):
+        return all(name in self._models for name in self._loaders)
+
+    def record_import(self, name, seconds):
+        self.import_seconds[name] = seconds
+
+    def status(self):
+        return {
+            "ready": self.ready(),
+            "models": {
+                name: {"loaded": name in self._models,
+                       "loadSeconds": round(self.load_seconds[name], 3) if name in self.load_seconds else None,
+                       "error": self.errors.get(name)}
+                for name in self._loaders
+            },
+            "importSeconds": {name: round(s, 3) for name, s in self.import_seconds.items()},
+        }
+
+
+registry = ModelRegistry()
@@ -0,0 +1,61 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# shared by every request in this worker; stages mostly wait on the network
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="stage")
+
+
+class Pipeline:
+    """A tiny dependency graph of named stages run on a thread pool.
+
+    Each stage is `fn(*dep_results)`; a stage starts as soon as all of its
+    dependencies have finished, so independent branches overlap and the
+    whole run takes roughly as long as its slowest path.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor or _executor
+        self.stages = {}
+
+    def stage(self, name, fn, deps=()):
+        self.stages[name] = (fn, tuple(deps))
+        return self
+
+    def run(self, timings=None):
+        """Run every stage; returns {name: result}. Per-stage seconds go into `timings`."""
+        timings = {} if timings is None else timings
+        started = time.perf_counter()
+        results = {}
+        running = {}
+        waiting = dict(self.stages)
+
+        def timed(name, fn, args):
+            t = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                timings[name] = time.perf_counter() - t
+
+        try:
+            while waiting or running:
+                for name, (fn, deps) in list(waiting.items()):
+                    if all(d in results for d in deps):
+                        args = [results[d] for d in deps]
+                        running[self.executor.submit(timed, name, fn, args)] = name
+                        del waiting[name]
+                if not running:
+                    missing = {d for _, deps in waiting.values() for d in deps if d not in self.stages}
+                    raise ValueError(f"Unresolvable stage dependencies: {sorted(missing) or 'cycle'}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        finally:
+            for future in running:
+                future.cancel()
+            timings["total"] = time.perf_counter() - started
+        return results
+
+
+def server_timing(timings):
+    """Format stage timings as a Server-Timing header value (milliseconds)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
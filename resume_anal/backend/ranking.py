@@ -0,0 +1,106 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+KEYWORD_WEIGHT = 0.5  # pre-score = weighted keyword overlap + (1 - weight) * TF-IDF cosine
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+def tfidf_cosine(jd, resumes):
+    """Cosine similarity of each resume to the JD over TF-IDF vectors.
+
+    The term-document matrix is kept in coordinate form (row, col, value
+    arrays), so the cost is proportional to the number of distinct terms
+    per document rather than resumes x vocabulary.
+    """
+    docs = [tokenize(jd)] + [tokenize(r) for r in resumes]
+    vocab = {}
+    rows, cols, counts = [], [], []
+    for row, tokens in enumerate(docs):
+        if not tokens:
+            continue
+        terms, tf = np.unique([vocab.setdefault(t, len(vocab)) for t in tokens], return_counts=True)
+        rows.append(np.full(len(terms), row))
+        cols.append(terms)
+        counts.append(tf)
+    if not rows:
+        return np.zeros(len(resumes))
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    tf = np.concatenate(counts).astype(float)
+
+    n_docs = len(docs)
+    df = np.bincount(cols, minlength=len(vocab))
+    idf = np.log((1 + n_docs) / (1 + df)) + 1  # smoothed, as in scikit-learn
+    weights = tf * idf[cols]
+
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_docs))
+    jd_vec = np.zeros(len(vocab))
+    jd_mask = rows == 0
+    jd_vec[cols[jd_mask]] = weights[jd_mask]
+    dots = np.bincount(rows, weights=weights * jd_vec[cols], minlength=n_docs)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosine = np.where(norms * norms[0] > 0, dots / (norms * norms[0]), 0.0)
+    return cosine[1:]
+
+
+def keyword_overlap(jd_counts, resume_counts):
+    """Share of the JD's keyword mass (noun chunks + entities) that the resume covers."""
+    total = sum(jd_counts.values())
+    if not total:
+        return 0.0
+    covered = sum(n for kw, n in jd_counts.items() if kw in resume_counts)
+    return covered / total
+
+
+def prescore(extractor, jd, resumes):
+    """Local 0-100 pre-score per resume: keyword overlap blended with TF-IDF cosine."""
+    jd_counts = extractor.jd_keywords(jd)
+    overlap = np.array([keyword_overlap(jd_counts, counts) for counts in extractor.keywords_many(resumes)])
+    cosine = tfidf_cosine(jd, resumes)
+    return np.round(100 * (KEYWORD_WEIGHT * overlap + (1 - KEYWORD_WEIGHT) * cosine), 2)
+
+
+def rank(extractor, evaluate, jd, candidates, top_k=10, max_concurrency=4):
+    """Rank candidates against one JD, yielding events as work completes.
+
+    `candidates` is a list of {"id", "resume"} dicts. Every candidate is
+    pre-scored locally, then only the top `top_k` go to `evaluate(resume, jd)`
+    (the LLM), at most `max_concurrency` at a time. Yields, in order:
+    {"type": "prescore", ...}, one {"type": "evaluation", ...} per finished
+    LLM call, and a final {"type": "ranking", ...} with the merged order.
+    """
+    scores = prescore(extractor, jd, [c["resume"] for c in candidates])
+    ranked = sorted(
+        ({"id": c["id"], "preScore": float(s)} for c, s in zip(candidates, scores)),
+        key=lambda r: -r["preScore"])
+    yield {"type": "prescore", "ranking": ranked}
+
+    shortlist = ranked[:top_k]
+    by_id = {c["id"]: c for c in candidates}
+    evaluated = {}
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        futures = {pool.submit(evaluate, by_id[r["id"]]["resume"], jd): r for r in shortlist}
+        for future in as_completed(futures):
+            entry = dict(futures[future])
+            try:
+                entry["analysis"] = future.result()
+                entry["matchScore"] = entry["analysis"].get("matchScore")
+            except Exception as e:
+                entry["error"] = str(e)
+            evaluated[entry["id"]] = entry
+            yield {"type": "evaluation", **entry}
+
+    def llm_score(r):
+        score = r.get("matchScore")
+        return score if isinstance(score, (int, float)) else -1
+
+    final = sorted(evaluated.values(), key=lambda r: (-llm_score(r), -r["preScore"]))
+    final += [r for r in ranked if r["id"] not in evaluated]
+    yield {"type": "ranking", "ranking": final}
@@ -0,0 +1,140 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import textstat
+
+# textstat 0.7.8's tokenization (pinned in requirements.txt; other releases differ):
+# apostrophes survive only inside contractions, other punctuation is dropped
+# (textstat does this in two substitutions; one is equivalent)
+PUNCTUATION = re.compile(r"[^\w\s']|'(?![tsd]|ve|ll|re)")
+SENTENCE = re.compile(r"\b[^.!?]+[.!?]*", re.UNICODE)
+
+DIFFICULT_SYLLABLES = 3  # textstat's English threshold for Gunning fog "difficult" words
+POLYSYLLABLE = 3  # SMOG counts words of three or more syllables
+
+
+def words(text):
+    return PUNCTUATION.sub("", text).split()
+
+
+# syllables and difficulty are per-word properties, so each distinct word is
+# looked up once (textstat lowercases before either check)
+@lru_cache(maxsize=65536)
+def word_stats(word):
+    return textstat.syllable_count(word), textstat.is_difficult_word(word, DIFFICULT_SYLLABLES)
+
+
+def text_counts(text):
+    """Every count the metrics need, from one tokenization of `text`."""
+    stats = [word_stats(w.lower()) for w in words(text)]
+    sentence_lengths = [len(words(s)) for s in SENTENCE.findall(text)]
+    # like textstat, fragments of two words or fewer ("Skills:", "Jan 2020") are not sentences
+    counted = [n for n in sentence_lengths if n > 2]
+    return {
+        "words": len(stats),
+        "syllables": sum(n for n, _ in stats),
+        "polysyllables": sum(1 for n, _ in stats if n >= POLYSYLLABLE),
+        "difficult": sum(1 for _, hard in stats if hard),
+        "sentences": max(1, len(counted)) if text else 0,
+        "sentenceLengths": counted,
+    }
+
+
+def percentile(ordered, q):
+    """Linearly interpolated percentile of a sorted list (numpy's default method)."""
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return float(ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo))
+
+
+def scores(counts):
+    """Readability metrics for a list of `text_counts` results, computed column-wise.
+
+    The formulas and their zero guards follow textstat, so the values are
+    the same as calling textstat.flesch_reading_ease(text) and friends.
+    """
+    n_words = np.array([c["words"] for c in counts], dtype=float)
+    n_syllables = np.array([c["syllables"] for c in counts], dtype=float)
+    n_poly = np.array([c["polysyllables"] for c in counts], dtype=float)
+    n_difficult = np.array([c["difficult"] for c in counts], dtype=float)
+    n_sentences = np.array([c["sentences"] for c in counts], dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wps = np.where(n_sentences > 0, n_words / n_sentences, 0.0)
+        spw = np.where(n_words > 0, n_syllables / n_words, 0.0)
+        flesch_ok = (wps != 0) & (spw != 0)
+        fre = np.where(flesch_ok, 206.835 - 1.015 * wps - 84.6 * spw, 0.0)
+        fkg = np.where(flesch_ok, 0.39 * wps + 11.8 * spw - 15.59, 0.0)
+        fog = np.where(n_words > 0, 0.4 * (wps + 100 * n_difficult / n_words), 0.0)
+        smog = np.where(n_sentences > 0, 1.043 * (30 * (n_poly / n_sentences)) ** 0.5 + 3.1291, 0.0)
+
+    results = []
+    for i, c in enumerate(counts):
+        lengths = sorted(c["sentenceLengths"]) or [0]
+        results.append({
+            "fleschReadingEase": float(fre[i]),
+            "fleschKincaidGrade": float(fkg[i]),
+            "gunningFog": float(fog[i]),
+            "smogIndex": float(smog[i]),
+            "words": c["words"],
+            "syllables": c["syllables"],
+            "sentences": c["sentences"],
+            "wordsPerSentence": float(wps[i]),
+            "sentenceLength": {
+                "median": percentile(lengths, 50),
+                "p90": percentile(lengths, 90),
+                "max": lengths[-1],
+            },
+        })
+    return results
+
+
+class ReadabilityScorer:
+    """Readability metrics from a single pass over the text, memoized by text hash.
+
+    `analyze` scores one resume; `analyze_many` scores a batch, tokenizing
+    only texts it has not seen and evaluating the formulas over the whole
+    batch at once.
+    """
+
+    def __init__(self, cache_size=1024):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def analyze(self, text):
+        return self.analyze_many([text])[0]
+
+    def analyze_many(self, texts):
+        keys = [hashlib.sha256(t.encode("utf-8")).hexdigest() for t in texts]
+        results = [None] * len(texts)
+        todo = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    results[i] = cached
+                else:
+                    todo.setdefault(key, []).append(i)
+            self.misses += len(todo)
+
+        if todo:
+            fresh = scores([text_counts(texts[idx[0]]) for idx in todo.values()])
+            with self._lock:
+                for (key, idx), result in zip(todo.items(), fresh):
+                    for i in idx:
+                        results[i] = result
+                    self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        # callers get their own copies so they can round or extend them
+        return [dict(r, sentenceLength=dict(r["sentenceLength"])) for r in results]
@@ -0,0 +1,259 @@
+"""Tolerant parsing of JSON the model was asked to return.
+
+Models wrap JSON in markdown fences, add a sentence before or after it,
+leave trailing commas, use smart quotes or Python literals, or stop before
+the closing brace. `parse` finds the first JSON object in the output,
+repairs what it safely can and conforms it to a schema; only if that fails
+does the caller need to spend another (small) upstream call via
+`fix_json_prompt`.
+"""
+import ast
+import json
+import re
+
+FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"'})
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+PY_LITERALS = re.compile(r"\b(True|False|None)\b")
+DANGLING_KEY = re.compile(r'([{,])\s*"(?:[^"\\]|\\.)*"$')
+
+# "list" fields default to [] and accept a lone string; "str" fields accept a
+# list (joined); "score" is an integer clamped to 0..100 and is required
+ANALYSIS_SCHEMA = {
+    "matchScore": "score",
+    "strengths": "list",
+    "weaknesses": "list",
+    "missingSkills": "list",
+    "areasForImprovement": "list",
+    "recruiterPerspective": "str",
+    "summary": "str",
+}
+
+
+class StructuredOutputError(ValueError):
+    """The output could not be turned into an object matching the schema."""
+
+
+def first_object(text):
+    """The first balanced {...} in `text`, or everything from the first "{" if it never closes."""
+    fenced = FENCE.search(text)
+    if fenced and "{" in fenced.group(1):
+        text = fenced.group(1)
+    start = text.find("{")
+    if start < 0:
+        raise StructuredOutputError("no JSON object in the output")
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            depth += 1
+        elif c in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def _strip_comments(text):
+    out = []
+    i = 0
+    in_string = False
+    while i < len(text):
+        c = text[i]
+        if in_string:
+            out.append(c)
+            if c == "\\" and i + 1 < len(text):
+                out.append(text[i + 1])
+                i += 1
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+            out.append(c)
+        elif text.startswith("//", i):
+            end = text.find("\n", i)
+            i = len(text) if end < 0 else end
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = len(text) if end < 0 else end + 2
+            continue
+        else:
+            out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _escape_newlines_in_strings(text):
+    out = []
+    in_string = False
+    escaped = False
+    for c in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+            elif c == "\n":
+                out.append("\\n")
+                continue
+        elif c == '"':
+            in_string = True
+        out.append(c)
+    return "".join(out)
+
+
+def _outside_strings(text, fix):
+    """`text` with `fix` applied to everything outside string literals."""
+    out = []
+    start = 0
+    i = 0
+    in_string = False
+    while i < len(text):
+        c = text[i]
+        if in_string:
+            if c == "\\":
+                i += 1
+            elif c == '"':
+                in_string = False
+                out.append(text[start:i + 1])
+                start = i + 1
+        elif c == '"':
+            in_string = True
+            out.append(fix(text[start:i]))
+            start = i
+        i += 1
+    out.append(text[start:] if in_string else fix(text[start:]))
+    return "".join(out)
+
+
+def _fix_tokens(text):
+    text = TRAILING_COMMA.sub(r"\1", text)
+    return PY_LITERALS.sub(lambda m: {"True": "true", "False": "false", "None": "null"}[m.group(1)], text)
+
+
+def _close_truncated(text):
+    """Close an unterminated string and any open brackets (output cut off mid-object)."""
+    stack = []
+    in_string = False
+    escaped = False
+    for c in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",").rstrip()
+    if stack and stack[-1] == "}":
+        # an object key with no value yet: drop it
+        text = DANGLING_KEY.sub(r"\1", text).rstrip().rstrip(",")
+    if text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(stack))
+
+
+def repair(text):
+    """Fix the usual defects in model-written JSON. Returns the repaired text."""
+    if '"' not in text:
+        # curly quotes used as the delimiters; inside ordinary strings they are content
+        text = text.translate(SMART_QUOTES)
+    text = _strip_comments(text)
+    text = _escape_newlines_in_strings(text)
+    text = _close_truncated(text)
+    return _outside_strings(text, _fix_tokens)
+
+
+def conform(obj, schema):
+    """Coerce `obj` to `schema` in place where the intent is clear. Returns True if anything changed."""
+    if not isinstance(obj, dict):
+        raise StructuredOutputError("expected a JSON object")
+    changed = False
+    for field, kind in schema.items():
+        value = obj.get(field)
+        if kind == "score":
+            if isinstance(value, str):
+                match = re.search(r"\d+(?:\.\d+)?", value)
+                value = float(match.group()) if match else None
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise StructuredOutputError(f"{field} is missing or not a number")
+            fixed = int(round(min(max(value, 0), 100)))
+        elif kind == "list":
+            if value is None:
+                fixed = []
+            elif isinstance(value, str):
+                fixed = [value] if value.strip() else []
+            elif isinstance(value, list):
+                fixed = [v if isinstance(v, str) else json.dumps(v) for v in value]
+            else:
+                raise StructuredOutputError(f"{field} should be a list of strings")
+        else:
+            if value is None:
+                fixed = ""
+            elif isinstance(value, list):
+                fixed = " ".join(str(v) for v in value)
+            else:
+                fixed = str(value)
+        if fixed != value or type(fixed) is not type(value):
+            obj[field] = fixed
+            changed = True
+    return changed
+
+
+def parse(text, schema):
+    """(object, repaired) for model output `text`; raises StructuredOutputError if unusable.
+
+    `repaired` is False only when the output was exactly a valid object of
+    the right shape.
+    """
+    try:
+        obj = json.loads(text)
+        repaired = False
+    except ValueError:
+        candidate = first_object(text)
+        try:
+            obj = json.loads(candidate)
+        except ValueError:
+            try:
+                obj = json.loads(repair(candidate))
+            except ValueError as e:
+                try:
+                    # a Python dict literal: single quotes, True/None, trailing commas
+                    obj = ast.literal_eval(candidate)
+                except (ValueError, SyntaxError, MemoryError, RecursionError):
+                    raise StructuredOutputError(f"invalid JSON after repair: {e}") from e
+        repaired = True
+    return obj, conform(obj, schema) or repaired
+
+
+def fix_json_prompt(text, error, schema):
+    """A short prompt asking the model to re-emit `text` as valid JSON (no resume or JD)."""
+    fields = ", ".join(f'"{name}"' for name in schema)
+    return f"""The following was meant to be a single JSON object with the fields {fields}, but it is not valid ({error}).
+
+Return only the corrected JSON object: no markdown, no comments, no text before or after it. Keep the content unchanged.
+
+{text}
+"""
@@ -0,0 +1,136 @@
+"""Response cache tiers and single-flight deduplication, against a local fake Mistral server.
+
+    pytest test_cache.py
+"""
+import threading
+
+import pytest
+
+import cache
+import llm
+from cache import DiskTier, MemoryTier, ResponseCache, prompt_key
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def fake_options():
+    # slow enough that the concurrent calls overlap
+    return {"latency": 0.3}
+
+
+def test_prompt_key_ignores_whitespace():
+    assert prompt_key("m", "Rate  this\n resume ") == prompt_key("m", "Rate this resume")
+    assert prompt_key("m", "Rate this resume") != prompt_key("other", "Rate this resume")
+
+
+def test_memory_tier_expires_entries(clock):
+    tier = MemoryTier(ttl=60)
+    tier.set("k", "v")
+    clock.advance(59)
+    assert tier.get("k") == "v"
+    clock.advance(2)
+    assert tier.get("k") is None
+    assert len(tier) == 0
+
+
+def test_memory_tier_evicts_least_recently_used(clock):
+    tier = MemoryTier(max_entries=2)
+    tier.set("a", "1")
+    tier.set("b", "2")
+    tier.get("a")
+    tier.set("c", "3")
+    assert tier.get("b") is None
+    assert (tier.get("a"), tier.get("c")) == ("1", "3")
+
+
+def test_disk_tier_expires_entries(clock, tmp_path):
+    tier = DiskTier(str(tmp_path / "cache.db"), ttl=60)
+    tier.set("k", "v")
+    clock.advance(59)
+    assert tier.get("k") == "v"
+    clock.advance(2)
+    assert tier.get("k") is None
+
+
+def test_disk_tier_evicts_least_recently_used_past_max_bytes(clock, tmp_path):
+    tier = DiskTier(str(tmp_path / "cache.db"), max_bytes=15)
+    tier.set("a", "x" * 6)
+    clock.advance(1)
+    tier.set("b", "y" * 6)
+    clock.advance(1)
+    tier.get("a")
+    clock.advance(1)
+    tier.set("c", "z" * 6)
+    assert tier.get("b") is None
+    assert (tier.get("a"), tier.get("c")) == ("x" * 6, "z" * 6)
+
+
+def test_disk_tier_is_shared_across_caches(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(disk_path=path).set("k", "v")
+
+    other = ResponseCache(disk_path=path)
+    assert other.get("k") == "v"
+    assert other.get("k") == "v"
+    stats = other.stats()
+    assert (stats["diskHits"], stats["hits"], stats["memoryEntries"]) == (1, 1, 1)
+
+
+def test_failed_computations_are_not_cached():
+    responses = ResponseCache()
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        responses.get_or_compute("k", fail)
+    assert responses.get_or_compute("k", lambda: "v") == "v"
+    assert responses.stats()["misses"] == 2
+
+
+def test_concurrent_identical_calls_make_one_upstream_request(fake):
+    prompt = "Write three tailoring suggestions"
+    results = []
+    barrier = threading.Barrier(8)
+
+    def call():
+        barrier.wait()
+        results.append(llm.chat(prompt))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert fake.calls == 1
+    assert len(results) == 8 and len(set(results)) == 1
+    stats = llm.cache.stats()
+    assert (stats["misses"], stats["sharedInflight"], stats["hits"]) == (1, 7, 0)
+
+
+def test_hit_and_miss_counters(fake):
+    first = llm.chat("Write three tailoring suggestions")
+    assert llm.chat("Write  three tailoring\nsuggestions ") == first
+    llm.chat("Write a cover letter")
+
+    assert fake.calls == 2
+    stats = llm.cache.stats()
+    assert (stats["misses"], stats["hits"], stats["sharedInflight"]) == (2, 1, 0)
@@ -0,0 +1,80 @@
+"""Cover-letter streaming against a local fake Mistral server.
+
+    pytest test_streaming.py
+"""
+import json
+
+import pytest
+
+import llm
+import main
+from mistral_client import MistralClient
+
+# non-ASCII on purpose: the fake sends it as raw UTF-8 with no charset, like Mistral
+LETTER = "Dear Hiring Manager,\n\nCafé résumé — naïve coöperation, 日本語.\n\nSincerely,\nApplicant"
+RESUME = "Experience\nBackend engineer, five years of Python and Flask."
+JD = "Requirements\nPython, Flask and SQL."
+
+
+@pytest.fixture
+def fake_options():
+    return {"reply": lambda prompt: LETTER}
+
+
+def events(body):
+    """[(event, data)] from a Server-Sent Events body."""
+    out = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in fields:
+            out.append((fields["event"], json.loads(fields["data"])))
+    return out
+
+
+def test_client_stream_yields_utf8_deltas_in_order(fake):
+    deltas = list(llm.client.stream("Write a cover letter", llm.MODEL))
+    assert len(deltas) == len(LETTER.split(" "))
+    assert "".join(deltas) == LETTER
+
+
+def test_client_stream_holds_a_slot_until_read(fake):
+    client = MistralClient(fake.url, "test-key", max_retries=0, max_concurrency=1)
+    stream = client.stream("Write a cover letter", llm.MODEL)
+    next(stream)
+    assert not client.limiter.acquire(blocking=False)
+    stream.close()
+    assert client.limiter.acquire(timeout=1)
+
+
+@pytest.mark.parametrize("request_options", [
+    {"json": {"resume": RESUME, "jd": JD, "stream": True}},
+    {"json": {"resume": RESUME, "jd": JD}, "headers": {"Accept": "text/event-stream"}},
+])
+def test_cover_letter_streams_deltas_then_done(fake, request_options):
+    response = main.app.test_client().post("/cover_letter", **request_options)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+
+    received = events(response.get_data(as_text=True))
+    names = [name for name, _ in received]
+    assert names[-1] == "done"
+    assert set(names[:-1]) == {"delta"}
+    assert "".join(data["text"] for _, data in received[:-1]) == LETTER
+    assert received[-1][1]["chunks"] == len(received) - 1
+
+
+def test_streamed_letter_is_cached(fake):
+    client = main.app.test_client()
+    client.post("/cover_letter", json={"resume": RESUME, "jd": JD, "stream": True}).get_data()
+    received = events(client.post("/cover_letter", json={"resume": RESUME, "jd": JD, "stream": True})
+                      .get_data(as_text=True))
+    assert received == [("delta", {"text": LETTER}), ("done", received[-1][1])]
+    assert fake.calls == 1
+
+
+def test_cover_letter_json_fallback(fake):
+    response = main.app.test_client().post("/cover_letter", json={"resume": RESUME, "jd": JD})
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    assert response.get_json() == {"cover_letter": LETTER}
+    assert fake.calls == 1